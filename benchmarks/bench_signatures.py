@@ -0,0 +1,99 @@
+"""
+Benchmark del matching de firmas binarias.
+
+Compara el motor anterior (re.sub + unhexlify por cada comprobación) con las
+firmas precompiladas al cargar, sobre un DROID_SignatureFile real y un
+directorio de archivos de muestra.
+
+Uso:
+    python benchmarks/bench_signatures.py DROID_SignatureFile.xml CARPETA [--repeat N]
+"""
+
+import argparse, binascii, os, re, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pronom_tools_test.format_info import FormatInfoCollector  # noqa: E402
+
+
+def _legacy_match(sig, data_start, data_end):
+    """Réplica del motor original: decodifica el hex en cada llamada."""
+    for seq in sig.sequences:
+        try:
+            hex_bytes = binascii.unhexlify(re.sub(r"\s+", "", seq["pattern"]))
+        except binascii.Error:
+            return False
+        min_off = seq.get("min_offset", 0)
+        max_off = seq.get("max_offset", 0)
+        loc = seq["location"]
+        if loc == "BOF":
+            limit = min(len(data_start), max_off + 1)
+            if not any(
+                data_start[off : off + len(hex_bytes)] == hex_bytes
+                for off in range(min_off, max(0, limit - len(hex_bytes) + 1))
+            ):
+                return False
+        elif loc == "EOF":
+            found = False
+            for off in range(min_off, max_off + 1):
+                start = len(data_end) - off - len(hex_bytes)
+                if start >= 0 and data_end[start : start + len(hex_bytes)] == hex_bytes:
+                    found = True
+                    break
+            if not found:
+                return False
+        else:
+            if hex_bytes not in data_start and hex_bytes not in data_end:
+                return False
+    return True
+
+
+def _read_windows(path):
+    fsize = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(min(65536, fsize))
+        if fsize > 65536:
+            f.seek(-65536, os.SEEK_END)
+        else:
+            f.seek(0)
+        tail = f.read()
+    return head, tail
+
+
+def _run(signatures, samples, match, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for head, tail in samples:
+            for sig in signatures:
+                if match(sig, head, tail):
+                    break
+    elapsed = time.perf_counter() - t0
+    return (len(samples) * repeat) / elapsed if elapsed else float("inf")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("signature_xml")
+    parser.add_argument("corpus_dir")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    collector = FormatInfoCollector(args.signature_xml)
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(args.corpus_dir)
+        for name in names
+    ]
+    samples = [_read_windows(p) for p in paths]
+    print(f"{len(collector.signatures)} firmas, {len(samples)} archivos")
+
+    before = _run(collector.signatures, samples, _legacy_match, args.repeat)
+    after = _run(
+        collector.signatures, samples, lambda s, h, t: s.match(h, t), args.repeat
+    )
+    print(f"antes:   {before:10.1f} archivos/s")
+    print(f"despues: {after:10.1f} archivos/s  (x{after / before:.1f})")
+
+
+if __name__ == "__main__":
+    main()
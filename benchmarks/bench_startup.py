@@ -0,0 +1,96 @@
+"""
+Benchmark del tiempo de arranque de FormatInfoCollector.
+
+Mide el tiempo de importar el paquete (python -X importtime, en un proceso
+nuevo), la construcción leyendo los XML, la primera construcción con caché
+(compila y escribe), las siguientes (carga desde la caché) y la carga
+perezosa de los contenedores.
+
+Uso:
+    python benchmarks/bench_startup.py DROID_SignatureFile.xml [container.xml] [--repeat N]
+"""
+
+import argparse, os, subprocess, sys, tempfile, time
+
+_SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, _SRC)
+
+from pronom_tools_test.format_info import FormatInfoCollector  # noqa: E402
+
+
+def _timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _import_time(module: str, repeat: int) -> float:
+    """Mejor tiempo acumulado (s) de importar `module` en un intérprete nuevo."""
+    env = dict(os.environ, PYTHONPATH=_SRC)
+    best = float("inf")
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                best = min(best, int(parts[1]) / 1e6)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("signature_xml")
+    parser.add_argument("container_xml", nargs="?")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    imports = {
+        module: _import_time(module, args.repeat)
+        for module in ("pronom_tools_test.format_info", "pronom_tools_test.cli")
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        xml = _timed(
+            lambda: FormatInfoCollector(args.signature_xml, args.container_xml),
+            args.repeat,
+        )
+        t0 = time.perf_counter()
+        FormatInfoCollector(args.signature_xml, args.container_xml, cache_dir)
+        cold = time.perf_counter() - t0
+        warm = _timed(
+            lambda: FormatInfoCollector(
+                args.signature_xml, args.container_xml, cache_dir
+            ),
+            args.repeat,
+        )
+    containers = None
+    if args.container_xml:
+        db = FormatInfoCollector(args.signature_xml, args.container_xml).container_db
+        t0 = time.perf_counter()
+        db.is_trigger("")
+        triggers = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        db.load()
+        containers = (triggers, time.perf_counter() - t0)
+
+    for module, seconds in imports.items():
+        print(f"import {module}: {seconds * 1000:.1f} ms")
+    print(f"XML:             {xml * 1000:8.1f} ms")
+    print(f"caché (escribe): {cold * 1000:8.1f} ms")
+    print(f"caché (lee):     {warm * 1000:8.1f} ms  (x{xml / warm:.1f})")
+    if containers is not None:
+        print(f"contenedores:    {containers[0] * 1000:8.1f} ms (triggers)")
+        print(f"                 {containers[1] * 1000:8.1f} ms (carga completa)")
+
+
+if __name__ == "__main__":
+    main()
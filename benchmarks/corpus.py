@@ -0,0 +1,512 @@
+"""
+Generador de un corpus sintético y reproducible para los benchmarks.
+
+Crea en DESTINO:
+  - signatures.xml  DROID_SignatureFile con formatos conocidos (PDF, PNG, JPEG,
+                    TIFF, WAV, HTML, ZIP, OLE2...) más firmas sintéticas hasta
+                    llegar a --formats, con offsets fijos, rangos, EOF,
+                    comodines, fragmentos y secuencias variables.
+  - container.xml   ContainerSignatureMapping con DOCX/XLSX/PPTX/ODF (ZIP) y
+                    Word/Excel 97 (OLE2).
+  - files/          archivos de muestra de cada formato, documentos Office/ODF,
+                    binarios grandes y ruido no identificable.
+
+Uso:
+    python benchmarks/corpus.py DESTINO [--formats 1500] [--files 2000] [--seed 1]
+"""
+
+import argparse, os, random, struct, zipfile
+from xml.sax.saxutils import escape
+
+NS = "http://www.nationalarchives.gov.uk/pronom/SignatureFile"
+
+# (PUID, nombre, MIME, extensiones, secuencias, generador de contenido)
+# secuencia: (Reference, min, max, patrón, fragmentos izquierdos, derechos)
+KNOWN_FORMATS = [
+    (
+        "fmt/18",
+        "Acrobat PDF 1.4",
+        "application/pdf",
+        ["pdf"],
+        [
+            ("BOFoffset", 0, 0, "255044462D312E34", [], []),
+            ("EOFoffset", 0, 1024, "2525454F46", [], []),
+        ],
+        lambda r, n: b"%PDF-1.4\n" + r.randbytes(n) + b"\n%%EOF\n",
+    ),
+    (
+        "fmt/19",
+        "Acrobat PDF 1.5",
+        "application/pdf",
+        ["pdf"],
+        [
+            ("BOFoffset", 0, 0, "255044462D312E35", [], []),
+            ("EOFoffset", 0, 1024, "2525454F46", [], []),
+        ],
+        lambda r, n: b"%PDF-1.5\n" + r.randbytes(n) + b"\n%%EOF\n",
+    ),
+    (
+        "fmt/11",
+        "Portable Network Graphics",
+        "image/png",
+        ["png"],
+        [("BOFoffset", 0, 0, "89504E470D0A1A0A0000000D49484452", [], [])],
+        lambda r, n: b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR" + r.randbytes(n),
+    ),
+    (
+        "fmt/43",
+        "JPEG File Interchange Format",
+        "image/jpeg",
+        ["jpg", "jpeg"],
+        [
+            ("BOFoffset", 0, 0, "FFD8FFE0{2}4A464946", [], []),
+            ("EOFoffset", 0, 0, "FFD9", [], []),
+        ],
+        lambda r, n: b"\xff\xd8\xff\xe0\x00\x10JFIF" + r.randbytes(n) + b"\xff\xd9",
+    ),
+    (
+        "fmt/4",
+        "Graphics Interchange Format",
+        "image/gif",
+        ["gif"],
+        [("BOFoffset", 0, 0, "474946383961", [], [])],
+        lambda r, n: b"GIF89a" + r.randbytes(n),
+    ),
+    (
+        "fmt/353",
+        "Tagged Image File Format",
+        "image/tiff",
+        ["tif", "tiff"],
+        [("BOFoffset", 0, 0, "(49492A00|4D4D002A)", [], [])],
+        lambda r, n: b"II*\x00" + r.randbytes(n),
+    ),
+    (
+        "fmt/116",
+        "Windows Bitmap",
+        "image/bmp",
+        ["bmp"],
+        [("BOFoffset", 0, 0, "424D{4}00000000", [], [])],
+        lambda r, n: b"BM" + r.randbytes(4) + b"\x00\x00\x00\x00" + r.randbytes(n),
+    ),
+    (
+        "fmt/141",
+        "Waveform Audio",
+        "audio/x-wav",
+        ["wav"],
+        [
+            (
+                "BOFoffset",
+                0,
+                0,
+                "52494646",
+                [],
+                [("1", 4, 4, "57415645")],
+            )
+        ],
+        lambda r, n: b"RIFF" + r.randbytes(4) + b"WAVEfmt " + r.randbytes(n),
+    ),
+    (
+        "fmt/134",
+        "MPEG Audio Layer 3 (ID3)",
+        "audio/mpeg",
+        ["mp3"],
+        [("BOFoffset", 0, 0, "494433[02:04]", [], [])],
+        lambda r, n: b"ID3\x03" + r.randbytes(n),
+    ),
+    (
+        "fmt/279",
+        "FLAC",
+        "audio/flac",
+        ["flac"],
+        [("BOFoffset", 0, 0, "664C6143", [], [])],
+        lambda r, n: b"fLaC" + r.randbytes(n),
+    ),
+    (
+        "fmt/946",
+        "Ogg",
+        "audio/ogg",
+        ["ogg"],
+        [("BOFoffset", 0, 0, "4F676753", [], [])],
+        lambda r, n: b"OggS" + r.randbytes(n),
+    ),
+    (
+        "fmt/484",
+        "7Zip",
+        "application/x-7z-compressed",
+        ["7z"],
+        [("BOFoffset", 0, 0, "377ABCAF271C", [], [])],
+        lambda r, n: b"7z\xbc\xaf\x27\x1c" + r.randbytes(n),
+    ),
+    (
+        "x-fmt/266",
+        "GZIP",
+        "application/gzip",
+        ["gz"],
+        [("BOFoffset", 0, 0, "1F8B08", [], [])],
+        lambda r, n: b"\x1f\x8b\x08" + r.randbytes(n),
+    ),
+    (
+        "fmt/355",
+        "Rich Text Format",
+        "application/rtf",
+        ["rtf"],
+        [("BOFoffset", 0, 0, "7B5C72746631", [], [])],
+        lambda r, n: b"{\\rtf1" + b"a" * n + b"}",
+    ),
+    (
+        "fmt/899",
+        "Windows Portable Executable",
+        "application/vnd.microsoft.portable-executable",
+        ["exe", "dll"],
+        [
+            ("BOFoffset", 0, 0, "4D5A", [], []),
+            ("Variable", 0, 0, "50450000", [], []),
+        ],
+        lambda r, n: b"MZ" + r.randbytes(58) + b"PE\x00\x00" + r.randbytes(n),
+    ),
+    (
+        "fmt/96",
+        "Hypertext Markup Language",
+        "text/html",
+        ["html", "htm"],
+        [("Variable", 0, 0, "3C[68:68]746D6C*3C2F68746D6C3E", [], [])],
+        lambda r, n: b"<!DOCTYPE html>\n<html><body>" + b"x" * n + b"</html>",
+    ),
+    (
+        "fmt/101",
+        "Extensible Markup Language",
+        "text/xml",
+        ["xml"],
+        [("BOFoffset", 0, 4, "3C3F786D6C", [], [])],
+        lambda r, n: b'<?xml version="1.0"?><r>' + b"x" * n + b"</r>",
+    ),
+    (
+        "x-fmt/263",
+        "ZIP Format",
+        "application/zip",
+        ["zip"],
+        [("BOFoffset", 0, 0, "504B0304", [], [])],
+        None,
+    ),
+    (
+        "fmt/111",
+        "OLE2 Compound Document Format",
+        None,
+        [],
+        [("BOFoffset", 0, 0, "D0CF11E0A1B11AE1", [], [])],
+        None,
+    ),
+]
+
+# Formatos identificados solo por contenedor: (PUID, nombre, MIME, extensiones)
+CONTAINER_FORMATS = [
+    (
+        "fmt/412",
+        "Microsoft Word for Windows 2007 onwards",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ["docx"],
+    ),
+    (
+        "fmt/214",
+        "Microsoft Excel for Windows 2007 onwards",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ["xlsx"],
+    ),
+    (
+        "fmt/215",
+        "Microsoft Powerpoint for Windows 2007 onwards",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        ["pptx"],
+    ),
+    (
+        "fmt/291",
+        "OpenDocument Text",
+        "application/vnd.oasis.opendocument.text",
+        ["odt"],
+    ),
+    ("fmt/40", "Microsoft Word Document 97-2003", "application/msword", ["doc"]),
+    ("fmt/61", "Microsoft Excel 97 Workbook", "application/vnd.ms-excel", ["xls"]),
+]
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Override ContentType="{}"/></Types>'
+)
+_OOXML = {
+    "docx": (
+        "word/document.xml",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+    ),
+    "xlsx": (
+        "xl/workbook.xml",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml",
+    ),
+    "pptx": (
+        "ppt/presentation.xml",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml",
+    ),
+}
+_OLE_STREAMS = {"doc": "WordDocument", "xls": "Workbook"}
+
+
+# ---- Firmas sintéticas
+def _synthetic_sequence(r):
+    kind = r.random()
+    pattern = r.randbytes(r.randrange(3, 9)).hex().upper()
+    if kind < 0.6:
+        return ("BOFoffset", 0, 0, pattern, [], [])
+    if kind < 0.75:
+        lo = r.randrange(0, 256)
+        return ("BOFoffset", lo, lo + r.randrange(0, 512), pattern, [], [])
+    if kind < 0.85:
+        return ("EOFoffset", 0, r.randrange(0, 64), pattern, [], [])
+    if kind < 0.95:
+        cut = r.randrange(1, len(pattern) // 2) * 2
+        gap = r.choice(["??", "{2-8}", "[00:7F]", "(0A|0D0A)"])
+        return ("BOFoffset", 0, 0, pattern[:cut] + gap + pattern[cut:], [], [])
+    return ("Variable", 0, 0, pattern, [], [])
+
+
+def _write_signature_xml(path, formats):
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<FFSignatureFile xmlns="{NS}" Version="1">',
+        "<InternalSignatureCollection>",
+    ]
+    for fmt in formats:
+        if not fmt["seqs"]:
+            continue
+        out.append(f'<InternalSignature ID="{fmt["sig_id"]}" Specificity="Specific">')
+        for ref, lo, hi, pattern, left, right in fmt["seqs"]:
+            out.append(
+                f'<ByteSequence Reference="{ref}"><SubSequence Position="1" '
+                f'SubSeqMinOffset="{lo}" SubSeqMaxOffset="{hi}">'
+                f"<Sequence>{escape(pattern)}</Sequence>"
+            )
+            for side, frags in (("Left", left), ("Right", right)):
+                for pos, fmin, fmax, text in frags:
+                    out.append(
+                        f'<{side}Fragment Position="{pos}" MinOffset="{fmin}" '
+                        f'MaxOffset="{fmax}">{text}</{side}Fragment>'
+                    )
+            out.append("</SubSequence></ByteSequence>")
+        out.append("</InternalSignature>")
+    out.append("</InternalSignatureCollection><FileFormatCollection>")
+    for fmt in formats:
+        mime = f' MIMEType="{fmt["mime"]}"' if fmt["mime"] else ""
+        out.append(
+            f'<FileFormat ID="{fmt["id"]}" Name="{escape(fmt["name"])}" '
+            f'PUID="{fmt["puid"]}"{mime}>'
+        )
+        if fmt["seqs"]:
+            out.append(f"<InternalSignatureID>{fmt['sig_id']}</InternalSignatureID>")
+        for ext in fmt["extensions"]:
+            out.append(f"<Extension>{ext}</Extension>")
+        out.append("</FileFormat>")
+    out.append("</FileFormatCollection></FFSignatureFile>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+def _container_signature(cid, ctype, files):
+    parts = [f'<ContainerSignature Id="{cid}" ContainerType="{ctype}"><Files>']
+    for path, sequence in files:
+        parts.append(f"<File><Path>{escape(path)}</Path>")
+        if sequence:
+            parts.append(
+                "<BinarySignatures><InternalSignatureCollection>"
+                '<InternalSignature ID="1"><ByteSequence Reference="BOFoffset">'
+                '<SubSequence Position="1" SubSeqMinOffset="0" SubSeqMaxOffset="512">'
+                f"<Sequence>{escape(sequence)}</Sequence></SubSequence>"
+                "</ByteSequence></InternalSignature>"
+                "</InternalSignatureCollection></BinarySignatures>"
+            )
+        parts.append("</File>")
+    parts.append("</Files></ContainerSignature>")
+    return "".join(parts)
+
+
+def _write_container_xml(path):
+    sigs = []
+    mappings = []
+    cid = 1000
+    for ext, puid in (("docx", "fmt/412"), ("xlsx", "fmt/214"), ("pptx", "fmt/215")):
+        part, content_type = _OOXML[ext]
+        sigs.append(
+            _container_signature(
+                cid,
+                "ZIP",
+                [(part, None), ("[Content_Types].xml", f"'{content_type}'")],
+            )
+        )
+        mappings.append((cid, puid))
+        cid += 1
+    sigs.append(
+        _container_signature(
+            cid, "ZIP", [("mimetype", "'application/vnd.oasis.opendocument.text'")]
+        )
+    )
+    mappings.append((cid, "fmt/291"))
+    cid += 1
+    for ext, puid in (("doc", "fmt/40"), ("xls", "fmt/61")):
+        sigs.append(_container_signature(cid, "OLE2", [(_OLE_STREAMS[ext], None)]))
+        mappings.append((cid, puid))
+        cid += 1
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<ContainerSignatureMapping schemaVersion="1.0" signatureVersion="1">')
+        f.write("<ContainerSignatures>" + "".join(sigs) + "</ContainerSignatures>")
+        f.write("<FileFormatMappings>")
+        for sid, puid in mappings:
+            f.write(f'<FileFormatMapping signatureId="{sid}" Puid="{puid}"/>')
+        f.write("</FileFormatMappings><TriggerPuids>")
+        f.write('<TriggerPuid ContainerType="ZIP" Puid="x-fmt/263"/>')
+        f.write('<TriggerPuid ContainerType="OLE2" Puid="fmt/111"/>')
+        f.write("</TriggerPuids></ContainerSignatureMapping>")
+
+
+# ---- Contenedores de muestra
+def _ooxml_bytes(r, ext, n):
+    import io
+
+    part, content_type = _OOXML[ext]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _CONTENT_TYPES.format(content_type))
+        z.writestr("_rels/.rels", "<Relationships/>")
+        z.writestr(part, "<x>" + "lorem ipsum " * (n // 12) + "</x>")
+        z.writestr("docProps/thumbnail.jpeg", r.randbytes(n))
+    return buf.getvalue()
+
+
+def _odt_bytes(r, n):
+    import io
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(
+            "mimetype",
+            "application/vnd.oasis.opendocument.text",
+            compress_type=zipfile.ZIP_STORED,
+        )
+        z.writestr("content.xml", "<office:document-content/>" + "x" * n)
+    return buf.getvalue()
+
+
+def _ole2_bytes(r, stream_name, n):
+    """
+    Compound File (CFB v3) mínimo con un único stream: un sector FAT, uno de
+    directorio y los datos (entre 4096 bytes, sin mini-stream, y 63 KiB).
+    """
+    n = min(max(n, 4096), 126 * 512)
+    data_sectors = -(-n // 512)
+    fat = [0xFFFFFFFD, 0xFFFFFFFE]  # sector 0: FAT, sector 1: directorio
+    fat += [2 + i + 1 for i in range(data_sectors - 1)] + [0xFFFFFFFE]
+    fat += [0xFFFFFFFF] * (128 - len(fat))
+
+    header = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 16
+    header += struct.pack("<HHHHH", 0x3E, 3, 0xFFFE, 9, 6) + b"\x00" * 6
+    header += struct.pack("<IIIIIIIII", 0, 1, 1, 0, 4096, 0xFFFFFFFE, 0, 0xFFFFFFFE, 0)
+    header += struct.pack("<109I", 0, *([0xFFFFFFFF] * 108))
+
+    def entry(name, kind, child, start, size):
+        raw = name.encode("utf-16-le") + b"\x00\x00"
+        return (
+            raw.ljust(64, b"\x00")
+            + struct.pack("<HBB", len(raw), kind, 1)
+            + struct.pack("<III", 0xFFFFFFFF, 0xFFFFFFFF, child)
+            + b"\x00" * 36
+            + struct.pack("<IQ", start, size)
+        )
+
+    empty = entry("", 0, 0xFFFFFFFF, 0, 0)
+    directory = (
+        entry("Root Entry", 5, 1, 0xFFFFFFFE, 0)
+        + entry(stream_name, 2, 0xFFFFFFFF, 2, n)
+        + empty * 2
+    )
+    body = r.randbytes(n).ljust(data_sectors * 512, b"\x00")
+    return header + struct.pack("<128I", *fat) + directory + body
+
+
+# ---- Generación
+def generate(dest, n_formats=1500, n_files=2000, seed=1, large_mb=8):
+    """Genera firmas, contenedores y corpus en `dest`; devuelve las rutas."""
+    r = random.Random(seed)
+    os.makedirs(os.path.join(dest, "files"), exist_ok=True)
+
+    formats = []
+    for i, (puid, name, mime, exts, seqs, make) in enumerate(KNOWN_FORMATS, 1):
+        formats.append(
+            dict(
+                id=i, sig_id=i, puid=puid, name=name, mime=mime,
+                extensions=exts, seqs=seqs, make=make,
+            )
+        )
+    for puid, name, mime, exts in CONTAINER_FORMATS:
+        i = len(formats) + 1
+        formats.append(
+            dict(
+                id=i, sig_id=i, puid=puid, name=name, mime=mime,
+                extensions=exts, seqs=[], make=None,
+            )
+        )
+    mimes = ["application", "image", "audio", "video", "text", "model", "font"]
+    while len(formats) < n_formats:
+        i = len(formats) + 1
+        formats.append(
+            dict(
+                id=i, sig_id=i, puid=f"fmt/{10000 + i}", name=f"Synthetic {i}",
+                mime=f"{r.choice(mimes)}/x-synthetic-{i}", extensions=[f"s{i}"],
+                seqs=[_synthetic_sequence(r)], make=None,
+            )
+        )
+    # Las firmas conocidas van al final, como los formatos frecuentes en PRONOM
+    ordered = formats[len(KNOWN_FORMATS) + len(CONTAINER_FORMATS) :] + formats[
+        : len(KNOWN_FORMATS) + len(CONTAINER_FORMATS)
+    ]
+    sig_xml = os.path.join(dest, "signatures.xml")
+    container_xml = os.path.join(dest, "container.xml")
+    _write_signature_xml(sig_xml, ordered)
+    _write_container_xml(container_xml)
+
+    makers = [f for f in formats if f["make"]]
+    files_dir = os.path.join(dest, "files")
+    for i in range(n_files):
+        roll = r.random()
+        size = int(r.lognormvariate(8, 1.5)) % (1 << 20)
+        if roll < 0.55:
+            fmt = r.choice(makers)
+            name, data = f"{i:06d}.{fmt['extensions'][0]}", fmt["make"](r, size)
+        elif roll < 0.75:
+            ext = r.choice(list(_OOXML) + ["odt"])
+            data = _odt_bytes(r, size) if ext == "odt" else _ooxml_bytes(r, ext, size)
+            name = f"{i:06d}.{ext}"
+        elif roll < 0.85:
+            ext = r.choice(list(_OLE_STREAMS))
+            name, data = f"{i:06d}.{ext}", _ole2_bytes(r, _OLE_STREAMS[ext], size)
+        elif roll < 0.87:
+            name = f"{i:06d}.pdf"
+            data = b"%PDF-1.4\n" + r.randbytes(large_mb << 20) + b"\n%%EOF\n"
+        else:
+            name, data = f"{i:06d}.bin", r.randbytes(size)
+        with open(os.path.join(files_dir, name), "wb") as f:
+            f.write(data)
+    return sig_xml, container_xml, files_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dest")
+    parser.add_argument("--formats", type=int, default=1500)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--large-mb", type=int, default=8)
+    args = parser.parse_args(argv)
+    for path in generate(args.dest, args.formats, args.files, args.seed, args.large_mb):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
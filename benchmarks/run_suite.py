@@ -0,0 +1,222 @@
+"""
+Suite de benchmarks sobre el corpus sintético de benchmarks/corpus.py.
+
+Cada etapa se ejecuta en un proceso nuevo (spawn) para que el pico de memoria
+(ru_maxrss) sea el suyo y no el de las etapas anteriores:
+  - load_xml          construcción de FormatInfoCollector desde los XML
+  - load_cache        construcción desde la caché compilada (ya escrita)
+  - identify_file     identify_file sobre todo el corpus (files/s, MB/s, p50/p99)
+  - container_refine  _ContainerDB.refine sobre los ZIP/OLE2 del corpus
+  - mime_groups       group_formats_by_mime (primera llamada y siguientes)
+
+El resultado se escribe en JSON para comparar ejecuciones entre versiones.
+
+Uso:
+    python benchmarks/run_suite.py CORPUS [--output results.json] [--repeat N]
+    (si CORPUS no existe se genera con los valores por defecto de corpus.py)
+"""
+
+import argparse, json, os, platform, resource, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", "src"))
+sys.path.insert(0, _HERE)
+
+import pronom_tools_test  # noqa: E402
+from pronom_tools_test.format_info import FormatInfoCollector  # noqa: E402
+
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB; macOS en bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _latency_stats(samples) -> dict:
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "total_s": total,
+        "per_s": len(samples) / total if total else None,
+        "mean_ms": total / len(samples) * 1000 if samples else None,
+        "p50_ms": _percentile(samples, 0.50) * 1000 if samples else None,
+        "p99_ms": _percentile(samples, 0.99) * 1000 if samples else None,
+        "max_ms": max(samples) * 1000 if samples else None,
+    }
+
+
+def _corpus_files(files_dir):
+    return [
+        os.path.join(files_dir, name)
+        for name in sorted(os.listdir(files_dir))
+        if os.path.isfile(os.path.join(files_dir, name))
+    ]
+
+
+# ---- Etapas (se ejecutan en el proceso hijo)
+def _stage_load(sig_xml, container_xml, cache_dir, repeat):
+    base_rss = _peak_rss_kb()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        collector = FormatInfoCollector(sig_xml, container_xml, cache_dir)
+        times.append(time.perf_counter() - t0)
+    return {
+        "best_s": min(times),
+        "mean_s": sum(times) / len(times),
+        "signatures": len(collector.signatures),
+        "formats": len(collector.formats),
+        "rss_base_kb": base_rss,
+        "rss_peak_kb": _peak_rss_kb(),
+    }
+
+
+def _stage_identify(sig_xml, container_xml, files_dir, repeat):
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    base_rss = _peak_rss_kb()
+    paths = _corpus_files(files_dir)
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    best = None
+    for _ in range(repeat):
+        samples = []
+        identified = 0
+        for path in paths:
+            t0 = time.perf_counter()
+            result = collector.identify_file(path)
+            samples.append(time.perf_counter() - t0)
+            identified += result is not None
+        stats = _latency_stats(samples)
+        if best is None or stats["total_s"] < best["total_s"]:
+            best = stats
+    best.update(
+        identified=identified,
+        bytes=total_bytes,
+        mb_per_s=total_bytes / best["total_s"] / 1e6 if best["total_s"] else None,
+        rss_base_kb=base_rss,
+        rss_peak_kb=_peak_rss_kb(),
+    )
+    return best
+
+
+def _stage_refine(sig_xml, container_xml, files_dir, repeat):
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    db = collector.container_db
+    if db is None:
+        return None
+    db.load()  # la carga perezosa no forma parte de la medición
+    triggers = {}
+    for puid, ctype in db._puid_to_type.items():
+        triggers.setdefault(ctype, puid)
+    jobs = []
+    for path in _corpus_files(files_dir):
+        with open(path, "rb") as f:
+            magic = f.read(len(_OLE_MAGIC))
+        if magic.startswith(_ZIP_MAGIC) and "ZIP" in triggers:
+            jobs.append((path, triggers["ZIP"]))
+        elif magic.startswith(_OLE_MAGIC) and "OLE2" in triggers:
+            jobs.append((path, triggers["OLE2"]))
+    base_rss = _peak_rss_kb()
+    best = None
+    for _ in range(repeat):
+        samples = []
+        refined = 0
+        for path, puid in jobs:
+            t0 = time.perf_counter()
+            refined += bool(db.refine(path, puid))
+            samples.append(time.perf_counter() - t0)
+        stats = _latency_stats(samples)
+        if best is None or stats["total_s"] < best["total_s"]:
+            best = stats
+    best.update(refined=refined, rss_base_kb=base_rss, rss_peak_kb=_peak_rss_kb())
+    return best
+
+
+def _stage_mime_groups(sig_xml, container_xml, repeat):
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    base_rss = _peak_rss_kb()
+    t0 = time.perf_counter()
+    groups = collector.group_formats_by_mime()
+    first = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        collector.group_formats_by_mime()
+    again = (time.perf_counter() - t0) / repeat
+    return {
+        "first_s": first,
+        "memoized_s": again,
+        "groups": len(groups),
+        "rss_base_kb": base_rss,
+        "rss_peak_kb": _peak_rss_kb(),
+    }
+
+
+def _run_isolated(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus")
+    parser.add_argument("--output", help="archivo JSON (por defecto, stdout)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    sig_xml = os.path.join(args.corpus, "signatures.xml")
+    container_xml = os.path.join(args.corpus, "container.xml")
+    files_dir = os.path.join(args.corpus, "files")
+    if not os.path.exists(sig_xml):
+        import corpus
+
+        print(f"Generando corpus en {args.corpus}...", file=sys.stderr)
+        corpus.generate(args.corpus)
+
+    results = {
+        "version": pronom_tools_test.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": args.repeat,
+        "stages": {},
+    }
+    stages = results["stages"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        stages["load_xml"] = _run_isolated(
+            _stage_load, sig_xml, container_xml, None, args.repeat
+        )
+        FormatInfoCollector(sig_xml, container_xml, cache_dir)  # escribe la caché
+        stages["load_cache"] = _run_isolated(
+            _stage_load, sig_xml, container_xml, cache_dir, args.repeat
+        )
+    stages["identify_file"] = _run_isolated(
+        _stage_identify, sig_xml, container_xml, files_dir, args.repeat
+    )
+    stages["container_refine"] = _run_isolated(
+        _stage_refine, sig_xml, container_xml, files_dir, args.repeat
+    )
+    stages["mime_groups"] = _run_isolated(
+        _stage_mime_groups, sig_xml, container_xml, args.repeat
+    )
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import json, threading
+
+# ====================== Orden adaptativo de firmas ======================
+
+
+def _conflict(a: dict, b: dict) -> bool:
+    if len(a) > len(b):
+        a, b = b, a
+    for pos, value in a.items():
+        other = b.get(pos)
+        if other is not None and other != value:
+            return True
+    return False
+
+
+class _FixedConflicts:
+    """
+    conflicts(a, b) es True si las firmas en las posiciones `a` y `b` exigen
+    bytes distintos en una misma posición fija desde BOF o EOF, es decir, si
+    no pueden coincidir con el mismo archivo. Los bytes fijos y el resultado
+    de cada par se calculan al primer uso.
+    """
+
+    def __init__(self, signatures):
+        self._signatures = signatures
+        self._fixed = {}  # posición -> bytes fijos
+        self._pairs = {}  # (a, b) -> conflicto
+
+    def __call__(self, a: int, b: int) -> bool:
+        key = (a, b)
+        result = self._pairs.get(key)
+        if result is None:
+            a_bof, a_eof = self._fixed_for(a)
+            b_bof, b_eof = self._fixed_for(b)
+            result = _conflict(a_bof, b_bof) or _conflict(a_eof, b_eof)
+            self._pairs[key] = result
+        return result
+
+    def _fixed_for(self, pos: int) -> tuple[dict, dict]:
+        fixed = self._fixed.get(pos)
+        if fixed is None:
+            fixed = self._fixed[pos] = self._signatures[pos].fixed_bytes()
+        return fixed
+
+
+def _first_match_preferring(candidates, preferred, test, excludes) -> int | None:
+    """
+    Candidata para la que `test(pos)` es True, probando antes las de
+    `preferred`, en ese orden. Si una preferida coincide, una candidata
+    anterior que `excludes(ganadora, pos)` no descarta y coincide pasa a ser
+    la ganadora, y se repasa lo anterior a ella; si ninguna preferida
+    coincide, se sigue el orden original con el resto.
+    """
+    failed = set()
+    for h in preferred:
+        if not test(h):
+            failed.add(h)
+            continue
+        winner, changed = h, True
+        while changed:
+            changed = False
+            for pos in candidates:
+                if pos >= winner:
+                    break
+                if pos in failed or excludes(winner, pos):
+                    continue
+                if test(pos):
+                    winner, changed = pos, True
+                    break
+                failed.add(pos)
+        return winner
+    return next((pos for pos in candidates if pos not in failed and test(pos)), None)
+
+
+class AdaptiveOrder:
+    """
+    Prueba primero las firmas que más han coincidido ("calientes"). Si una
+    caliente coincide, solo se vuelven a comprobar las candidatas anteriores
+    en el orden del XML cuyo formato tiene prioridad sobre el suyo
+    (HasPriorityOverFileFormatID) y que no exigen en alguna posición fija un
+    byte distinto; sin relación de prioridad gana la caliente. Si ninguna
+    caliente coincide, se sigue el orden original con el resto.
+
+    Los contadores se acumulan por sig_id y la lista caliente se recalcula
+    cada `reorder_every` identificaciones; save/load los guardan en JSON para
+    que otros procesos arranquen con el orden ya aprendido.
+    """
+
+    def __init__(
+        self,
+        signatures,
+        sig_to_formats: dict,
+        hot_size: int = 64,
+        reorder_every: int = 1000,
+    ):
+        self.hot_size = hot_size
+        self.reorder_every = reorder_every
+        self._sig_ids = [sig.sig_id for sig in signatures]
+        self._positions = {}  # sig_id -> primera posición con ese ID
+        for pos, sig_id in enumerate(self._sig_ids):
+            self._positions.setdefault(sig_id, pos)
+        # Por posición: IDs de sus formatos y de los formatos a los que ganan
+        self._format_ids = []
+        self._priority_over = []
+        for sig_id in self._sig_ids:
+            formats = sig_to_formats.get(sig_id, ())
+            self._format_ids.append(frozenset(f.id for f in formats))
+            self._priority_over.append(
+                frozenset(i for f in formats for i in f.priority_over)
+            )
+        self._conflicts = _FixedConflicts(signatures)
+        self._hits = [0] * len(signatures)
+        self._rank = {}  # posición caliente -> prioridad (0 = la más frecuente)
+        self._pending = 0  # identificaciones desde el último reordenamiento
+        self._lock = threading.Lock()
+
+    # ---- Matching
+    def first_match(self, candidates: list[int], test) -> int | None:
+        """
+        Posición de la primera candidata (orden original) para la que
+        `test(pos)` es True, probando antes las calientes.
+        """
+        rank = self._rank
+        hot = [pos for pos in candidates if pos in rank] if rank else None
+        if not hot:
+            winner = next((pos for pos in candidates if test(pos)), None)
+        else:
+            hot.sort(key=rank.__getitem__)
+            winner = _first_match_preferring(candidates, hot, test, self._excludes)
+        self._record(winner)
+        return winner
+
+    def _excludes(self, hot: int, pos: int) -> bool:
+        if not self._priority_over[pos] & self._format_ids[hot]:
+            return True
+        return self._conflicts(hot, pos)
+
+    # ---- Frecuencias
+    def _record(self, winner: int | None):
+        with self._lock:
+            if winner is not None:
+                self._hits[winner] += 1
+            self._pending += 1
+            if self._pending >= self.reorder_every:
+                self._reorder()
+
+    def _reorder(self):
+        hits = self._hits
+        ranked = sorted(
+            (pos for pos, n in enumerate(hits) if n), key=lambda pos: -hits[pos]
+        )[: self.hot_size]
+        self._rank = {pos: i for i, pos in enumerate(ranked)}
+        self._pending = 0
+
+    def reorder(self):
+        """Recalcula ya la lista caliente con los contadores actuales."""
+        with self._lock:
+            self._reorder()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hot = sorted(self._rank, key=self._rank.__getitem__)
+            return {
+                "identified": sum(self._hits),
+                "hot": [
+                    {"signature_id": self._sig_ids[pos], "hits": self._hits[pos]}
+                    for pos in hot
+                ],
+            }
+
+    # ---- Persistencia (JSON por sig_id)
+    def save(self, path: str):
+        with self._lock:
+            hits = {}
+            for pos, n in enumerate(self._hits):
+                if n:
+                    sig_id = self._sig_ids[pos]
+                    hits[sig_id] = hits.get(sig_id, 0) + n
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"hits": hits}, f)
+
+    def load(self, path: str):
+        """Suma los contadores guardados (se ignoran IDs que ya no existen)."""
+        with open(path, "r", encoding="utf-8") as f:
+            hits = json.load(f).get("hits", {})
+        with self._lock:
+            for sig_id, n in hits.items():
+                pos = self._positions.get(sig_id)
+                if pos is not None:
+                    self._hits[pos] += int(n)
+            self._reorder()
+
+    # ---- Copia a procesos worker: se conserva el orden aprendido
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
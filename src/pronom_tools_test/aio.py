@@ -0,0 +1,117 @@
+import asyncio, os, weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ====================== Identificación asíncrona (asyncio) ======================
+
+
+class _AsyncRunner:
+    """
+    Ejecuta identify_file fuera del event loop, en un executor propio (o el
+    que se indique), con un semáforo que acota las identificaciones en curso.
+    """
+
+    def __init__(self, collector, max_concurrency: int | None = None, executor=None):
+        self.collector = collector
+        self.max_concurrency = max_concurrency or min(32, (os.cpu_count() or 1) * 4)
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphores = weakref.WeakKeyDictionary()  # un semáforo por loop
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="pronom-identify",
+            )
+        return self._executor
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    async def identify(self, file_path: str):
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            # Si la tarea se cancela, el hilo termina solo y su resultado se descarta
+            return await loop.run_in_executor(
+                self._get_executor(), self.collector.identify_file, file_path
+            )
+
+    async def identify_one(self, file_path: str) -> dict:
+        try:
+            result = await self.identify(file_path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            return {
+                "path": file_path,
+                "result": None,
+                "error": f"{type(exc).__name__}: {exc}",
+            }
+        return {"path": file_path, "result": result, "error": None}
+
+    async def identify_many(self, paths, ordered: bool = False):
+        """
+        Genera {path, result, error} por ruta (iterable normal o asíncrono),
+        con como mucho 2 * max_concurrency tareas creadas a la vez.
+        """
+        limit = self.max_concurrency * 2
+        pending = deque() if ordered else set()
+        try:
+            async for path in _aiter(paths):
+                task = asyncio.ensure_future(self.identify_one(path))
+                if ordered:
+                    pending.append(task)
+                    if len(pending) >= limit:
+                        yield await pending.popleft()
+                else:
+                    pending.add(task)
+                    if len(pending) >= limit:
+                        done, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        for t in done:
+                            yield t.result()
+            if ordered:
+                while pending:
+                    yield await pending.popleft()
+            else:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for t in done:
+                        yield t.result()
+        finally:
+            # Cancelación o abandono del generador: no dejar tareas huérfanas
+            for t in pending:
+                t.cancel()
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---- Copia a procesos worker: sin executor ni semáforos
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_owns_executor"] = True
+        state["_semaphores"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+
+async def _aiter(paths):
+    if hasattr(paths, "__aiter__"):
+        async for path in paths:
+            yield path
+    else:
+        for path in paths:
+            yield path
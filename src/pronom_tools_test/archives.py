@@ -0,0 +1,195 @@
+import io, zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .containers import _ole
+
+# ====================== Identificación recursiva de archivos comprimidos ======================
+
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class _ArchiveBudget:
+    """Límites compartidos por todo el recorrido (protección contra zip bombs)."""
+
+    def __init__(self, max_depth: int, max_members: int, max_bytes: int):
+        self.max_depth = max_depth
+        self.max_members = max_members
+        self.max_bytes = max_bytes
+        self.members = 0
+        self.bytes = 0
+        self.exceeded = None  # motivo, cuando se agota algún límite
+
+    def charge(self, size: int) -> bool:
+        """Descuenta un miembro de `size` bytes; False si supera algún límite."""
+        if self.members + 1 > self.max_members:
+            self.exceeded = f"Límite de miembros alcanzado ({self.max_members})"
+        elif self.bytes + size > self.max_bytes:
+            self.exceeded = f"Límite de bytes alcanzado ({self.max_bytes})"
+        else:
+            self.members += 1
+            self.bytes += size
+            return True
+        return False
+
+
+def _record(path, depth, size, result=None, error=None) -> dict:
+    return {
+        "path": path,
+        "depth": depth,
+        "size": size,
+        "result": result,
+        "error": error,
+    }
+
+
+def _error(exc) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _nested_kind(data_start: bytes) -> str | None:
+    if data_start.startswith(_ZIP_MAGIC):
+        return "ZIP"
+    if data_start.startswith(_OLE_MAGIC) and _ole() is not None:
+        return "OLE2"
+    return None
+
+
+def _identify_zip_member(collector, zf, info, path, depth, recurse):
+    """
+    Identifica un miembro leyendo solo sus ventanas (zf.open es seekable) y,
+    si es a su vez un ZIP/OLE2 y se puede descender, devuelve su contenido.
+    """
+    try:
+        with zf.open(info) as fh:
+            result = collector.identify_stream(fh)
+            nested = None
+            if recurse:
+                fh.seek(0)
+                kind = _nested_kind(fh.read(len(_OLE_MAGIC)))
+                if kind is not None:
+                    fh.seek(0)
+                    nested = (kind, fh.read())
+    except Exception as exc:
+        return _record(path, depth, info.file_size, error=_error(exc)), None
+    return _record(path, depth, info.file_size, result), nested
+
+
+class _ArchiveWalker:
+    """
+    Recorre los miembros de un ZIP u OLE2 (y sus contenedores anidados hasta
+    `max_depth`) identificando cada uno en memoria, sin extraer a disco. Con
+    `workers > 1` los miembros de un ZIP se identifican en un pool de hilos
+    (zlib libera el GIL) y se emiten en el orden del archivo.
+    """
+
+    def __init__(self, collector, max_depth, max_members, max_bytes, workers):
+        self.collector = collector
+        self.budget = _ArchiveBudget(max_depth, max_members, max_bytes)
+        self.workers = workers
+        self.pool = None
+
+    def walk(self, source):
+        if isinstance(source, str):
+            prefix = source
+            with open(source, "rb") as f:
+                magic = f.read(len(_OLE_MAGIC))
+        else:
+            prefix = getattr(source, "name", "") or ""
+            source.seek(0)
+            magic = source.read(len(_OLE_MAGIC))
+            source.seek(0)
+        kind = _nested_kind(magic)
+        if kind is None:
+            raise ValueError("No es un archivo ZIP ni OLE2")
+
+        if self.workers > 1:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            if kind == "ZIP":
+                yield from self._iter_zip(source, prefix, 1)
+            else:
+                yield from self._iter_ole(source, prefix, 1)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+        if self.budget.exceeded:
+            yield _record(prefix, 0, self.budget.bytes, error=self.budget.exceeded)
+
+    def _iter_zip(self, source, prefix, depth):
+        budget = self.budget
+        with zipfile.ZipFile(source) as zf:
+            recurse = depth < budget.max_depth
+            pending = deque()
+            max_pending = self.workers * 2
+
+            def drain(limit):
+                while len(pending) > limit:
+                    record, nested = pending.popleft().result()
+                    yield record
+                    if nested is not None:
+                        yield from self._iter_nested(nested, record["path"], depth + 1)
+
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                if budget.exceeded or not budget.charge(info.file_size):
+                    break
+                args = (
+                    self.collector,
+                    zf,
+                    info,
+                    f"{prefix}!{info.filename}",
+                    depth,
+                    recurse,
+                )
+                if self.pool is None:
+                    pending.append(_Done(_identify_zip_member(*args)))
+                else:
+                    pending.append(self.pool.submit(_identify_zip_member, *args))
+                yield from drain(max_pending)
+            yield from drain(0)
+
+    def _iter_ole(self, source, prefix, depth):
+        budget = self.budget
+        with _ole().OleFileIO(source) as ole:
+            recurse = depth < budget.max_depth
+            for entry in ole.listdir(streams=True, storages=False):
+                size = ole.get_size(entry)
+                if budget.exceeded or not budget.charge(size):
+                    return
+                path = f"{prefix}!{'/'.join(entry)}"
+                try:
+                    with ole.openstream(entry) as st:
+                        data = st.read()
+                    result = self.collector.identify_bytes(data)
+                except Exception as exc:
+                    yield _record(path, depth, size, error=_error(exc))
+                    continue
+                yield _record(path, depth, size, result)
+                kind = _nested_kind(data[: len(_OLE_MAGIC)]) if recurse else None
+                if kind is not None:
+                    yield from self._iter_nested((kind, data), path, depth + 1)
+
+    def _iter_nested(self, nested, prefix, depth):
+        kind, data = nested
+        try:
+            if kind == "ZIP":
+                yield from self._iter_zip(io.BytesIO(data), prefix, depth)
+            else:
+                yield from self._iter_ole(io.BytesIO(data), prefix, depth)
+        except Exception as exc:
+            # Un contenedor anidado corrupto no detiene el recorrido
+            yield _record(prefix, depth, len(data), error=_error(exc))
+
+
+class _Done:
+    """Resultado ya calculado con la misma interfaz que un Future."""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
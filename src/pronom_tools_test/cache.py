@@ -0,0 +1,64 @@
+import hashlib, mmap, os, pickle
+from . import __version__
+
+# ====================== Caché de firmas compiladas ======================
+
+# Subir cuando cambie la estructura de los objetos serializados
+_CACHE_FORMAT = 9
+
+
+def _source_digest(*xml_paths: str | None) -> str:
+    """Hash de los XML de origen + versión de la librería."""
+    h = hashlib.sha256(f"{__version__}:{_CACHE_FORMAT}".encode())
+    for path in xml_paths:
+        h.update(b"\0")
+        if path is None:
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(cache_dir: str, digest: str, part: str = "") -> str:
+    suffix = f"-{part}" if part else ""
+    return os.path.join(cache_dir, f"pronom-{digest[:32]}{suffix}.pickle")
+
+
+def _load_state(path: str) -> dict | None:
+    """
+    Carga el estado compilado desde la caché (mapeado en memoria).
+    Devuelve None si no existe o no se puede leer; el archivo se considera
+    de confianza: solo debe apuntar a un directorio propio.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            return pickle.loads(mm)
+    except (
+        OSError,
+        ValueError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        pickle.UnpicklingError,
+    ):
+        return None
+
+
+def _store_state(path: str, state: dict) -> None:
+    """Escribe la caché de forma atómica (archivo temporal + rename)."""
+    import tempfile
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
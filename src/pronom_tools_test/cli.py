@@ -0,0 +1,354 @@
+"""
+pronom-scan: identifica los formatos PRONOM de árboles de directorios.
+
+Recorre las rutas con os.scandir en un orden estable, identifica en paralelo
+(procesos) y escribe cada resultado en cuanto está listo (JSONL o CSV), con
+memoria acotada. Un checkpoint periódico permite reanudar tras un corte.
+
+Ejemplo:
+    pronom-scan -s DROID_SignatureFile.xml -c container.xml \\
+        --include '*.pdf' --exclude '.git' --max-size 2G -o out.jsonl /datos
+"""
+
+import argparse, csv, json, os, sys, time
+from collections import deque
+from fnmatch import fnmatch
+from .format_info import FormatInfoCollector
+
+# ====================== Recorrido con filtros y reanudación ======================
+
+_FILE, _DIR = 0, 1  # en cada carpeta van primero los archivos (igual que _walk_files)
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def _parse_size(text: str) -> int:
+    """'500', '64K', '2G'... -> bytes."""
+    text = text.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    try:
+        return int(float(text[: len(text) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Tamaño no válido: {text!r}") from None
+
+
+def _matches(rel: str, name: str, patterns) -> bool:
+    return any(fnmatch(rel, p) or fnmatch(name, p) for p in patterns)
+
+
+def _scan(root: str, include=(), exclude=(), min_size=0, max_size=None, after=()):
+    """
+    Genera (ruta, tamaño, clave) en el mismo orden que _walk_files. La clave
+    ordena las rutas según ese recorrido: con `after` (clave del checkpoint)
+    se omiten las carpetas ya recorridas completas y los archivos anteriores.
+    """
+    stack = [(root, "", ())]
+    while stack:
+        current, rel_dir, prefix = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = rel_dir + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    key = prefix + ((_DIR, entry.name),)
+                    if key < after[: len(key)]:
+                        continue
+                    if not _matches(rel, entry.name, exclude):
+                        subdirs.append((entry.path, rel + "/", key))
+                elif entry.is_file():
+                    key = prefix + ((_FILE, entry.name),)
+                    if key <= after:
+                        continue
+                    if include and not _matches(rel, entry.name, include):
+                        continue
+                    if exclude and _matches(rel, entry.name, exclude):
+                        continue
+                    size = entry.stat().st_size
+                    if size < min_size or (max_size is not None and size > max_size):
+                        continue
+                    yield entry.path, size, key
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+# ====================== Salida (JSONL / CSV) ======================
+
+_CSV_FIELDS = (
+    "path",
+    "size",
+    "puid",
+    "name",
+    "mime",
+    "signature_id",
+    "base_puids",
+    "container_puids",
+    "error",
+)
+
+
+def _record(path: str, size: int, result, error) -> dict:
+    main = result["main_format"] if result else None
+    return {
+        "path": path,
+        "size": size,
+        "puid": main["puid"] if main else None,
+        "name": main["name"] if main else None,
+        "mime": main["mime"] if main else None,
+        "signature_id": result["signature_id"] if result else None,
+        "base_puids": [f["puid"] for f in result["base_formats"]] if result else [],
+        "container_puids": (
+            [f["puid"] for f in result["container_formats"]] if result else []
+        ),
+        "error": error,
+    }
+
+
+class _JSONLWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record: dict):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _CSVWriter:
+    def __init__(self, f, header: bool):
+        self._csv = csv.writer(f)
+        if header:
+            self._csv.writerow(_CSV_FIELDS)
+
+    def write(self, record: dict):
+        row = dict(record)
+        row["base_puids"] = ";".join(row["base_puids"])
+        row["container_puids"] = ";".join(row["container_puids"])
+        self._csv.writerow(["" if row[k] is None else row[k] for k in _CSV_FIELDS])
+
+
+# ====================== Checkpoint ======================
+
+
+def _load_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(path: str, state: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ====================== Progreso ======================
+
+
+class _Progress:
+    def __init__(self, stream, interval: float, files=0, size=0, errors=0):
+        self.stream = stream
+        self.interval = interval
+        self.start = time.monotonic()
+        self._last = self.start
+        self.files = files  # acumulados (incluye lo ya hecho antes de reanudar)
+        self.bytes = size
+        self.errors = errors
+        self.identified = 0
+        self.session_files = 0
+        self.session_bytes = 0
+
+    def update(self, record: dict):
+        self.files += 1
+        self.bytes += record["size"]
+        self.session_files += 1
+        self.session_bytes += record["size"]
+        if record["error"]:
+            self.errors += 1
+        elif record["puid"]:
+            self.identified += 1
+        now = time.monotonic()
+        if self.interval and now - self._last >= self.interval:
+            self._last = now
+            self._print(now, "\r", "")
+
+    def _print(self, now: float, prefix: str, end: str):
+        elapsed = max(now - self.start, 1e-9)
+        print(
+            f"{prefix}{self.files} archivos, {self.bytes / 1e6:.1f} MB, "
+            f"{self.session_files / elapsed:.1f} arch/s, "
+            f"{self.session_bytes / elapsed / 1e6:.1f} MB/s, "
+            f"{self.errors} errores",
+            file=self.stream,
+            end=end,
+            flush=True,
+        )
+
+    def summary(self):
+        now = time.monotonic()
+        if self.interval:
+            print(file=self.stream)
+        self._print(now, "Total: ", "\n")
+        print(
+            f"Sesión: {self.session_files} archivos en {now - self.start:.1f} s, "
+            f"{self.identified} identificados",
+            file=self.stream,
+        )
+
+
+# ====================== Punto de entrada ======================
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="pronom-scan",
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.strip().splitlines()[2:]),
+    )
+    p.add_argument("roots", nargs="+", help="carpetas a recorrer")
+    p.add_argument("-s", "--signatures", required=True, help="DROID_SignatureFile")
+    p.add_argument("-c", "--containers", help="container-signature XML")
+    p.add_argument("--cache-dir", help="caché de firmas compiladas")
+    p.add_argument("-o", "--output", default="-", help="archivo de salida (- = stdout)")
+    p.add_argument("-f", "--format", choices=("jsonl", "csv"), default="jsonl")
+    p.add_argument("-w", "--workers", type=int, help="procesos (por defecto, CPUs)")
+    p.add_argument("--chunksize", type=int, default=64)
+    p.add_argument("--include", action="append", default=[], metavar="GLOB")
+    p.add_argument("--exclude", action="append", default=[], metavar="GLOB")
+    p.add_argument("--min-size", type=_parse_size, default=0)
+    p.add_argument("--max-size", type=_parse_size)
+    p.add_argument("--checkpoint", help="por defecto, OUTPUT.ckpt")
+    p.add_argument("--checkpoint-every", type=float, default=10.0, metavar="SEG")
+    p.add_argument(
+        "--resume", action="store_true", help="continuar desde el checkpoint"
+    )
+    p.add_argument(
+        "--progress",
+        type=float,
+        default=None,
+        metavar="SEG",
+        help="intervalo del progreso en stderr (0 = sin progreso)",
+    )
+    return p
+
+
+def main(argv=None) -> int:
+    args = _parser().parse_args(argv)
+    to_stdout = args.output == "-"
+    checkpoint = None if to_stdout else args.checkpoint or args.output + ".ckpt"
+    if args.resume and to_stdout:
+        print("--resume requiere --output a un archivo", file=sys.stderr)
+        return 2
+
+    state = _load_checkpoint(checkpoint) if args.resume else None
+    if state is not None and state.get("complete"):
+        print("El checkpoint indica que el recorrido ya terminó", file=sys.stderr)
+        return 0
+    if state is not None and state["roots"] != args.roots:
+        print("El checkpoint corresponde a otras carpetas", file=sys.stderr)
+        return 2
+
+    collector = FormatInfoCollector(args.signatures, args.containers, args.cache_dir)
+
+    if to_stdout:
+        out = sys.stdout
+    else:
+        if state is not None:
+            # Lo escrito después del último checkpoint se descarta y se repite
+            os.truncate(args.output, state["offset"])
+        mode = "a" if state is not None else "w"
+        out = open(args.output, mode, encoding="utf-8", newline="")
+    if args.format == "csv":
+        writer = _CSVWriter(out, header=not state)
+    else:
+        writer = _JSONLWriter(out)
+
+    interval = args.progress
+    if interval is None:
+        interval = 2.0 if sys.stderr.isatty() else 0.0
+    progress = _Progress(
+        sys.stderr,
+        interval,
+        *((state["files"], state["bytes"], state["errors"]) if state else ()),
+    )
+
+    start_root = state["root_index"] if state else 0
+    after = tuple(tuple(k) for k in state["key"]) if state else ()
+    sizes = deque()  # (tamaño, índice de raíz, clave) de las rutas en vuelo
+    position = {"root_index": start_root, "key": after}
+
+    def paths():
+        for index in range(start_root, len(args.roots)):
+            resume_key = after if index == start_root else ()
+            for path, size, key in _scan(
+                args.roots[index],
+                args.include,
+                args.exclude,
+                args.min_size,
+                args.max_size,
+                resume_key,
+            ):
+                sizes.append((size, index, key))
+                yield path
+
+    def save(complete=False):
+        if checkpoint is None:
+            return
+        out.flush()
+        os.fsync(out.fileno())
+        _save_checkpoint(
+            checkpoint,
+            {
+                "roots": args.roots,
+                "root_index": position["root_index"],
+                "key": position["key"],
+                "offset": out.buffer.tell(),
+                "files": progress.files,
+                "bytes": progress.bytes,
+                "errors": progress.errors,
+                "complete": complete,
+            },
+        )
+
+    status = 0
+    last_save = time.monotonic()
+    try:
+        for item in collector.identify_many(
+            paths(), workers=args.workers, chunksize=args.chunksize, ordered=True
+        ):
+            size, index, key = sizes.popleft()
+            record = _record(item["path"], size, item["result"], item["error"])
+            writer.write(record)
+            progress.update(record)
+            position["root_index"], position["key"] = index, key
+            if time.monotonic() - last_save >= args.checkpoint_every:
+                save()
+                last_save = time.monotonic()
+        save(complete=True)
+    except KeyboardInterrupt:
+        save()
+        status = 130
+    except BrokenPipeError:
+        if not to_stdout:
+            raise
+        # Se cerró la salida (p. ej. `| head`): se termina sin traceback y sin
+        # que el flush final de stdout vuelva a fallar
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        status = 141
+    finally:
+        progress.summary()
+        if not to_stdout:
+            out.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,200 +1,433 @@
-import zipfile, xml.etree.ElementTree as ET
-from .utils import _seq_to_bytes_regex, _subseq_match
+import re, time
+from .utils import _BytePattern, _SubSequence, _fragments
 
-# ---- Opcional OLE2 ----
-try:
-    import olefile  # pip install olefile
+# ---- Opcional OLE2 (se importa la primera vez que hace falta) ----
+_olefile = None
+
+
+def _ole():
+    """Módulo olefile, o None si no está instalado (pip install olefile)."""
+    global _olefile
+    if _olefile is None:
+        try:
+            import olefile
+        except Exception:
+            olefile = False
+        _olefile = olefile
+    return _olefile or None
+
+
+# ====================== Lectura acotada de miembros ======================
+
+
+def _cached_read(cache: dict, key: str, size: int | None, read) -> bytes:
+    """
+    Devuelve los primeros `size` bytes del miembro (todo si size es None),
+    reutilizando lo ya leído en `cache` cuando alcanza.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        data, complete = entry
+        if complete or (size is not None and len(data) >= size):
+            return data
+    data = read(size)
+    cache[key] = (data, size is None or len(data) < size)
+    return data
+
+
+def _read_zip_member(zf, path: str, size: int | None) -> bytes:
+    # zf.open descomprime en streaming: solo se infla lo que se lee
+    with zf.open(path) as fh:
+        return fh.read() if size is None else fh.read(size)
+
+
+def _read_ole2_stream(ole, name: str, size: int | None) -> bytes:
+    with ole.openstream(name.split("/")) as st:
+        return st.read() if size is None else st.read(size)
 
-    HAVE_OLE = True
-except Exception:
-    HAVE_OLE = False
 
 # ====================== Firmas de contenedores (ContainerSignatureMapping) ======================
 
 
+def _location(reference: str) -> str:
+    """Reference del XML -> ubicación de _SubSequence (como en las binarias)."""
+    if reference.startswith("BOF"):
+        return "BOF"
+    if reference.startswith("EOF"):
+        return "EOF"
+    return "ANY"
+
+
 class _ContainerDB:
-    def __init__(self, mapping_xml_path: str):
-        t = ET.parse(mapping_xml_path)
-        root = t.getroot()  # ContainerSignatureMapping
-        self._csigs = (
-            []
-        )  # lista de dict: {id, type, files:[{path, bin_sigs:[{byte_sequences:[{reference, subseqs:[{min,max,regex,reference}]}]}]}]}
-        self._id_to_puid = {}  # signatureId -> PUID
-        self._puid_to_type = {}  # TriggerPuids: PUID -> ContainerType
-
-        # ---- ContainerSignatures
-        for cs in root.find("ContainerSignatures"):
-            if cs.tag != "ContainerSignature":
-                continue
-            cid = cs.attrib["Id"]
-            ctype = cs.attrib["ContainerType"]
-            files_node = cs.find("Files")
-            files = []
-            if files_node is not None:
-                for f in files_node:
-                    if f.tag != "File":
-                        continue
-                    path = (f.findtext("Path") or "").strip()
-                    bin_sigs = []
-                    bs_node = f.find("BinarySignatures")
-                    if bs_node is not None:
-                        isc = bs_node.find("InternalSignatureCollection")
-                        if isc is not None:
-                            for ins in isc.findall("InternalSignature"):
-                                bseqs = []
-                                for bs in ins.findall("ByteSequence"):
-                                    ref = bs.attrib.get("Reference", "BOFoffset")
-                                    subseqs = []
-                                    for sub in bs.findall("SubSequence"):
-                                        min_off = int(
-                                            sub.attrib.get("SubSeqMinOffset", 0)
-                                        )
-                                        max_off = int(
-                                            sub.attrib.get("SubSeqMaxOffset", min_off)
-                                        )
-                                        seq_txt = sub.findtext("Sequence") or ""
-                                        regex_bytes = _seq_to_bytes_regex(seq_txt)
-                                        subseqs.append(
-                                            {
-                                                "min": min_off,
-                                                "max": max_off,
-                                                "regex": regex_bytes,
-                                                "reference": ref,
-                                            }
-                                        )
-                                    bseqs.append({"reference": ref, "subseqs": subseqs})
-                                bin_sigs.append({"byte_sequences": bseqs})
-                    files.append({"path": path, "bin_sigs": bin_sigs})
-            self._csigs.append({"id": cid, "type": ctype, "files": files})
-
-        # ---- FileFormatMappings
-        ffm = root.find("FileFormatMappings")
-        if ffm is not None:
-            for m in ffm:
-                sid = m.attrib["signatureId"]
-                puid = m.attrib["Puid"]
-                self._id_to_puid[sid] = puid
-
-        # ---- TriggerPuids
-        tr = root.find("TriggerPuids")
-        if tr is not None:
-            for tp in tr:
-                self._puid_to_type[tp.attrib["Puid"]] = tp.attrib["ContainerType"]
+    """
+    Se carga por partes y solo cuando hace falta: crearla no lee el XML; el
+    primer is_trigger lee los TriggerPuids y guarda las firmas sin compilar,
+    y el primer archivo que dispara un contenedor las compila, sin volver a
+    leer el XML. `source` es la ruta del XML o una función sin argumentos que
+    devuelve un archivo binario con él. Con `cache_file`, la carga completa
+    sale de esa caché (o la escribe); `triggers` evita leer el XML solo para
+    is_trigger.
+    """
+
+    # Estado compilado que se guarda en `cache_file`
+    _STATE = (
+        "_id_to_puid",
+        "_puid_to_type",
+        "_path_index",
+        "_pathless",
+        "_n_paths",
+        "_csigs",
+    )
+
+    def __init__(self, source, cache_file: str | None = None, triggers=None):
+        self._source = source
+        self._cache_file = cache_file
+        self._puid_to_type = triggers  # TriggerPuids: PUID -> ContainerType
+        self._raw = None  # (elementos ContainerSignature, signatureId -> PUID)
+        self._csigs = None  # None hasta la carga completa
+
+    def _open(self):
+        if isinstance(self._source, str):
+            return open(self._source, "rb")
+        return self._source()
+
+    def _read_xml(self):
+        """
+        Única lectura del XML: mapping y TriggerPuids quedan listos; las
+        ContainerSignature se guardan como elementos, sin compilar.
+        """
+        import xml.etree.ElementTree as ET
+
+        elems = []
+        id_to_puid = {}  # signatureId -> PUID
+        puid_to_type = {}  # TriggerPuids: PUID -> ContainerType
+        with self._open() as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == "ContainerSignature":
+                    # El padre se vacía al cerrarse; el elemento sigue vivo aquí
+                    elems.append(elem)
+                elif elem.tag == "FileFormatMapping":
+                    id_to_puid[elem.attrib["signatureId"]] = elem.attrib["Puid"]
+                    elem.clear()
+                elif elem.tag == "TriggerPuid":
+                    puid_to_type[elem.attrib["Puid"]] = elem.attrib["ContainerType"]
+                    elem.clear()
+                elif elem.tag in (
+                    "ContainerSignatures",
+                    "FileFormatMappings",
+                    "TriggerPuids",
+                ):
+                    elem.clear()
+        self._raw = (elems, id_to_puid)
+        self._puid_to_type = puid_to_type
+
+    def _triggers(self) -> dict:
+        if self._puid_to_type is None:
+            self._read_xml()
+        return self._puid_to_type
+
+    def triggers(self) -> dict:
+        """PUID -> tipo de contenedor (para guardarlo junto a otra caché)."""
+        return dict(self._triggers())
+
+    def load(self) -> "_ContainerDB":
+        """Carga completa (firmas, mapping e índice), si no se hizo aún."""
+        if self._csigs is not None:
+            return self
+        if self._cache_file:
+            from .cache import _load_state
+
+            state = _load_state(self._cache_file)
+            if state is not None:
+                # _csigs se asigna al final, con todo lo demás listo
+                for key in self._STATE:
+                    setattr(self, key, state[key])
+                return self
+
+        if self._raw is None:
+            self._read_xml()
+        elems, id_to_puid = self._raw
+        # lista de dict: {id, type, files:[{path, window, bin_sigs:[
+        # {byte_sequences:[{reference, subseqs:[{min, max, max_len,
+        # reference, sub (_SubSequence)}]}]}]}]}
+        csigs = [self._parse_container_signature(elem) for elem in elems]
+
+        # Sin lock: si dos hilos cargan a la vez, ambos llegan al mismo
+        # resultado; _csigs se asigna al final, con todo lo demás listo
+        self._id_to_puid = id_to_puid
+        self._path_index, self._pathless, self._n_paths = self._build_path_index(csigs)
+        self._csigs = csigs
+        self._raw = None
+        if self._cache_file:
+            from .cache import _store_state
+
+            _store_state(self._cache_file, {k: getattr(self, k) for k in self._STATE})
+        return self
+
+    @staticmethod
+    def _build_path_index(csigs):
+        """
+        Índice (tipo de contenedor, path requerido) -> firmas candidatas, para
+        que el refinamiento dependa de los miembros del archivo y no del
+        tamaño de la base de contenedores.
+        """
+        path_index = {}  # ctype -> {path: [posiciones en _csigs]}
+        pathless = {}  # ctype -> [posiciones] (firmas sin Files)
+        n_paths = []  # posición -> nº de paths distintos requeridos
+        for pos, cs in enumerate(csigs):
+            paths = {f["path"] for f in cs["files"]}
+            n_paths.append(len(paths))
+            if not paths:
+                pathless.setdefault(cs["type"], []).append(pos)
+            by_path = path_index.setdefault(cs["type"], {})
+            for path in paths:
+                by_path.setdefault(path, []).append(pos)
+        return path_index, pathless, n_paths
+
+    def _candidates(self, ctype: str, present_paths) -> list[int]:
+        """Firmas de `ctype` cuyos paths requeridos están todos presentes."""
+        by_path = self._path_index.get(ctype, {})
+        counts = {}
+        for path in present_paths:
+            for pos in by_path.get(path, ()):
+                counts[pos] = counts.get(pos, 0) + 1
+        out = [pos for pos, n in counts.items() if n == self._n_paths[pos]]
+        out.extend(self._pathless.get(ctype, ()))
+        out.sort()
+        return out
+
+    def _parse_container_signature(self, cs) -> dict:
+        cid = cs.attrib["Id"]
+        ctype = cs.attrib["ContainerType"]
+        files_node = cs.find("Files")
+        files = []
+        if files_node is not None:
+            for f in files_node:
+                if f.tag != "File":
+                    continue
+                path = (f.findtext("Path") or "").strip()
+                bin_sigs = []
+                bs_node = f.find("BinarySignatures")
+                if bs_node is not None:
+                    isc = bs_node.find("InternalSignatureCollection")
+                    if isc is not None:
+                        for ins in isc.findall("InternalSignature"):
+                            bin_sigs.append(self._parse_internal_signature(ins))
+                files.append(
+                    {
+                        "path": path,
+                        "bin_sigs": bin_sigs,
+                        "window": self._read_window(bin_sigs),
+                    }
+                )
+        return {"id": cid, "type": ctype, "files": files}
+
+    @staticmethod
+    def _parse_internal_signature(ins) -> dict:
+        """
+        InternalSignature de un File. Si alguna SubSequence no compila, la
+        firma queda con byte_sequences None y nunca coincide.
+        """
+        bseqs = []
+        try:
+            for bs in ins.findall("ByteSequence"):
+                ref = bs.attrib.get("Reference", "BOFoffset")
+                subseqs = []
+                for sub in bs.findall("SubSequence"):
+                    min_off = int(sub.attrib.get("SubSeqMinOffset", 0))
+                    max_off = int(sub.attrib.get("SubSeqMaxOffset", min_off))
+                    # Se compila una sola vez, al cargar, con el mismo motor
+                    # que las firmas binarias
+                    pattern = _BytePattern(
+                        sub.findtext("Sequence") or "",
+                        _fragments(sub.findall("LeftFragment")),
+                        _fragments(sub.findall("RightFragment")),
+                    )
+                    subseqs.append(
+                        {
+                            "min": min_off,
+                            "max": max_off,
+                            "max_len": pattern.max_len,
+                            "reference": ref,
+                            "sub": _SubSequence(
+                                _location(ref), min_off, max_off, pattern
+                            ),
+                        }
+                    )
+                bseqs.append({"reference": ref, "subseqs": subseqs})
+        except (ValueError, OverflowError, re.error):
+            return {"byte_sequences": None}
+        return {"byte_sequences": bseqs}
+
+    def _read_window(self, bin_sigs) -> int | None:
+        """
+        Bytes iniciales del miembro que bastan para evaluar sus firmas:
+        max_offset + largo máximo del patrón, para secuencias ancladas a BOF.
+        None si alguna secuencia es EOF/variable o de largo no acotado.
+        """
+        window = 0
+        for ins in bin_sigs:
+            for bs in ins["byte_sequences"] or ():
+                for sub in bs["subseqs"]:
+                    if not sub["reference"].startswith("BOF"):
+                        return None
+                    if sub["max_len"] is None:
+                        return None
+                    window = max(window, sub["max"] + sub["max_len"])
+        return window
 
     def is_trigger(self, base_puid: str) -> str | None:
         """Devuelve 'ZIP'/'OLE2' si el PUID base debe disparar análisis de contenedor."""
-        return self._puid_to_type.get(base_puid)
+        return self._triggers().get(base_puid)
 
-    def _zip_match(self, file_path: str) -> list[str]:
+    def _file_sigs_match(self, f: dict, data: bytes) -> bool:
+        """Al menos una InternalSignature del File coincide con `data`."""
+        for ins in f["bin_sigs"]:
+            if ins["byte_sequences"] is None:
+                continue
+            # AND de todos los ByteSequences; cada ByteSequence es AND de sus SubSequences
+            bs_all = True
+            for bs in ins["byte_sequences"]:
+                sub_ok = True
+                for sub in bs["subseqs"]:
+                    if not sub["sub"].search(data, data):
+                        sub_ok = False
+                        break
+                if not sub_ok:
+                    bs_all = False
+                    break
+            if bs_all:
+                return True
+        return False
+
+    def _zip_match(self, source, instr=None) -> list[str]:
         out = []
-        with zipfile.ZipFile(file_path, "r") as zf:
+        members = {}  # path -> (bytes, completo): cada miembro se lee una vez
+        read_member, sigs_match = self._stage_fns(_read_zip_member, instr)
+        t0 = time.perf_counter() if instr is not None else 0.0
+        import zipfile
+
+        with zipfile.ZipFile(source, "r") as zf:
             names = set(zf.namelist())
-            for cs in self._csigs:
-                if cs["type"] != "ZIP":
-                    continue
-                # 1) Todos los paths deben existir
-                if any(f["path"] not in names for f in cs["files"]):
-                    continue
+            if instr is not None:
+                instr.stage("container_open", time.perf_counter() - t0)
+            # 1) Solo firmas cuyos paths existen todos en el ZIP
+            for pos in self._candidates("ZIP", names):
+                cs = self._csigs[pos]
+                t_sig = time.perf_counter() if instr is not None else 0.0
                 # 2) Para cada File con BinarySignatures, al menos una InternalSignature válida
                 ok = True
                 for f in cs["files"]:
                     if not f["bin_sigs"]:
                         continue
-                    data = zf.read(f["path"])
-                    file_ok = False
-                    for ins in f["bin_sigs"]:
-                        # AND de todos los ByteSequences; cada ByteSequence es AND de sus SubSequences
-                        bs_all = True
-                        for bs in ins["byte_sequences"]:
-                            ref = bs["reference"]
-                            sub_ok = True
-                            for sub in bs["subseqs"]:
-                                if not _subseq_match(
-                                    data, sub["regex"], ref, sub["min"], sub["max"]
-                                ):
-                                    sub_ok = False
-                                    break
-                            if not sub_ok:
-                                bs_all = False
-                                break
-                        if bs_all:
-                            file_ok = True
-                            break
-                    if not file_ok:
+                    data = _cached_read(
+                        members,
+                        f["path"],
+                        f["window"],
+                        lambda size: read_member(zf, f["path"], size),
+                    )
+                    if not sigs_match(f, data):
                         ok = False
                         break
+                if instr is not None:
+                    instr.container_signature(
+                        "ZIP", cs["id"], time.perf_counter() - t_sig, ok
+                    )
                 if ok:
                     out.append(cs["id"])
         return out
 
-    def _ole2_match(self, file_path: str) -> list[str]:
-        if not HAVE_OLE:
+    def _ole2_match(self, source, instr=None) -> list[str]:
+        olefile = _ole()
+        if olefile is None:
             return []
         out = []
-        if not olefile.isOleFile(file_path):
+        t0 = time.perf_counter() if instr is not None else 0.0
+        if not olefile.isOleFile(source):
             return out
-        with olefile.OleFileIO(file_path) as ole:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        streams = {}  # nombre -> (bytes, completo): cada stream se lee una vez
+        read_stream, sigs_match = self._stage_fns(_read_ole2_stream, instr)
+        with olefile.OleFileIO(source) as ole:
             # lista de streams/storages como "A/B/C"
             entries = {"/".join(e) for e in ole.listdir(streams=True, storages=True)}
-            for cs in self._csigs:
-                if cs["type"] != "OLE2":
-                    continue
-                # 1) Paths existen (en OLE2 son nombres de stream/storage)
-                if any(
-                    not any(f["path"] == e or f["path"] in e for e in entries)
-                    for f in cs["files"]
-                ):
-                    continue
+            if instr is not None:
+                instr.stage("container_open", time.perf_counter() - t0)
+            # 1) Paths existen (en OLE2 son nombres de stream/storage, exactos
+            #    o contenidos en la entrada): path del índice -> entrada real
+            resolved = self._resolve_ole2_paths(entries)
+            for pos in self._candidates("OLE2", resolved):
+                cs = self._csigs[pos]
+                t_sig = time.perf_counter() if instr is not None else 0.0
                 # 2) Validar BinarySignatures si existen
                 ok = True
                 for f in cs["files"]:
                     if not f["bin_sigs"]:
                         continue
-                    # buscar el stream que corresponda (exact o prefijo)
-                    stream_name = None
-                    for e in entries:
-                        if e == f["path"] or f["path"] in e:
-                            stream_name = e
-                            break
-                    if stream_name is None or not ole.exists(stream_name.split("/")):
+                    stream_name = resolved[f["path"]]
+                    if not ole.exists(stream_name.split("/")):
                         ok = False
                         break
-                    with ole.openstream(stream_name.split("/")) as st:
-                        data = st.read()
-                    file_ok = False
-                    for ins in f["bin_sigs"]:
-                        bs_all = True
-                        for bs in ins["byte_sequences"]:
-                            ref = bs["reference"]
-                            sub_ok = True
-                            for sub in bs["subseqs"]:
-                                if not _subseq_match(
-                                    data, sub["regex"], ref, sub["min"], sub["max"]
-                                ):
-                                    sub_ok = False
-                                    break
-                            if not sub_ok:
-                                bs_all = False
-                                break
-                        if bs_all:
-                            file_ok = True
-                            break
-                    if not file_ok:
+                    data = _cached_read(
+                        streams,
+                        stream_name,
+                        f["window"],
+                        lambda size: read_stream(ole, stream_name, size),
+                    )
+                    if not sigs_match(f, data):
                         ok = False
                         break
+                if instr is not None:
+                    instr.container_signature(
+                        "OLE2", cs["id"], time.perf_counter() - t_sig, ok
+                    )
                 if ok:
                     out.append(cs["id"])
         return out
 
-    def refine(self, file_path: str, base_puid: str) -> list[str]:
-        """Devuelve lista de PUIDs refinados (vía container signatures)."""
+    def _stage_fns(self, read, instr):
+        """Lectura de miembros y matching, medidos si hay instrumentación."""
+        if instr is None:
+            return read, self._file_sigs_match
+        return (
+            instr.timed("member_read", read),
+            instr.timed("container_match", self._file_sigs_match),
+        )
+
+    def _resolve_ole2_paths(self, entries: set[str]) -> dict[str, str]:
+        """
+        Para cada path OLE2 del índice presente en el archivo, la entrada que
+        le corresponde (coincidencia exacta o, si no, la primera que lo contiene).
+        """
+        ordered = sorted(entries)
+        haystack = "\n".join(ordered)
+        resolved = {}
+        for path in self._path_index.get("OLE2", {}):
+            if path in entries:
+                resolved[path] = path
+            elif path in haystack:
+                match = next((e for e in ordered if path in e), None)
+                if match is not None:
+                    resolved[path] = match
+        return resolved
+
+    def refine(self, source, base_puid: str, instr=None) -> list[str]:
+        """
+        Devuelve lista de PUIDs refinados (vía container signatures).
+        `source` es una ruta o un archivo binario seekable (p. ej. _BufferReader).
+        `instr` (Instrumentation) recibe los tiempos de cada etapa.
+        """
         ctype = self.is_trigger(base_puid)
         if not ctype:
             return []
+        self.load()
+        if hasattr(source, "seek"):
+            source.seek(0)
         if ctype == "ZIP":
-            sig_ids = self._zip_match(file_path)
+            sig_ids = self._zip_match(source, instr)
         elif ctype == "OLE2":
-            sig_ids = self._ole2_match(file_path)
+            sig_ids = self._ole2_match(source, instr)
         else:
             sig_ids = []
         # Mapear signatureId -> PUID
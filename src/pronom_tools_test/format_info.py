@@ -1,122 +1,737 @@
-import os, xml.etree.ElementTree as ET
+import mmap, os, time
+from .cache import _cache_path, _load_state, _source_digest, _store_state
 from .containers import _ContainerDB
+from .formats import _FileFormat, _FormatRegistry
+from .index import _SignatureIndex
+from .instrumentation import Instrumentation
 from .single_signature import _PRONOMSignature
+from .streams import (
+    _BufferReader,
+    _TailBuffer,
+    _fileno,
+    _is_seekable,
+    _read_all,
+    _unwrap_view,
+)
+from .utils import _fragments
+
+# Las funciones opcionales (multiproceso, asyncio, caché de resultados, base
+# compartida, NumPy, archivos comprimidos, orden adaptativo) importan sus
+# módulos al usarse: importar el paquete carga solo lo necesario para
+# identificar con firmas binarias.
 
 # ====================== Colector principal ======================
 
 
 class FormatInfoCollector:
-    def __init__(self, signature_xml: str, container_xml: str | None = None):
-        self.signatures = self._load_signatures(signature_xml)
-        self.formats = self._load_formats(signature_xml)
-        self.sig_to_formats = self._build_mapping()
-        self.container_db = _ContainerDB(container_xml) if container_xml else None
+    # Por encima de este tamaño, si hace falta el archivo completo, se usa mmap
+    MMAP_THRESHOLD = 1 << 20
+    # Tamaño de lectura al consumir streams no seekables
+    STREAM_CHUNK = 1 << 20
 
-    # ---- Firmas binarias
-    def _load_signatures(self, xml_path):
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+    # Atributos que se guardan en la caché de firmas compiladas
+    _CACHED_ATTRS = (
+        "signatures",
+        "formats",
+        "sig_to_formats",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        signature_xml: str,
+        container_xml: str | None = None,
+        cache_dir: str | None = None,
+    ):
+        """
+        Si se indica `cache_dir`, las firmas y formatos compilados se guardan
+        allí, identificados por el hash de los XML y la versión de la librería;
+        el XML de firmas solo se vuelve a leer si la caché falta o cambió. Los
+        contenedores compilados van en un archivo aparte que se lee recién
+        cuando un archivo los necesita; los TriggerPuids, junto a las firmas.
+        """
+        self._sources = (signature_xml, container_xml)
+        self._db_version = None
+        if cache_dir:
+            self._db_version = _source_digest(signature_xml, container_xml)
+            cache_file = _cache_path(cache_dir, self._db_version)
+            state = _load_state(cache_file)
+        else:
+            state = None
+
+        if state is not None:
+            triggers = state.pop("container_triggers")
+            self.__dict__.update(state)
+        else:
+            (
+                self.signatures,
+                self.formats,
+                self.sig_to_formats,
+            ) = self._load_signature_file(signature_xml)
+            self._index = _SignatureIndex(self.signatures)
+            triggers = None
+
+        self.container_db = None
+        if container_xml:
+            self.container_db = _ContainerDB(
+                container_xml,
+                (
+                    _cache_path(cache_dir, self._db_version, "containers")
+                    if cache_dir
+                    else None
+                ),
+                triggers,
+            )
+        if cache_dir and state is None:
+            state = {k: getattr(self, k) for k in self._CACHED_ATTRS}
+            if self.container_db is not None:
+                # La caché de contenedores se escribe ya, con una sola lectura
+                state["container_triggers"] = self.container_db.load().triggers()
+            else:
+                state["container_triggers"] = None
+            _store_state(cache_file, state)
+
+        self._bof_window, self._eof_window = self._read_windows_needed()
+        self._init_runtime()
+
+    def _init_runtime(self):
+        """Estado que no forma parte de la base de firmas (cachés, opciones)."""
+        self._mime_groups = None
+        self._result_cache = None
+        self._async = None
+        self._instr = None
+        self._adaptive = None
+        self._hints = None
+        self._bof_matrix = None
+
+    # ---- Base de firmas compartida entre procesos
+    def export_shared_db(self, path: str):
+        """
+        Escribe firmas, índice, formatos y contenedores en un archivo de tablas
+        planas que otros procesos abren con `attach_shared_db`.
+        """
+        from .shared import _SharedIndex, _write_shared_db
+
+        if isinstance(self._index, _SharedIndex):
+            raise ValueError("El colector ya usa una base compartida")
+        _write_shared_db(path, self)
+
+    @classmethod
+    def attach_shared_db(cls, path: str) -> "FormatInfoCollector":
+        """
+        Colector sobre una base escrita con `export_shared_db`, mapeada en
+        memoria de solo lectura: los procesos que la abren (o que heredan el
+        colector por fork) comparten sus páginas, también las de las firmas de
+        contenedores. Los formatos se cargan como objetos normales en cada
+        proceso; las firmas con regex se compilan en cada proceso la primera
+        vez que se necesitan.
+        """
+        from .shared import (
+            _SharedContainerDB,
+            _SharedDB,
+            _SharedIndex,
+            _SharedSignatures,
+        )
+
+        db = _SharedDB(path)
+        self = cls.__new__(cls)
+        self._sources = (None, None)
+        self._db_version = db.db_version
+        self.signatures = _SharedSignatures(db)
+        self._index = _SharedIndex(db)
+        self.formats, self.sig_to_formats = db.load_formats()
+        self.container_db = _SharedContainerDB(db) if db.containers else None
+        self._bof_window, self._eof_window = db.windows
+        self._init_runtime()
+        return self
+
+    def _read_windows_needed(self):
+        """
+        Ventanas de lectura (bytes desde BOF y desde EOF) que cubren todas las
+        firmas; None si alguna necesita el archivo completo.
+        """
+        bof = eof = 0
+        for sig in self.signatures:
+            sig_bof, sig_eof = sig.read_windows()
+            if sig_bof is None or sig_eof is None:
+                return None, None
+            bof = max(bof, sig_bof)
+            eof = max(eof, sig_eof)
+        return bof, eof
+
+    # ---- Carga en una sola pasada (firmas, formatos y mapping)
+    def _load_signature_file(self, xml_path):
+        """
+        Recorre el DROID_SignatureFile con iterparse, construyendo firmas,
+        formatos y el mapping firma -> formatos a medida que se cierra cada
+        elemento, que luego se libera para mantener acotada la memoria.
+        """
         ns = {"p": "http://www.nationalarchives.gov.uk/pronom/SignatureFile"}
+        tag_sig = "{%s}InternalSignature" % ns["p"]
+        tag_fmt = "{%s}FileFormat" % ns["p"]
+        import xml.etree.ElementTree as ET
+
+        tag_collections = (
+            "{%s}InternalSignatureCollection" % ns["p"],
+            "{%s}FileFormatCollection" % ns["p"],
+        )
         signatures = []
-        for sig in root.findall(".//p:InternalSignature", ns):
-            sig_id = sig.attrib["ID"]
-            seqs = []
-            for bs in sig.findall(".//p:ByteSequence", ns):
-                location = bs.attrib.get("Reference", "BOFoffset")
-                for subseq in bs.findall("p:SubSequence", ns):
-                    pattern = (subseq.find("p:Sequence", ns).text or "").strip()
-                    min_off = int(subseq.attrib.get("SubSeqMinOffset", 0))
-                    max_off = int(subseq.attrib.get("SubSeqMaxOffset", min_off))
-                    if location.startswith("BOF"):
-                        loc = "BOF"
-                    elif location.startswith("EOF"):
-                        loc = "EOF"
-                    else:
-                        loc = "ANY"
-                    seqs.append(
-                        {
-                            "location": loc,
-                            "pattern": pattern,
-                            "min_offset": min_off,
-                            "max_offset": max_off,
-                        }
-                    )
-            signatures.append(_PRONOMSignature(sig_id, seqs))
-        return signatures
-
-    def _load_formats(self, xml_path):
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        ns = {"p": "http://www.nationalarchives.gov.uk/pronom/SignatureFile"}
-        formats = []
-        for ff in root.findall(".//p:FileFormat", ns):
-            fmt_id = ff.attrib.get("ID")
-            name = ff.attrib.get("Name")
-            puid = ff.attrib.get("PUID")
-            mime = ff.attrib.get("MIMEType")
-            internal_ids = [n.text for n in ff.findall("p:InternalSignatureID", ns)]
-            extensions = [n.text for n in ff.findall("p:Extension", ns)]
-            formats.append(
-                {
-                    "id": fmt_id,
-                    "name": name,
-                    "puid": puid,
-                    "mime": mime,
-                    "extensions": extensions,
-                    "internal_ids": internal_ids,
-                }
-            )
-        return formats
+        formats = _FormatRegistry()
+        for _, elem in ET.iterparse(xml_path, events=("end",)):
+            if elem.tag == tag_sig:
+                signatures.append(self._parse_signature(elem, ns))
+                elem.clear()
+            elif elem.tag == tag_fmt:
+                formats.add(self._parse_format(elem, ns))
+                elem.clear()
+            elif elem.tag in tag_collections:
+                elem.clear()
+        return signatures, formats, formats.by_signature
 
-    def _build_mapping(self):
-        mapping = {}
-        for fmt in self.formats:
-            for sig_id in fmt["internal_ids"]:
-                mapping.setdefault(sig_id, []).append(fmt)
-        return mapping
+    # ---- Firmas binarias
+    def _parse_signature(self, sig, ns):
+        sig_id = sig.attrib["ID"]
+        seqs = []
+        for bs in sig.findall(".//p:ByteSequence", ns):
+            location = bs.attrib.get("Reference", "BOFoffset")
+            for subseq in bs.findall("p:SubSequence", ns):
+                pattern = (subseq.find("p:Sequence", ns).text or "").strip()
+                min_off = int(subseq.attrib.get("SubSeqMinOffset", 0))
+                max_off = int(subseq.attrib.get("SubSeqMaxOffset", min_off))
+                if location.startswith("BOF"):
+                    loc = "BOF"
+                elif location.startswith("EOF"):
+                    loc = "EOF"
+                else:
+                    loc = "ANY"
+                seqs.append(
+                    {
+                        "location": loc,
+                        "pattern": pattern,
+                        "min_offset": min_off,
+                        "max_offset": max_off,
+                        "left_fragments": _fragments(
+                            subseq.findall("p:LeftFragment", ns)
+                        ),
+                        "right_fragments": _fragments(
+                            subseq.findall("p:RightFragment", ns)
+                        ),
+                    }
+                )
+        return _PRONOMSignature(sig_id, seqs)
+
+    # ---- Formatos
+    def _parse_format(self, ff, ns):
+        return _FileFormat(
+            id=ff.attrib.get("ID"),
+            name=ff.attrib.get("Name"),
+            puid=ff.attrib.get("PUID"),
+            mime=ff.attrib.get("MIMEType"),
+            extensions=[n.text for n in ff.findall("p:Extension", ns)],
+            internal_ids=[n.text for n in ff.findall("p:InternalSignatureID", ns)],
+            priority_over=[
+                n.text for n in ff.findall("p:HasPriorityOverFileFormatID", ns)
+            ],
+        )
 
     # ---- Identificación principal
     def identify_file(self, file_path: str):
-        # leer head/tail con seguridad en archivos pequeños
-        fsize = os.path.getsize(file_path)
+        hints = self._hints
+        if hints is None:
+            return self._identify_path(file_path, None)
+        # Con pista: la extensión ordena la búsqueda y se informa si coincidió
+        ext = hints.extension(file_path)
+        return hints.annotate(self._identify_path(file_path, ext), ext)
+
+    def _identify_path(self, file_path: str, ext: str | None):
+        cache = self._result_cache
+        key = None
+        if cache is not None:
+            from .result_cache import _MISS
+
+            # Sin modo estricto la pista puede cambiar el resultado
+            suffix = f"|{ext}" if ext and not self._hints.strict else ""
+        if cache is not None and cache.key == "stat":
+            key = cache.stat_key(os.stat(file_path)) + suffix
+            result = cache.get(key, self.formats)
+            if result is not _MISS:
+                return result
+
+        instr = self._instr
+        t0 = time.perf_counter() if instr is not None else 0.0
         with open(file_path, "rb") as f:
-            head = f.read(min(65536, fsize))
-            if fsize > 65536:
-                f.seek(-65536, os.SEEK_END)
-                tail = f.read()
-            else:
-                f.seek(0)
-                tail = f.read()
+            fsize = os.fstat(f.fileno()).st_size
+            head, tail = self._read_windows(f, fsize)
+        if instr is not None:
+            instr.stage("read", time.perf_counter() - t0, {"path": file_path})
+        try:
+            if cache is not None and key is None:
+                key = cache.content_key(fsize, head, tail) + suffix
+                result = cache.get(key, self.formats)
+                if result is not _MISS:
+                    return result
+            result = self._identify_data(file_path, head, tail, ext)
+        finally:
+            if isinstance(head, mmap.mmap):
+                head.close()
 
-        for sig in self.signatures:
+        if cache is not None and (
+            cache.key == "stat" or not self._used_containers(result)
+        ):
+            cache.put(key, result)
+        return result
+
+    def _used_containers(self, result) -> bool:
+        # El hash de las ventanas no cubre los miembros de un ZIP/OLE2
+        if result is None or self.container_db is None:
+            return False
+        return any(
+            self.container_db.is_trigger(f["puid"]) for f in result["base_formats"]
+        )
+
+    def _read_windows(self, f, fsize: int):
+        """
+        Lee solo lo que piden las firmas: head de `_bof_window` bytes y tail de
+        `_eof_window`. Si alguna firma necesita el archivo completo, los
+        archivos grandes se mapean en memoria en lugar de copiarse.
+        """
+        bof, eof = self._bof_window, self._eof_window
+        if bof is None or eof is None:
+            fileno = _fileno(f)
+            if fsize > self.MMAP_THRESHOLD and fileno is not None:
+                mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                return mm, mm
+            data = f.read()
+            return data, data
+        if bof + eof >= fsize:
+            data = f.read()
+            return data, data
+        head = f.read(bof)
+        f.seek(fsize - eof)
+        return head, f.read(eof)
+
+    def _read_stream_windows(self, stream):
+        """
+        Ventanas de un stream no seekable: el head se lee directamente y el
+        tail se conserva en un buffer circular mientras se consume el resto.
+        Devuelve (head, tail, data); `data` es el contenido completo cuando se
+        tuvo que leer entero (o era pequeño), y None en otro caso.
+        """
+        bof, eof = self._bof_window, self._eof_window
+        if bof is None or eof is None:
+            data = _read_all(stream)
+            return data, data, data
+        head = _read_all(stream, bof)
+        ring = _TailBuffer(eof)
+        rest = 0
+        while True:
+            chunk = stream.read(self.STREAM_CHUNK)
+            if not chunk:
+                break
+            ring.write(chunk)
+            rest += len(chunk)
+        if rest <= eof:
+            data = head + ring.getvalue()
+            return data, data, data
+        return head, ring.getvalue(), None
+
+    def identify_bytes(self, buf):
+        """
+        Identifica un buffer en memoria (bytes, bytearray, memoryview, mmap).
+        La refinación por contenedor lee el mismo buffer sin copiarlo. Una
+        memoryview que cubre entero un bytes, bytearray o mmap se busca sobre
+        ese objeto; otra (un recorte, un array de NumPy...) se copia una vez
+        si las firmas necesitan el buffer completo, porque las búsquedas usan
+        .find(), que memoryview no tiene.
+        """
+        if not isinstance(buf, (bytes, bytearray, mmap.mmap)):
+            buf = _unwrap_view(memoryview(buf).cast("B"))
+        bof, eof = self._bof_window, self._eof_window
+        size = len(buf)
+        if bof is None or eof is None or bof + eof >= size:
+            head = tail = buf.tobytes() if isinstance(buf, memoryview) else buf
+        else:
+            head, tail = bytes(buf[:bof]), bytes(buf[size - eof :])
+        with _BufferReader(buf) as source:
+            return self._identify_data(source, head, tail)
+
+    def identify_stream(self, stream):
+        """
+        Identifica un archivo binario abierto o un stream de red. Si es seekable
+        se leen solo las ventanas necesarias desde el inicio del stream; si no,
+        se consume una vez guardando el final en un buffer circular (y sin
+        refinación por contenedor, salvo que el stream se haya leído completo).
+        """
+        if _is_seekable(stream):
+            instr = self._instr
+            t0 = time.perf_counter() if instr is not None else 0.0
+            fsize = stream.seek(0, os.SEEK_END)
+            stream.seek(0)
+            head, tail = self._read_windows(stream, fsize)
+            if instr is not None:
+                instr.stage("read", time.perf_counter() - t0)
+            try:
+                return self._identify_data(stream, head, tail)
+            finally:
+                if isinstance(head, mmap.mmap):
+                    head.close()
+        instr = self._instr
+        t0 = time.perf_counter() if instr is not None else 0.0
+        head, tail, data = self._read_stream_windows(stream)
+        if instr is not None:
+            instr.stage("read", time.perf_counter() - t0)
+        if data is None:
+            return self._identify_data(None, head, tail)
+        with _BufferReader(data) as source:
+            return self._identify_data(source, head, tail)
+
+    def _identify_data(self, source, head, tail, ext=None):
+        """
+        Busca la primera firma que coincide con head/tail. `source` (ruta o
+        archivo seekable) se usa para la refinación por contenedor; con None
+        no se refina. `ext` (con la pista por extensión activa) solo cambia
+        el orden en que se prueban las firmas.
+        """
+        return self._result_for(self._first_match(head, tail, ext), source)
+
+    def _result_for(self, sig, source):
+        """Resultado de la firma ganadora (None si no hubo), refinado con `source`."""
+        if sig is None:
+            return None
+        base_formats = self.sig_to_formats.get(sig.sig_id, [])
+        results = []
+        refined_results = []
+        refined_seen = set()
+        for fmt in base_formats:
+            results.append(fmt)
+            # Refinar con contenedores si procede
+            if self.container_db and fmt["puid"] and source is not None:
+                refined_puids = self.container_db.refine(
+                    source, fmt["puid"], self._instr
+                )
+                for puid in refined_puids:
+                    rf = self.formats.by_puid.get(puid)
+                    if rf is not None and id(rf) not in refined_seen:
+                        refined_seen.add(id(rf))
+                        refined_results.append(rf)
+        # Los registros del índice se entregan como dicts propios del llamador
+        results = [fmt.as_dict() for fmt in results]
+        refined_results = [fmt.as_dict() for fmt in refined_results]
+        main_format = None
+        if len(refined_results) > 0:
+            main_format = refined_results[0]
+        elif len(results) > 0:
+            main_format = results[0]
+        return {
+            "signature_id": sig.sig_id,
+            "main_format": main_format,
+            "base_formats": results,
+            "container_formats": refined_results,
+        }
+
+    def _first_match(self, head, tail, ext=None):
+        """Primera firma (en el orden original) que coincide con head/tail."""
+        if self._instr is not None:
+            return self._first_match_instrumented(head, tail, ext)
+        signatures = self.signatures
+        candidates = self._index.candidates(head, tail)
+        if ext or self._adaptive is not None:
+            pos = self._search(
+                candidates, lambda pos: signatures[pos].match(head, tail), ext
+            )
+            return None if pos is None else signatures[pos]
+        for pos in candidates:
+            sig = signatures[pos]
             if sig.match(head, tail):
-                base_formats = self.sig_to_formats.get(sig.sig_id, [])
-                results = []
-                refined_results = []
-                for fmt in base_formats:
-                    results.append(fmt)
-                    # Refinar con contenedores si procede
-                    if self.container_db and fmt["puid"]:
-                        refined_puids = self.container_db.refine(file_path, fmt["puid"])
-                        for puid in refined_puids:
-                            rf = next(
-                                (x for x in self.formats if x["puid"] == puid), None
-                            )
-                            if rf and rf not in refined_results:
-                                refined_results.append(rf)
-                main_format = None
-                if len(refined_results) > 0:
-                    main_format = refined_results[0]
-                elif len(results) > 0:
-                    main_format = results[0]
-                return {
-                    "signature_id": sig.sig_id,
-                    "main_format": main_format,
-                    "base_formats": results,
-                    "container_formats": refined_results,
-                }
+                return sig
         return None
 
+    def _search(self, candidates, test, ext):
+        """Búsqueda con pista por extensión u orden adaptativo."""
+        if ext:
+            return self._hints.first_match(candidates, test, ext, self._search_order)
+        return self._search_order(candidates, test)
+
+    def _search_order(self, candidates, test):
+        if self._adaptive is not None:
+            return self._adaptive.first_match(candidates, test)
+        return next((pos for pos in candidates if test(pos)), None)
+
+    def _first_match_instrumented(self, head, tail, ext=None):
+        clock = time.perf_counter
+        signatures = self.signatures
+        tested = []  # (sig_id, segundos, coincide)
+
+        def test(pos):
+            sig = signatures[pos]
+            t0 = clock()
+            ok = sig.match(head, tail)
+            tested.append((sig.sig_id, clock() - t0, ok))
+            return ok
+
+        start = clock()
+        candidates = self._index.candidates(head, tail)
+        pos = self._search(candidates, test, ext)
+        found = None if pos is None else signatures[pos]
+        self._instr.binary_match(
+            clock() - start, tested, found.sig_id if found else None
+        )
+        return found
+
+    # ---- Caché de resultados
+    @property
+    def db_version(self) -> str:
+        """Hash de los XML de firmas y contenedores (y versión de la librería)."""
+        if self._db_version is None:
+            self._db_version = _source_digest(*self._sources)
+        return self._db_version
+
+    def enable_result_cache(
+        self, maxsize: int = 100_000, path: str | None = None, key: str = "stat"
+    ) -> "ResultCache":
+        """
+        Activa la caché de resultados de identify_file: un LRU en memoria de
+        `maxsize` entradas y, si se indica `path`, una base SQLite persistente.
+        `key` es "stat" (device, inode, tamaño, mtime) o "content" (hash de las
+        ventanas leídas; no se cachean resultados refinados por contenedor).
+        """
+        from .result_cache import ResultCache
+
+        self.disable_result_cache()
+        self._result_cache = ResultCache(self.db_version, maxsize, path, key)
+        return self._result_cache
+
+    def disable_result_cache(self):
+        """Desactiva la caché de resultados, escribiendo lo pendiente."""
+        if self._result_cache is not None:
+            self._result_cache.close()
+            self._result_cache = None
+
+    def cache_stats(self) -> dict | None:
+        """Aciertos/fallos de la caché de resultados (None si no está activa)."""
+        return self._result_cache.stats() if self._result_cache else None
+
+    # ---- Instrumentación
+    def enable_instrumentation(self, callbacks=()) -> Instrumentation:
+        """
+        Activa la medición por etapa y por firma. Cada callback recibe
+        `(stage, seconds, info)` al cerrar una etapa. Desactivada (por
+        defecto) solo cuesta una comparación con None por etapa.
+        """
+        self._instr = Instrumentation(callbacks)
+        return self._instr
+
+    def disable_instrumentation(self):
+        self._instr = None
+
+    def instrumentation_stats(self, top: int = 10) -> dict | None:
+        """Tiempos por etapa y firmas más caras (None si no está activa)."""
+        return self._instr.stats(top) if self._instr else None
+
+    # ---- Orden adaptativo de firmas
+    def enable_adaptive_order(
+        self,
+        hot_size: int = 64,
+        reorder_every: int = 1000,
+        state_path: str | None = None,
+    ) -> "AdaptiveOrder":
+        """
+        Prueba primero las `hot_size` firmas más frecuentes (recalculadas cada
+        `reorder_every` identificaciones). Una caliente que coincide solo
+        cede ante firmas anteriores cuyo formato tiene prioridad sobre el suyo
+        (HasPriorityOverFileFormatID). `state_path` carga contadores guardados
+        con AdaptiveOrder.save.
+        """
+        from .adaptive import AdaptiveOrder
+
+        self._adaptive = AdaptiveOrder(
+            self.signatures, self.sig_to_formats, hot_size, reorder_every
+        )
+        if state_path:
+            self._adaptive.load(state_path)
+        return self._adaptive
+
+    def disable_adaptive_order(self):
+        self._adaptive = None
+
+    # ---- Pista por extensión
+    def enable_extension_hints(self, strict: bool = False) -> "ExtensionHints":
+        """
+        identify_file prueba primero las firmas de los formatos que declaran
+        la extensión del archivo y devuelve la primera que coincide con el
+        contenido; si ninguna coincide, busca entre todas. El resultado lleva
+        una clave más, "extension_match" (True/False, o None si el archivo no
+        tiene extensión o la firma no tiene formato).
+
+        Con `strict=True` también verifica las firmas anteriores en el orden
+        del XML, de modo que el resultado es el mismo que sin pista.
+        """
+        from .hints import ExtensionHints
+
+        self._hints = ExtensionHints(self.signatures, self.formats, strict)
+        return self._hints
+
+    def disable_extension_hints(self):
+        self._hints = None
+
+    def extension_hint_stats(self) -> dict | None:
+        """Identificaciones, cuántas tuvieron firmas de la extensión y aciertos."""
+        return self._hints.stats() if self._hints else None
+
+    # ---- Identificación por lotes
+    def identify_many(
+        self,
+        paths,
+        workers: int | None = None,
+        chunksize: int = 64,
+        ordered: bool = True,
+    ):
+        """
+        Identifica muchas rutas en paralelo (un pool de procesos, cada uno con
+        una copia del colector). Genera un dict {path, result, error} por ruta;
+        los errores de un archivo se capturan en `error` sin detener el lote.
+        Con `workers=1` se procesa en el propio proceso.
+        """
+        from .parallel import _iter_identify
+
+        return _iter_identify(self, paths, workers, chunksize, ordered)
+
+    def identify_tree(self, root: str, **kwargs):
+        """Como identify_many, para todos los archivos bajo `root`."""
+        from .parallel import _walk_files
+
+        return self.identify_many(_walk_files(root), **kwargs)
+
+    def identify_many_vectorized(self, paths, batch_size: int = 1024):
+        """
+        Como identify_many, en este proceso y en orden, pero comprobando las
+        anclas BOF de lotes de `batch_size` archivos a la vez con NumPy. Sin
+        NumPy se identifica archivo por archivo. Aplica la pista por extensión
+        igual que identify_file; con el orden adaptativo activo no se vectoriza
+        (cada archivo sigue ese orden, con sus prioridades). No usa la caché de
+        resultados. El resultado es siempre el de identify_file.
+        """
+        from .parallel import _chunks, _identify_one
+        from .vectorized import HAVE_NUMPY, _BOFMatrix
+
+        if not HAVE_NUMPY:
+            for path in paths:
+                yield _identify_one(self, path)
+            return
+        if self._bof_matrix is None:
+            self._bof_matrix = _BOFMatrix(self.signatures)
+        for batch in _chunks(paths, batch_size):
+            yield from self._identify_batch(batch)
+
+    def _identify_batch(self, paths) -> list[dict]:
+        records = [{"path": p, "result": None, "error": None} for p in paths]
+        read, heads, tails = [], [], []
+        try:
+            for record in records:
+                try:
+                    with open(record["path"], "rb") as f:
+                        fsize = os.fstat(f.fileno()).st_size
+                        head, tail = self._read_windows(f, fsize)
+                except Exception as exc:
+                    record["error"] = f"{type(exc).__name__}: {exc}"
+                    continue
+                read.append(record)
+                heads.append(head)
+                tails.append(tail)
+            hints = self._hints
+            signatures = self.signatures
+            adaptive = self._adaptive is not None
+            if adaptive:
+                # El orden adaptativo (con sus prioridades) decide fila a fila
+                winners = [None] * len(read)
+            else:
+                winners = self._bof_matrix.first_matches(
+                    heads, tails, signatures, self._index
+                )
+            for record, pos, head, tail in zip(read, winners, heads, tails):
+                try:
+                    ext = hints.extension(record["path"]) if hints else ""
+                    if adaptive:
+                        sig = self._first_match(head, tail, ext)
+                    else:
+                        if ext and not hints.strict:
+                            # Sin modo estricto gana la primera firma de la extensión
+                            hinted = hints.first_hinted(
+                                self._index.candidates(head, tail),
+                                lambda p: signatures[p].match(head, tail),
+                                ext,
+                            )
+                            pos = pos if hinted is None else hinted
+                        sig = None if pos is None else signatures[pos]
+                    record["result"] = self._result_for(sig, record["path"])
+                    if hints is not None:
+                        record["result"] = hints.annotate(record["result"], ext)
+                except Exception as exc:
+                    record["error"] = f"{type(exc).__name__}: {exc}"
+        finally:
+            for head in heads:
+                if isinstance(head, mmap.mmap):
+                    head.close()
+        return records
+
+    # ---- Miembros de archivos comprimidos
+    def identify_archive(
+        self,
+        source,
+        max_depth: int = 5,
+        max_members: int = 100_000,
+        max_bytes: int = 1 << 32,
+        workers: int = 1,
+    ):
+        """
+        Identifica cada miembro de un ZIP (o cada stream de un OLE2), bajando
+        en contenedores anidados hasta `max_depth`. Genera dicts {path, depth,
+        size, result, error}, con rutas "archivo!miembro!submiembro".
+        `max_members` y `max_bytes` (tamaño descomprimido) acotan todo el
+        recorrido; si se alcanzan, el último registro lleva el motivo en `error`.
+        """
+        from .archives import _ArchiveWalker
+
+        walker = _ArchiveWalker(self, max_depth, max_members, max_bytes, workers)
+        return walker.walk(source)
+
+    # ---- API asíncrona (asyncio)
+    def configure_async(self, max_concurrency: int | None = None, executor=None):
+        """
+        Configura la API asíncrona: identificaciones simultáneas como máximo y,
+        opcionalmente, el executor a usar (por defecto un ThreadPoolExecutor
+        propio que se crea al primer uso).
+        """
+        from .aio import _AsyncRunner
+
+        self.close_async()
+        self._async = _AsyncRunner(self, max_concurrency, executor)
+        return self._async
+
+    def _async_runner(self):
+        if self._async is None:
+            from .aio import _AsyncRunner
+
+            self._async = _AsyncRunner(self)
+        return self._async
+
+    async def identify_file_async(self, file_path: str):
+        """identify_file sin bloquear el event loop (E/S y matching en el executor)."""
+        return await self._async_runner().identify(file_path)
+
+    def identify_many_async(self, paths, ordered: bool = False):
+        """
+        Generador asíncrono de {path, result, error} para un iterable (normal o
+        asíncrono) de rutas; los errores de cada archivo se capturan en `error`.
+        """
+        return self._async_runner().identify_many(paths, ordered)
+
+    def close_async(self):
+        """Libera el executor propio de la API asíncrona."""
+        if self._async is not None:
+            self._async.close()
+            self._async = None
+
     # ---- Agrupar formatos por la primera parte del mime type
     def _get_mime_type_info(self, mime_type: str) -> str:
         """Convierte un mime type a una categoría legible."""
@@ -203,6 +818,30 @@ class FormatInfoCollector:
 
     # ---- Agrupar formatos por mime type
     def group_formats_by_mime(self):
+        # Los formatos no cambian tras la carga: la agrupación (inmutable) se
+        # calcula una sola vez y cada llamada arma dicts nuevos a partir de ella
+        if self._mime_groups is None:
+            self._mime_groups = self._build_mime_groups()
+        return [
+            {
+                "mime_type": mime_type,
+                "human_mime_type": human_mime_type,
+                "description": description,
+                "formatos": [
+                    {
+                        "puid": fmt.puid,
+                        "name": fmt.name,
+                        "mime": fmt.mime,
+                        "extensions": list(fmt.extensions),
+                    }
+                    for fmt in formats
+                ],
+            }
+            for mime_type, human_mime_type, description, formats in self._mime_groups
+        ]
+
+    def _build_mime_groups(self) -> tuple:
+        """Tupla de (mime_type, nombre, descripción, tupla de formatos), ordenada."""
         mime_groups = {}
         for fmt in self.formats:
             if fmt["mime"]:
@@ -219,27 +858,17 @@ class FormatInfoCollector:
         for mime_type, formats in mime_groups.items():
             mime_info = self._get_mime_type_info(mime_type)
             parsed_mime_groups.append(
-                {
-                    "mime_type": mime_type,
-                    "human_mime_type": mime_info["human"],
-                    "description": mime_info["description"],
-                    "human_mime_type": mime_type.replace("_", " ").title(),
-                    "formatos": [
-                        {
-                            "puid": fmt["puid"],
-                            "name": fmt["name"],
-                            "mime": fmt["mime"],
-                            "extensions": fmt["extensions"],
-                        }
-                        for fmt in formats
-                    ],
-                }
+                (
+                    mime_type,
+                    mime_type.replace("_", " ").title(),
+                    mime_info["description"],
+                    tuple(formats),
+                )
             )
-        sorted_mime_groups = sorted(
-            parsed_mime_groups, key=lambda x: x["human_mime_type"]
-        )
-        return sorted_mime_groups
+        sorted_mime_groups = sorted(parsed_mime_groups, key=lambda x: x[1])
+        return tuple(sorted_mime_groups)
 
     # ---- Obtener formato por PUID
     def get_format_by_puid(self, puid: str):
-        return next((f for f in self.formats if f["puid"] == puid), None)
+        fmt = self.formats.by_puid.get(puid)
+        return fmt.as_dict() if fmt is not None else None
@@ -0,0 +1,117 @@
+from collections.abc import Mapping
+
+# ====================== Registro de formatos (FileFormatCollection) ======================
+
+
+class _FileFormat(Mapping):
+    """
+    Un FileFormat de PRONOM en un registro compacto (__slots__). Se comporta
+    como un dict de solo lectura: fmt["puid"], fmt.get("mime"). Es de uso
+    interno: los métodos públicos devuelven `as_dict()`, un dict normal.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "puid",
+        "mime",
+        "extensions",
+        "internal_ids",
+        "priority_over",
+    )
+
+    def __init__(
+        self, id, name, puid, mime, extensions, internal_ids, priority_over=()
+    ):
+        self.id = id
+        self.name = name
+        self.puid = puid
+        self.mime = mime
+        self.extensions = tuple(extensions)
+        self.internal_ids = tuple(internal_ids)
+        self.priority_over = tuple(priority_over)  # IDs de FileFormat
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def as_dict(self) -> dict:
+        """Copia como dict (serializable a JSON), con listas como en el XML."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "puid": self.puid,
+            "mime": self.mime,
+            "extensions": list(self.extensions),
+            "internal_ids": list(self.internal_ids),
+        }
+
+    def __repr__(self):
+        return f"_FileFormat(puid={self.puid!r}, name={self.name!r})"
+
+
+class _FormatRegistry:
+    """
+    Lista de formatos en orden del XML con índices O(1) por PUID, ID interno,
+    ID de firma, extensión y MIME type. Los que no usa la identificación (ID,
+    extensión, MIME) se arman la primera vez que se consultan.
+    """
+
+    def __init__(self):
+        self._formats = []
+        self.by_puid = {}  # PUID -> formato (el primero del XML)
+        self.by_signature = {}  # InternalSignature ID -> [formatos]
+        self._lookups = None  # (by_id, by_extension, by_mime), al primer uso
+
+    def add(self, fmt: _FileFormat):
+        self._formats.append(fmt)
+        if fmt.puid:
+            self.by_puid.setdefault(fmt.puid, fmt)
+        for sig_id in fmt.internal_ids:
+            self.by_signature.setdefault(sig_id, []).append(fmt)
+        self._lookups = None
+
+    def _build_lookups(self) -> tuple[dict, dict, dict]:
+        if self._lookups is None:
+            by_id = {}  # FileFormat ID -> formato
+            by_extension = {}  # extensión (minúsculas) -> [formatos]
+            by_mime = {}  # MIME type (minúsculas) -> [formatos]
+            for fmt in self._formats:
+                if fmt.id:
+                    by_id.setdefault(fmt.id, fmt)
+                for ext in fmt.extensions:
+                    if ext:
+                        by_extension.setdefault(ext.lower(), []).append(fmt)
+                if fmt.mime:
+                    for mime in fmt.mime.split(","):
+                        by_mime.setdefault(mime.strip().lower(), []).append(fmt)
+            self._lookups = (by_id, by_extension, by_mime)
+        return self._lookups
+
+    @property
+    def by_id(self) -> dict:
+        return self._build_lookups()[0]
+
+    @property
+    def by_extension(self) -> dict:
+        return self._build_lookups()[1]
+
+    @property
+    def by_mime(self) -> dict:
+        return self._build_lookups()[2]
+
+    def __iter__(self):
+        return iter(self._formats)
+
+    def __len__(self):
+        return len(self._formats)
+
+    def __getitem__(self, index):
+        return self._formats[index]
@@ -0,0 +1,121 @@
+import os, threading
+from .adaptive import _FixedConflicts, _first_match_preferring
+
+# ====================== Pista por extensión del archivo ======================
+
+
+class ExtensionHints:
+    """
+    Prueba primero las firmas de los formatos que declaran la extensión del
+    archivo, sin confiar en ella: la primera que coincide (verificada contra
+    el contenido) es el resultado. Si ninguna coincide, se sigue con la
+    búsqueda completa.
+
+    Con `strict=True`, si una firma de la extensión coincide se siguen
+    comprobando las candidatas anteriores en el orden del XML (salvo las que
+    exigen en alguna posición fija un byte distinto), así que el resultado es
+    el mismo que sin pista.
+    """
+
+    def __init__(self, signatures, formats, strict: bool = False):
+        self._formats = formats
+        self.strict = strict
+        self._positions = {}  # sig_id -> [posiciones con ese ID]
+        for pos, sig in enumerate(signatures):
+            self._positions.setdefault(sig.sig_id, []).append(pos)
+        self._by_ext = {}  # extensión -> frozenset de posiciones de sus firmas
+        # (pista, anterior) -> no pueden coincidir ambas
+        self._excludes = _FixedConflicts(signatures)
+        self._lock = threading.Lock()
+        self.files = 0  # identificaciones con extensión (first_match)
+        self.hinted = 0  # ... con alguna candidata de la extensión
+        self.hint_hits = 0  # ... ganadas por una firma de la extensión
+
+    @staticmethod
+    def extension(path: str) -> str:
+        """Extensión en minúsculas y sin punto ("" si no tiene)."""
+        return os.path.splitext(path)[1][1:].lower()
+
+    def _hinted(self, ext: str) -> frozenset:
+        positions = self._by_ext.get(ext)
+        if positions is None:
+            positions = frozenset(
+                pos
+                for fmt in self._formats.by_extension.get(ext, ())
+                for sig_id in fmt.internal_ids
+                for pos in self._positions.get(sig_id, ())
+            )
+            self._by_ext[ext] = positions
+        return positions
+
+    # ---- Matching
+    def first_match(self, candidates: list[int], test, ext: str, fallback):
+        """
+        Posición de la primera firma de `ext` entre las candidatas para la que
+        `test(pos)` es True; si no hay, la que dé `fallback(resto, test)` con
+        las demás candidatas. En modo estricto, la primera candidata en el
+        orden original que coincide.
+        """
+        hinted = self._hinted(ext)
+        preferred = [pos for pos in candidates if pos in hinted]
+        if not preferred:
+            winner = fallback(candidates, test)
+        elif self.strict:
+            if preferred[0] == candidates[0]:
+                # La primera candidata ya es de la extensión: basta el orden normal
+                winner = next((pos for pos in candidates if test(pos)), None)
+            else:
+                winner = _first_match_preferring(
+                    candidates, preferred, test, self._excludes
+                )
+        else:
+            winner = next((pos for pos in preferred if test(pos)), None)
+            if winner is None:
+                rest = [pos for pos in candidates if pos not in hinted]
+                winner = fallback(rest, test)
+        with self._lock:
+            self.files += 1
+            if preferred:
+                self.hinted += 1
+                self.hint_hits += winner in hinted
+        return winner
+
+    def first_hinted(self, candidates: list[int], test, ext: str) -> int | None:
+        """Primera firma de `ext` entre las candidatas que pasa `test`."""
+        hinted = self._hinted(ext)
+        return next((pos for pos in candidates if pos in hinted and test(pos)), None)
+
+    # ---- Resultado
+    def annotate(self, result, ext: str):
+        """
+        Copia de `result` con "extension_match": True si el formato principal
+        declara la extensión, False si no, None si no hay extensión o formato.
+        """
+        if result is None:
+            return None
+        main = result["main_format"]
+        if not ext or main is None:
+            agreed = None
+        else:
+            agreed = any(
+                f.id == main["id"] for f in self._formats.by_extension.get(ext, ())
+            )
+        return {**result, "extension_match": agreed}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": self.files,
+                "hinted": self.hinted,
+                "hint_hits": self.hint_hits,
+            }
+
+    # ---- Copia a procesos worker
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
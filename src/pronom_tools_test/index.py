@@ -0,0 +1,125 @@
+import re
+from heapq import merge
+
+# ====================== Índice de candidatos (firmas binarias) ======================
+
+
+class _SignatureIndex:
+    """
+    Índice sobre las firmas compiladas: para un head/tail dado devuelve solo las
+    firmas cuyo ancla (bytes fijos en un offset exacto de BOF/EOF) coincide, las
+    que tienen un literal cerca de BOF/EOF presente en head/tail, y el resto de
+    las firmas sin ancla. Las posiciones se devuelven en el orden original para
+    conservar la regla "la primera firma que coincide gana".
+    """
+
+    KEY_LEN = 4  # bytes usados como clave de despacho
+    SCAN_SPAN = 4096  # ventana máxima del prefiltro de literales
+
+    def __init__(self, signatures):
+        self._bof = {}  # (offset, largo) -> {bytes: [posiciones]}
+        self._eof = {}  # (offset, largo) -> {bytes: [posiciones]}
+        self._unanchored = []  # posiciones de firmas sin ancla utilizable
+        # Segundo nivel para las firmas sin ancla: un literal BOF/EOF en un
+        # offset variable; su clave se busca en los primeros/últimos `span`
+        # bytes con un único regex de alternativas
+        self._near = {"BOF": {}, "EOF": {}}  # ubicación -> {clave: [posiciones]}
+        self._spans = {"BOF": 0, "EOF": 0}
+        for pos, sig in enumerate(signatures):
+            anchor = self._pick_anchor(sig.anchors())
+            if anchor is None:
+                near = self._pick_literal(sig.literals())
+                if near is None:
+                    self._unanchored.append(pos)
+                    continue
+                loc, span, key = near
+                self._near[loc].setdefault(key, []).append(pos)
+                self._spans[loc] = max(self._spans[loc], span)
+                continue
+            loc, offset, pattern = anchor
+            if loc == "BOF":
+                key = pattern[: self.KEY_LEN]
+                table = self._bof.setdefault((offset, len(key)), {})
+            else:
+                key = pattern[-self.KEY_LEN :]
+                table = self._eof.setdefault((offset, len(key)), {})
+            table.setdefault(key, []).append(pos)
+        self._scanners = _scanners(self._near, self._spans)
+
+    def _pick_anchor(self, anchors):
+        # Preferir BOF (casi siempre disponible en el head) y la clave más larga
+        best = None
+        for anchor in anchors:
+            rank = (anchor[0] == "BOF", min(len(anchor[2]), self.KEY_LEN))
+            if best is None or rank > best[0]:
+                best = (rank, anchor)
+        return best[1] if best else None
+
+    def _pick_literal(self, literals):
+        # El literal BOF/EOF más largo cuya ventana entra en SCAN_SPAN
+        best = None
+        for loc, max_off, literal in literals:
+            span = max_off + len(literal)
+            if loc == "ANY" or len(literal) < self.KEY_LEN or span > self.SCAN_SPAN:
+                continue
+            if best is None or len(literal) > len(best[2]):
+                best = (loc, span, literal)
+        if best is None:
+            return None
+        loc, span, literal = best
+        key = literal[: self.KEY_LEN] if loc == "BOF" else literal[-self.KEY_LEN :]
+        return loc, span, key
+
+    def candidates(self, data_start: bytes, data_end: bytes) -> list[int]:
+        """Posiciones (ordenadas) de las firmas que pueden coincidir."""
+        buckets = [self._unanchored]
+        _scan_literals(self._scanners, data_start, data_end, self._near, buckets)
+        for (offset, size), table in self._bof.items():
+            hits = table.get(bytes(data_start[offset : offset + size]))
+            if hits:
+                buckets.append(hits)
+        end_len = len(data_end)
+        for (offset, size), table in self._eof.items():
+            start = end_len - offset - size
+            if start < 0:
+                continue
+            hits = table.get(bytes(data_end[start : start + size]))
+            if hits:
+                buckets.append(hits)
+        if len(buckets) == 1:
+            return buckets[0]
+        return list(merge(*buckets))
+
+
+# ---- Prefiltro de literales (compartido con shared._SharedIndex)
+def _scanners(near: dict, spans: dict) -> list:
+    """(ubicación, span, regex) por cada ubicación con claves."""
+    out = []
+    for loc, table in near.items():
+        if table:
+            alternatives = b"|".join(re.escape(key) for key in sorted(table))
+            out.append((loc, spans[loc], re.compile(alternatives)))
+    return out
+
+
+def _scan_literals(scanners, data_start, data_end, near, buckets) -> None:
+    """
+    Agrega a `buckets` las posiciones de cada clave presente en la ventana
+    de su ubicación. Todas las claves tienen el mismo largo y la búsqueda
+    sigue un byte después de cada inicio, así que no se pierden solapadas.
+    """
+    for loc, span, regex in scanners:
+        if loc == "BOF":
+            data, start, end = data_start, 0, min(span, len(data_start))
+        else:
+            data, end = data_end, len(data_end)
+            start = max(0, end - span)
+        table = near[loc]
+        seen = set()
+        m = regex.search(data, start, end)
+        while m is not None:
+            key = m.group()
+            if key not in seen:
+                seen.add(key)
+                buckets.append(table[key])
+            m = regex.search(data, m.start() + 1, end)
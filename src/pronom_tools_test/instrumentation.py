@@ -0,0 +1,154 @@
+import threading, time
+
+# ====================== Instrumentación (tiempos por etapa y por firma) ======================
+
+_clock = time.perf_counter
+
+
+class Instrumentation:
+    """
+    Métricas opcionales de identificación: tiempo por etapa ("read",
+    "binary_match", "container_open", "member_read", "container_match"),
+    firmas probadas por archivo y coste acumulado de cada firma binaria y de
+    contenedor. Los callbacks reciben `(stage, seconds, info)` por cada etapa
+    medida, para reenviarlos a un sistema de métricas.
+
+    Con identify_many y varios procesos, cada worker mide sobre su propia
+    copia: esas métricas no vuelven al proceso principal.
+    """
+
+    STAGES = (
+        "read",
+        "binary_match",
+        "container_open",
+        "member_read",
+        "container_match",
+    )
+
+    def __init__(self, callbacks=()):
+        self._lock = threading.Lock()
+        self._callbacks = list(callbacks)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}  # etapa -> [veces, segundos, máximo]
+            self._signatures = {}  # sig_id -> [probadas, coincidencias, segundos]
+            self._containers = {}  # (tipo, id) -> [probadas, coincidencias, segundos]
+            self.files = 0
+            self.signatures_tested = 0
+            self.max_signatures_tested = 0
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    # ---- Registro (llamado desde el colector y _ContainerDB)
+    def stage(self, name: str, seconds: float, info: dict | None = None):
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                self._stages[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+        for callback in self._callbacks:
+            callback(name, seconds, info or {})
+
+    def binary_match(self, seconds: float, tested: list, sig_id):
+        """Cierra el matching binario de un archivo; `tested` es [(sig_id, s, ok)]."""
+        with self._lock:
+            self.files += 1
+            self.signatures_tested += len(tested)
+            if len(tested) > self.max_signatures_tested:
+                self.max_signatures_tested = len(tested)
+            sigs = self._signatures
+            for tested_id, elapsed, ok in tested:
+                entry = sigs.get(tested_id)
+                if entry is None:
+                    sigs[tested_id] = [1, int(ok), elapsed]
+                else:
+                    entry[0] += 1
+                    entry[1] += ok
+                    entry[2] += elapsed
+        self.stage(
+            "binary_match",
+            seconds,
+            {"signatures_tested": len(tested), "signature_id": sig_id},
+        )
+
+    def container_signature(self, ctype: str, sig_id, seconds: float, ok: bool):
+        with self._lock:
+            entry = self._containers.get((ctype, sig_id))
+            if entry is None:
+                self._containers[(ctype, sig_id)] = [1, int(ok), seconds]
+            else:
+                entry[0] += 1
+                entry[1] += ok
+                entry[2] += seconds
+
+    def timed(self, name: str, fn):
+        """Envuelve `fn` para registrar su duración como etapa `name`."""
+
+        def wrapper(*args):
+            t0 = _clock()
+            try:
+                return fn(*args)
+            finally:
+                self.stage(name, _clock() - t0)
+
+        return wrapper
+
+    # ---- Consulta
+    def stats(self, top: int = 10) -> dict:
+        """Resumen por etapa y las `top` firmas binarias y de contenedor más caras."""
+        with self._lock:
+            stages = {
+                name: {
+                    "count": count,
+                    "total_s": total,
+                    "mean_s": total / count,
+                    "max_s": peak,
+                }
+                for name, (count, total, peak) in self._stages.items()
+            }
+            signatures = sorted(
+                self._signatures.items(), key=lambda kv: kv[1][2], reverse=True
+            )[:top]
+            containers = sorted(
+                self._containers.items(), key=lambda kv: kv[1][2], reverse=True
+            )[:top]
+            return {
+                "files": self.files,
+                "signatures_tested": self.signatures_tested,
+                "signatures_per_file": (
+                    self.signatures_tested / self.files if self.files else 0.0
+                ),
+                "max_signatures_per_file": self.max_signatures_tested,
+                "stages": stages,
+                "top_signatures": [
+                    {"signature_id": sid, "tested": n, "matched": hits, "total_s": s}
+                    for sid, (n, hits, s) in signatures
+                ],
+                "top_container_signatures": [
+                    {
+                        "container_type": ctype,
+                        "signature_id": sid,
+                        "tested": n,
+                        "matched": hits,
+                        "total_s": s,
+                    }
+                    for (ctype, sid), (n, hits, s) in containers
+                ],
+            }
+
+    # ---- Copia a procesos worker: sin lock ni callbacks, contadores a cero
+    def __getstate__(self):
+        return {"callbacks": ()}
+
+    def __setstate__(self, state):
+        self.__init__(state["callbacks"])
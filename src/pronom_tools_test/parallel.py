@@ -0,0 +1,108 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+# ====================== Identificación por lotes (multiproceso) ======================
+
+# Colector de cada proceso worker (se inicializa una sola vez por proceso)
+_worker_collector = None
+
+
+def _init_worker(collector):
+    global _worker_collector
+    _worker_collector = collector
+
+
+def _identify_one(collector, path: str) -> dict:
+    """Identifica un archivo capturando el error en lugar de propagarlo."""
+    try:
+        return {"path": path, "result": collector.identify_file(path), "error": None}
+    except Exception as exc:
+        return {"path": path, "result": None, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _identify_chunk(paths: list[str]) -> list[dict]:
+    results = [_identify_one(_worker_collector, p) for p in paths]
+    # El worker puede terminar sin aviso: lo cacheado se escribe por bloque
+    cache = _worker_collector._result_cache
+    if cache is not None:
+        cache.flush()
+    return results
+
+
+def _chunks(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _walk_files(root: str):
+    """Recorre `root` con os.scandir (orden estable, sin seguir symlinks de carpetas)."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+def _iter_identify(collector, paths, workers=None, chunksize=64, ordered=True):
+    """
+    Reparte las rutas en bloques de `chunksize` entre `workers` procesos y va
+    devolviendo los resultados a medida que llegan. Con `ordered=True` se
+    respeta el orden de entrada. Solo se mantiene en vuelo un número acotado
+    de bloques, de modo que `paths` puede ser un iterable enorme.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for path in paths:
+            yield _identify_one(collector, path)
+        return
+
+    max_pending = workers * 4
+    chunks = _chunks(paths, chunksize)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(collector,)
+    ) as pool:
+        pending = deque() if ordered else set()
+        try:
+            for chunk in chunks:
+                future = pool.submit(_identify_chunk, chunk)
+                if ordered:
+                    pending.append(future)
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()
+                else:
+                    pending.add(future)
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for f in done:
+                            yield from f.result()
+            if ordered:
+                while pending:
+                    yield from pending.popleft().result()
+            else:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        yield from f.result()
+        finally:
+            # El consumidor puede abandonar el generador antes de terminar
+            for f in pending:
+                f.cancel()
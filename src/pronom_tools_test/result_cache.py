@@ -0,0 +1,202 @@
+import hashlib, json, sqlite3, threading
+from collections import OrderedDict
+
+# ====================== Caché de resultados de identificación ======================
+
+# Marca de "no está en caché" (None es un resultado válido: archivo no identificado)
+_MISS = object()
+
+
+def _pack_result(result) -> str:
+    """Resultado -> JSON compacto con los IDs de FileFormat."""
+    if result is None:
+        return "null"
+    return json.dumps(
+        [
+            result["signature_id"],
+            result["main_format"]["id"] if result["main_format"] else None,
+            [f["id"] for f in result["base_formats"]],
+            [f["id"] for f in result["container_formats"]],
+        ]
+    )
+
+
+def _unpack_result(packed: str, registry):
+    """JSON compacto -> resultado, con los formatos del registro actual."""
+    data = json.loads(packed)
+    if data is None:
+        return None
+    sig_id, main_id, base_ids, container_ids = data
+    base = [registry.by_id[i].as_dict() for i in base_ids]
+    refined = [registry.by_id[i].as_dict() for i in container_ids]
+    # El formato principal es el primero refinado o, si no hay, el primero base
+    main = (refined or base or [None])[0] if main_id else None
+    return {
+        "signature_id": sig_id,
+        "main_format": main,
+        "base_formats": base,
+        "container_formats": refined,
+    }
+
+
+class ResultCache:
+    """
+    Caché de resultados de `identify_file`: LRU en memoria acotado a `maxsize`
+    entradas y, opcionalmente, un almacén SQLite persistente en `path`.
+
+    `key="stat"` identifica el archivo por (device, inode, tamaño, mtime);
+    `key="content"` por el hash de las ventanas leídas. Las entradas quedan
+    invalidadas cuando cambia `db_version` (hash de las firmas).
+
+    Las altas se escriben en SQLite por lotes de `FLUSH_EVERY`, en una sola
+    transacción, y el resto al llamar a `flush` o `close`.
+    """
+
+    # Altas pendientes que disparan una escritura en SQLite
+    FLUSH_EVERY = 256
+
+    def __init__(
+        self,
+        db_version: str,
+        maxsize: int = 100_000,
+        path: str | None = None,
+        key: str = "stat",
+    ):
+        if key not in ("stat", "content"):
+            raise ValueError(f"Tipo de clave desconocido: {key!r}")
+        self.db_version = db_version
+        self.maxsize = maxsize
+        self.path = path
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._pending = {}  # altas aún no escritas en SQLite
+        self._lock = threading.Lock()
+        self._db = None
+
+    # ---- Claves
+    def stat_key(self, st) -> str:
+        return f"s:{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+    def content_key(self, size: int, data_start, data_end) -> str:
+        h = hashlib.sha256(b"%d:" % size)
+        h.update(data_start)
+        if data_end is not data_start:
+            h.update(data_end)
+        return "c:" + h.hexdigest()
+
+    # ---- Almacén persistente
+    def _connection(self):
+        # Se abre de forma perezosa (también tras copiarse a un proceso worker)
+        if self._db is None and self.path:
+            db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # WAL: los lectores no esperan a los procesos que escriben
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results"
+                " (key TEXT PRIMARY KEY, db_version TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+            db.execute("DELETE FROM results WHERE db_version != ?", (self.db_version,))
+            db.commit()
+            self._db = db
+        return self._db
+
+    # ---- Consulta / alta
+    def get(self, key: str, registry):
+        """Resultado en caché para `key`, o _MISS."""
+        with self._lock:
+            packed = self._lru.get(key)
+            if packed is not None:
+                self._lru.move_to_end(key)
+            elif key in self._pending:
+                packed = self._pending[key]
+                self._remember(key, packed)
+            else:
+                db = self._connection()
+                if db is not None:
+                    row = db.execute(
+                        "SELECT value FROM results WHERE key = ? AND db_version = ?",
+                        (key, self.db_version),
+                    ).fetchone()
+                    if row is not None:
+                        packed = row[0]
+                        self._remember(key, packed)
+            if packed is None:
+                self.misses += 1
+                return _MISS
+            self.hits += 1
+        return _unpack_result(packed, registry)
+
+    def put(self, key: str, result):
+        packed = _pack_result(result)
+        with self._lock:
+            self._remember(key, packed)
+            if self.path:
+                self._pending[key] = packed
+                if len(self._pending) >= self.FLUSH_EVERY:
+                    self._flush()
+
+    def flush(self):
+        """Escribe en SQLite las altas pendientes."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        db = self._connection()
+        with db:  # una transacción por lote
+            db.executemany(
+                "INSERT OR REPLACE INTO results (key, db_version, value)"
+                " VALUES (?, ?, ?)",
+                [(k, self.db_version, v) for k, v in self._pending.items()],
+            )
+        self._pending.clear()
+
+    def close(self):
+        """Escribe lo pendiente y cierra la conexión (se reabre al volver a usarla)."""
+        with self._lock:
+            self._flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, packed: str):
+        self._lru[key] = packed
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._pending.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM results")
+                db.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "persistent": bool(self.path),
+        }
+
+    # ---- Copia a procesos worker: sin conexión ni lock
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_db"] = None
+        state["_lock"] = None
+        state["_pending"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,664 @@
+import array, json, mmap, os, pickle, struct, tempfile, zlib
+from heapq import merge
+from .containers import _ContainerDB
+from .index import _scan_literals, _scanners
+from .single_signature import _PRONOMSignature
+from .utils import _SubSequence, _find_literal
+
+# ====================== Base de firmas compartida (archivo mapeado) ======================
+#
+# Un único archivo de solo lectura con tablas planas (arrays u32 y blobs de
+# bytes) que cada worker mapea con mmap: las páginas las comparte el sistema
+# operativo y, al no haber objetos Python por firma, los contadores de
+# referencias no provocan copias (copy-on-write) tras un fork.
+#
+# Cabecera: _MAGIC + (versión de formato, 0, offset y largo del directorio).
+# El directorio (JSON, al final) da el offset/largo de cada sección.
+
+_MAGIC = b"PRONOMDB"
+_LAYOUT = 5
+_HEADER = struct.Struct("<IIQQ")
+_LOCATIONS = ("BOF", "EOF", "ANY")
+# Una SubSequence: ubicación, offset y largo del literal en "blob", min, max
+_SUB = struct.Struct("<BxxxIIxxxxqq")
+# SubSequence de contenedor: ubicación, regex, offset y largo en "c_blob" del
+# literal o del cuerpo del regex, min, max, largo máximo (-1 = sin límite)
+_CSUB = struct.Struct("<BBxxIIqqq")
+_BROKEN = 1  # la firma no compila: nunca coincide
+_REGEX = 2  # alguna SubSequence necesita regex (se compila en cada worker)
+
+
+def _u32(values) -> bytes:
+    return array.array("I", values).tobytes()
+
+
+def _offsets_table(items) -> tuple[bytes, bytes]:
+    """Blob con los items concatenados + tabla u32 de n+1 offsets."""
+    blob = bytearray()
+    offsets = [0]
+    for item in items:
+        blob += item
+        offsets.append(len(blob))
+    return _u32(offsets), bytes(blob)
+
+
+def _text(offsets, blob, i: int) -> str:
+    """Elemento `i` de una tabla de textos escrita con _offsets_table."""
+    return bytes(blob[offsets[i] : offsets[i + 1]]).decode()
+
+
+def _signature_sections(signatures) -> dict:
+    subs = bytearray()
+    blob = bytearray()
+    sub_ranges = [0]
+    flags = bytearray()
+    for sig in signatures:
+        flag = 0
+        compiled = sig._compiled
+        if compiled is None:
+            flag = _BROKEN
+            compiled = ()
+        for sub in compiled:
+            literal = sub.pattern.literal
+            lit_off = len(blob)
+            if literal is None:
+                flag |= _REGEX
+            else:
+                blob += literal
+            subs += _SUB.pack(
+                _LOCATIONS.index(sub.location),
+                lit_off,
+                len(blob) - lit_off,
+                sub.min_off,
+                sub.max_off,
+            )
+        sub_ranges.append(len(subs) // _SUB.size)
+        flags.append(flag)
+
+    sig_id_offsets, sig_ids = _offsets_table(s.sig_id.encode() for s in signatures)
+    def_offsets, defs = _offsets_table(
+        json.dumps(s.sequences, separators=(",", ":")).encode() for s in signatures
+    )
+    return {
+        "sig_id_offsets": sig_id_offsets,
+        "sig_ids": sig_ids,
+        "def_offsets": def_offsets,
+        "defs": defs,
+        "sub_ranges": _u32(sub_ranges),
+        "subs": bytes(subs),
+        "flags": bytes(flags),
+        "blob": bytes(blob),
+    }
+
+
+def _index_sections(index) -> tuple[dict, list]:
+    """
+    Cada grupo (ubicación, offset, largo de clave) del _SignatureIndex pasa a
+    una tabla hash de direccionamiento abierto (crc32) sobre claves de ancho
+    fijo, con las posiciones de firmas de cada clave en un array u32 común.
+    """
+    keys_blob = bytearray()
+    slots = []
+    ranges = []
+    positions = []
+    groups = []
+    for loc, tables in (("BOF", index._bof), ("EOF", index._eof)):
+        for (offset, keylen), table in tables.items():
+            keys = sorted(table)
+            nslots = 1 << (2 * len(keys) - 1).bit_length()
+            mask = nslots - 1
+            group_slots = [0] * nslots
+            groups.append(
+                [loc, offset, keylen, len(keys_blob), len(ranges), len(slots), nslots]
+            )
+            for i, key in enumerate(keys):
+                keys_blob += key
+                ranges.append(len(positions))
+                positions.extend(table[key])
+                slot = zlib.crc32(key) & mask
+                while group_slots[slot]:
+                    slot = (slot + 1) & mask
+                group_slots[slot] = i + 1  # 0 = vacío
+            slots.extend(group_slots)
+    ranges.append(len(positions))
+    # Prefiltro de literales: claves de KEY_LEN bytes con sus posiciones
+    near_keys = bytearray()
+    near_ranges = [0]
+    near_positions = []
+    near = []
+    for loc, table in index._near.items():
+        near.append([loc, index._spans[loc], len(near_ranges) - 1, len(table)])
+        for key in sorted(table):
+            near_keys += key
+            near_positions.extend(table[key])
+            near_ranges.append(len(near_positions))
+    sections = {
+        "index_keys": bytes(keys_blob),
+        "index_slots": _u32(slots),
+        "index_ranges": _u32(ranges),
+        "index_positions": _u32(positions),
+        "index_unanchored": _u32(index._unanchored),
+        "near_keys": bytes(near_keys),
+        "near_ranges": _u32(near_ranges),
+        "near_positions": _u32(near_positions),
+    }
+    return sections, {"groups": groups, "near": near, "key_len": index.KEY_LEN}
+
+
+def _container_sections(db: _ContainerDB) -> tuple[dict, dict]:
+    """
+    Firmas de contenedores ya compiladas, en tablas planas: cada nivel (firma,
+    File, InternalSignature, ByteSequence) es una tabla u32 de rangos sobre el
+    siguiente y cada SubSequence un registro _CSUB, con su literal o el cuerpo
+    de su regex en un blob. El índice de paths usa claves "tipo\\0path".
+    """
+    db.load()
+    types = sorted({cs["type"] for cs in db._csigs})
+    ctypes = bytearray()
+    file_ranges, ins_ranges, bseq_ranges, sub_ranges = [0], [0], [0], [0]
+    paths, windows, ins_flags = [], [], bytearray()
+    subs, blob = bytearray(), bytearray()
+    for cs in db._csigs:
+        ctypes.append(types.index(cs["type"]))
+        for f in cs["files"]:
+            paths.append(f["path"].encode())
+            windows.append(-1 if f["window"] is None else f["window"])
+            for ins in f["bin_sigs"]:
+                bseqs = ins["byte_sequences"]
+                ins_flags.append(_BROKEN if bseqs is None else 0)
+                for bs in bseqs or ():
+                    for sub in bs["subseqs"]:
+                        compiled = sub["sub"]
+                        pattern = compiled.pattern
+                        data = pattern.literal
+                        if data is None:
+                            data = pattern.body
+                        subs += _CSUB.pack(
+                            _LOCATIONS.index(compiled.location),
+                            pattern.literal is None,
+                            len(blob),
+                            len(data),
+                            compiled.min_off,
+                            compiled.max_off,
+                            -1 if pattern.max_len is None else pattern.max_len,
+                        )
+                        blob += data
+                    sub_ranges.append(len(subs) // _CSUB.size)
+                bseq_ranges.append(len(sub_ranges) - 1)
+            ins_ranges.append(len(ins_flags))
+        file_ranges.append(len(paths))
+
+    keys, path_ranges, path_positions = [], [0], []
+    for ctype, by_path in sorted(db._path_index.items()):
+        for path, positions in sorted(by_path.items()):
+            keys.append(f"{ctype}\0{path}".encode())
+            path_positions.extend(positions)
+            path_ranges.append(len(path_positions))
+    id_offsets, ids = _offsets_table(cs["id"].encode() for cs in db._csigs)
+    path_offsets, path_blob = _offsets_table(paths)
+    key_offsets, key_blob = _offsets_table(keys)
+    sections = {
+        "c_id_offsets": id_offsets,
+        "c_ids": ids,
+        "c_types": bytes(ctypes),
+        "c_file_ranges": _u32(file_ranges),
+        "c_path_offsets": path_offsets,
+        "c_paths": path_blob,
+        "c_windows": array.array("q", windows).tobytes(),
+        "c_ins_ranges": _u32(ins_ranges),
+        "c_ins_flags": bytes(ins_flags),
+        "c_bseq_ranges": _u32(bseq_ranges),
+        "c_sub_ranges": _u32(sub_ranges),
+        "c_subs": bytes(subs),
+        "c_blob": bytes(blob),
+        "c_n_paths": _u32(db._n_paths),
+        "c_key_offsets": key_offsets,
+        "c_keys": key_blob,
+        "c_key_ranges": _u32(path_ranges),
+        "c_key_positions": _u32(path_positions),
+    }
+    meta = {
+        "types": types,
+        "triggers": db._puid_to_type,
+        "id_to_puid": db._id_to_puid,
+        "pathless": db._pathless,
+    }
+    return sections, meta
+
+
+def _write_shared_db(path: str, collector) -> None:
+    """Escribe la base compartida de `collector` de forma atómica."""
+    sections = _signature_sections(collector.signatures)
+    index_sections, index_meta = _index_sections(collector._index)
+    sections.update(index_sections)
+    sections["formats"] = pickle.dumps(
+        (collector.formats, collector.sig_to_formats), pickle.HIGHEST_PROTOCOL
+    )
+    containers = None
+    if collector.container_db is not None:
+        container_sections, containers = _container_sections(collector.container_db)
+        sections.update(container_sections)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + bytes(_HEADER.size))
+            table = {}
+            for name, data in sections.items():
+                f.write(bytes(-f.tell() % 8))  # arrays alineados
+                table[name] = [f.tell(), len(data)]
+                f.write(data)
+            meta = json.dumps(
+                {
+                    "db_version": collector.db_version,
+                    "windows": [collector._bof_window, collector._eof_window],
+                    "signatures": len(collector.signatures),
+                    "containers": containers,
+                    **index_meta,
+                    "sections": table,
+                }
+            ).encode()
+            meta_off = f.tell()
+            f.write(meta)
+            f.seek(len(_MAGIC))
+            f.write(_HEADER.pack(_LAYOUT, 0, meta_off, len(meta)))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class _SharedDB:
+    """
+    Vista de solo lectura sobre el archivo. Las firmas con solo bytes fijos
+    se comparan (y describen) directamente con el blob mapeado; las que
+    necesitan regex se compilan en cada proceso la primera vez que se usan.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if mm[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} no es una base de firmas compartida")
+        layout, _, meta_off, meta_len = _HEADER.unpack_from(mm, len(_MAGIC))
+        if layout != _LAYOUT:
+            raise ValueError(f"Formato de base compartida no soportado: {layout}")
+        meta = json.loads(mm[meta_off : meta_off + meta_len])
+        self.db_version = meta["db_version"]
+        self.windows = tuple(meta["windows"])
+        self.size = meta["signatures"]
+        self.containers = meta["containers"]
+        self.groups = [tuple(g) for g in meta["groups"]]
+        self.near = [tuple(n) for n in meta["near"]]
+        self.key_len = meta["key_len"]
+
+        view = memoryview(mm)
+        sections = {
+            name: view[off : off + length]
+            for name, (off, length) in meta["sections"].items()
+        }
+        self._sections = sections
+        self._sig_id_offsets = sections["sig_id_offsets"].cast("I")
+        self._sig_ids = sections["sig_ids"]
+        self._def_offsets = sections["def_offsets"].cast("I")
+        self._defs = sections["defs"]
+        self._sub_ranges = sections["sub_ranges"].cast("I")
+        self._subs = sections["subs"]
+        self._flags = sections["flags"]
+        self._blob = sections["blob"]
+        self.index_keys = sections["index_keys"]
+        self.index_slots = sections["index_slots"].cast("I")
+        self.index_ranges = sections["index_ranges"].cast("I")
+        self.index_positions = sections["index_positions"].cast("I")
+        self.index_unanchored = sections["index_unanchored"].cast("I")
+        self.near_keys = sections["near_keys"]
+        self.near_ranges = sections["near_ranges"].cast("I")
+        self.near_positions = sections["near_positions"].cast("I")
+        self._regex_sigs = {}  # posición -> _PRONOMSignature (por proceso)
+
+    def load_formats(self):
+        return pickle.loads(self._sections["formats"])
+
+    # ---- Firmas
+    def sig_id(self, pos: int) -> str:
+        return _text(self._sig_id_offsets, self._sig_ids, pos)
+
+    def compiled(self, pos: int) -> _PRONOMSignature:
+        sig = self._regex_sigs.get(pos)
+        if sig is None:
+            start, end = self._def_offsets[pos], self._def_offsets[pos + 1]
+            sequences = json.loads(bytes(self._defs[start:end]))
+            sig = self._regex_sigs[pos] = _PRONOMSignature(self.sig_id(pos), sequences)
+        return sig
+
+    def literal_subs(self, pos: int):
+        """(ubicación, literal, min, max) de cada SubSequence de bytes fijos."""
+        blob, subs = self._blob, self._subs
+        for i in range(self._sub_ranges[pos], self._sub_ranges[pos + 1]):
+            loc, lit_off, lit_len, min_off, max_off = _SUB.unpack_from(
+                subs, i * _SUB.size
+            )
+            yield _LOCATIONS[loc], blob[lit_off : lit_off + lit_len], min_off, max_off
+
+    def match(self, pos: int, data_start, data_end) -> bool:
+        flags = self._flags[pos]
+        if flags & _BROKEN:
+            return False
+        if flags & _REGEX:
+            return self.compiled(pos).match(data_start, data_end)
+        for location, literal, min_off, max_off in self.literal_subs(pos):
+            if not _find_literal(
+                literal, location, min_off, max_off, data_start, data_end
+            ):
+                return False
+        return True
+
+    # ---- Copia a procesos worker: se vuelve a mapear el archivo
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+class _SharedSignature:
+    """Firma de la base compartida con la interfaz de _PRONOMSignature."""
+
+    __slots__ = ("_db", "_pos")
+
+    def __init__(self, db: _SharedDB, pos: int):
+        self._db = db
+        self._pos = pos
+
+    @property
+    def sig_id(self) -> str:
+        return self._db.sig_id(self._pos)
+
+    def match(self, data_start, data_end) -> bool:
+        return self._db.match(self._pos, data_start, data_end)
+
+    # Las firmas de bytes fijos se describen con las tablas planas; solo las
+    # que necesitan regex se compilan (y quedan en _regex_sigs del proceso)
+    def _flat(self):
+        flags = self._db._flags[self._pos]
+        if flags & _BROKEN:
+            return ()
+        if flags & _REGEX:
+            return None
+        return self._db.literal_subs(self._pos)
+
+    def literals(self):
+        subs = self._flat()
+        if subs is None:
+            return self._db.compiled(self._pos).literals()
+        return [
+            (location, max_off, bytes(literal))
+            for location, literal, _, max_off in subs
+        ]
+
+    def anchors(self):
+        subs = self._flat()
+        if subs is None:
+            return self._db.compiled(self._pos).anchors()
+        out = []
+        for location, literal, min_off, max_off in subs:
+            if min_off == max_off and literal and location != "ANY":
+                out.append((location, min_off, bytes(literal)))
+        return out
+
+    def fixed_bytes(self) -> tuple[dict, dict]:
+        subs = self._flat()
+        if subs is None:
+            return self._db.compiled(self._pos).fixed_bytes()
+        bof, eof = {}, {}
+        for location, literal, min_off, max_off in subs:
+            if min_off != max_off:
+                continue
+            if location == "BOF":
+                bof.update(enumerate(literal, min_off))
+            elif location == "EOF":
+                eof.update(enumerate(reversed(literal), min_off))
+        return bof, eof
+
+    def fixed_bof(self, width: int) -> bool:
+        subs = self._flat()
+        if subs is None:
+            return self._db.compiled(self._pos).fixed_bof(width)
+        found = False
+        for location, literal, min_off, max_off in subs:
+            if (
+                location != "BOF"
+                or min_off != max_off
+                or not literal
+                or min_off + len(literal) > width
+            ):
+                return False
+            found = True
+        return found
+
+    def read_windows(self):
+        subs = self._flat()
+        if subs is None:
+            return self._db.compiled(self._pos).read_windows()
+        bof = eof = 0
+        for location, literal, min_off, max_off in subs:
+            if location == "ANY":
+                return None, None
+            if location == "BOF":
+                bof = max(bof, max_off + len(literal))
+            else:
+                eof = max(eof, max_off + len(literal))
+        return bof, eof
+
+
+class _SharedSignatures:
+    """Secuencia de firmas: los objetos se crean al acceder, no se guardan."""
+
+    def __init__(self, db: _SharedDB):
+        self.db = db
+
+    def __len__(self):
+        return self.db.size
+
+    def __getitem__(self, pos: int) -> _SharedSignature:
+        if not 0 <= pos < self.db.size:
+            raise IndexError(pos)
+        return _SharedSignature(self.db, pos)
+
+    def __iter__(self):
+        for pos in range(self.db.size):
+            yield _SharedSignature(self.db, pos)
+
+
+class _SharedIndex:
+    """_SignatureIndex sobre las tablas hash planas de la base compartida."""
+
+    def __init__(self, db: _SharedDB):
+        self.db = db
+        # Las claves del prefiltro son pocas: el dict y el regex se arman
+        # en cada proceso, las posiciones siguen en el archivo mapeado
+        self._near = {}
+        spans = {}
+        key_len, ranges = db.key_len, db.near_ranges
+        for loc, span, first, count in db.near:
+            table = self._near[loc] = {}
+            spans[loc] = span
+            for i in range(first, first + count):
+                key = bytes(db.near_keys[i * key_len : (i + 1) * key_len])
+                table[key] = db.near_positions[ranges[i] : ranges[i + 1]]
+        self._scanners = _scanners(self._near, spans)
+
+    def _lookup(self, key: bytes, group):
+        _, _, keylen, keys_start, first_key, slot_start, nslots = group
+        db = self.db
+        mask = nslots - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            i = db.index_slots[slot_start + slot]
+            if not i:
+                return None
+            i -= 1
+            start = keys_start + i * keylen
+            if db.index_keys[start : start + keylen] == key:
+                ranges = db.index_ranges
+                return db.index_positions[
+                    ranges[first_key + i] : ranges[first_key + i + 1]
+                ]
+            slot = (slot + 1) & mask
+
+    def candidates(self, data_start, data_end) -> list[int]:
+        """Posiciones (ordenadas) de las firmas que pueden coincidir."""
+        buckets = [self.db.index_unanchored]
+        _scan_literals(self._scanners, data_start, data_end, self._near, buckets)
+        end_len = len(data_end)
+        for group in self.db.groups:
+            loc, offset, keylen = group[:3]
+            if loc == "BOF":
+                key = bytes(data_start[offset : offset + keylen])
+            else:
+                start = end_len - offset - keylen
+                if start < 0:
+                    continue
+                key = bytes(data_end[start : start + keylen])
+            if len(key) != keylen:
+                continue
+            hits = self._lookup(key, group)
+            if hits:
+                buckets.append(hits)
+        if len(buckets) == 1:
+            return list(buckets[0])
+        return list(merge(*buckets))
+
+    # ---- Copia a procesos worker: las tablas se vuelven a leer del mapeo
+    def __getstate__(self):
+        return {"db": self.db}
+
+    def __setstate__(self, state):
+        self.__init__(state["db"])
+
+
+# ====================== Contenedores sobre tablas planas ======================
+
+
+class _FlatPattern:
+    """Lo que _SubSequence usa de un _BytePattern, leído de las tablas planas."""
+
+    __slots__ = ("body", "literal", "max_len")
+
+    def __init__(self, body, literal, max_len):
+        self.body = body
+        self.literal = literal
+        self.max_len = max_len
+
+
+class _SharedContainerSignatures:
+    """Firmas de contenedores: el dict de cada una se arma al accederla."""
+
+    def __init__(self, db: "_SharedContainerDB"):
+        self._db = db
+
+    def __len__(self):
+        return len(self._db._n_paths)
+
+    def __getitem__(self, pos: int) -> dict:
+        return self._db._signature(pos)
+
+
+class _SharedContainerDB(_ContainerDB):
+    """
+    _ContainerDB sobre las tablas de la base compartida: no hay XML que leer.
+    Las firmas se arman al consultarlas (solo las de los paths presentes) y
+    las SubSequence con regex se compilan una vez por proceso.
+    """
+
+    def __init__(self, db: _SharedDB):
+        self.db = db
+        meta = db.containers
+        sections = db._sections
+        self._types = meta["types"]
+        self._puid_to_type = meta["triggers"]
+        self._id_to_puid = meta["id_to_puid"]
+        self._pathless = meta["pathless"]
+        self._ids = (sections["c_id_offsets"].cast("I"), sections["c_ids"])
+        self._ctypes = sections["c_types"]
+        self._file_ranges = sections["c_file_ranges"].cast("I")
+        self._paths = (sections["c_path_offsets"].cast("I"), sections["c_paths"])
+        self._windows = sections["c_windows"].cast("q")
+        self._ins_ranges = sections["c_ins_ranges"].cast("I")
+        self._ins_flags = sections["c_ins_flags"]
+        self._bseq_ranges = sections["c_bseq_ranges"].cast("I")
+        self._sub_ranges = sections["c_sub_ranges"].cast("I")
+        self._subs = sections["c_subs"]
+        self._blob = sections["c_blob"]
+        self._n_paths = sections["c_n_paths"].cast("I")
+        # Las claves del índice son pocas: el dict se arma en cada proceso,
+        # las posiciones siguen en el archivo mapeado
+        key_offsets = sections["c_key_offsets"].cast("I")
+        ranges = sections["c_key_ranges"].cast("I")
+        positions = sections["c_key_positions"].cast("I")
+        self._path_index = {}
+        for i in range(len(key_offsets) - 1):
+            ctype, _, path = _text(key_offsets, sections["c_keys"], i).partition("\0")
+            by_path = self._path_index.setdefault(ctype, {})
+            by_path[path] = positions[ranges[i] : ranges[i + 1]]
+        self._regex_subs = {}  # nº de SubSequence -> _SubSequence (por proceso)
+        self._csigs = _SharedContainerSignatures(self)
+
+    def _signature(self, pos: int) -> dict:
+        # Solo las claves que usa el matching (no "reference", "min"...)
+        files = []
+        for fi in range(self._file_ranges[pos], self._file_ranges[pos + 1]):
+            bin_sigs = []
+            for ii in range(self._ins_ranges[fi], self._ins_ranges[fi + 1]):
+                if self._ins_flags[ii] & _BROKEN:
+                    bin_sigs.append({"byte_sequences": None})
+                    continue
+                bseqs = []
+                for bi in range(self._bseq_ranges[ii], self._bseq_ranges[ii + 1]):
+                    first, last = self._sub_ranges[bi], self._sub_ranges[bi + 1]
+                    bseqs.append(
+                        {"subseqs": [{"sub": self._sub(i)} for i in range(first, last)]}
+                    )
+                bin_sigs.append({"byte_sequences": bseqs})
+            window = self._windows[fi]
+            files.append(
+                {
+                    "path": _text(*self._paths, fi),
+                    "bin_sigs": bin_sigs,
+                    "window": None if window < 0 else window,
+                }
+            )
+        return {
+            "id": _text(*self._ids, pos),
+            "type": self._types[self._ctypes[pos]],
+            "files": files,
+        }
+
+    def _sub(self, i: int) -> _SubSequence:
+        sub = self._regex_subs.get(i)
+        if sub is None:
+            loc, regex, off, length, min_off, max_off, max_len = _CSUB.unpack_from(
+                self._subs, i * _CSUB.size
+            )
+            data = bytes(self._blob[off : off + length])
+            pattern = _FlatPattern(
+                data if regex else None,
+                None if regex else data,
+                None if max_len < 0 else max_len,
+            )
+            sub = _SubSequence(_LOCATIONS[loc], min_off, max_off, pattern)
+            if regex:
+                self._regex_subs[i] = sub
+        return sub
+
+    # ---- Copia a procesos worker: las tablas se vuelven a leer del mapeo
+    def __getstate__(self):
+        return {"db": self.db}
+
+    def __setstate__(self, state):
+        self.__init__(state["db"])
@@ -1,52 +1,129 @@
-import re, binascii
+import re
+from .utils import _BytePattern, _SubSequence
 
 # ====================== Firmas binarias (DROID_SignatureFile) ======================
 
 
 class _PRONOMSignature:
+    __slots__ = ("sig_id", "sequences", "_compiled")
+
     def __init__(self, sig_id, sequences):
         self.sig_id = sig_id
-        self.sequences = sequences  # lista de dicts: {location, pattern(bytes hex COMO TEXTO), min_offset, max_offset}
+        self.sequences = sequences  # lista de dicts: {location, pattern(sintaxis PRONOM), min_offset, max_offset, left/right_fragments}
+        self._compiled = self._compile(sequences)
 
-    def match(self, data_start: bytes, data_end: bytes) -> bool:
-        # Motor minimalista: hex puro y BOF/EOF/ANY; suficiente para muchos casos.
-        for seq in self.sequences:
-            # En firmas binarias, el <Sequence> suele ser hex puro.
+    @staticmethod
+    def _compile(sequences):
+        """
+        Compila las secuencias una sola vez (al cargar las firmas).
+        Devuelve una tupla de _SubSequence, o None si alguna secuencia no se
+        puede interpretar: en ese caso la firma nunca coincide.
+        """
+        compiled = []
+        for seq in sequences:
             try:
-                hex_bytes = binascii.unhexlify(re.sub(r"\s+", "", seq["pattern"]))
-            except binascii.Error:
+                pattern = _BytePattern(
+                    seq["pattern"],
+                    seq.get("left_fragments", ()),
+                    seq.get("right_fragments", ()),
+                )
+                min_off = seq.get("min_offset", 0)
+                max_off = seq.get("max_offset", 0)
+                sub = _SubSequence(seq["location"], min_off, max_off, pattern)
+            except (ValueError, OverflowError, re.error):
                 # Si aparece algo raro (muy raro en binario), fallamos esta firma
+                return None
+            compiled.append(sub)
+        return tuple(compiled)
+
+    def anchors(self) -> list[tuple[str, int, bytes]]:
+        """
+        Bytes fijos que la firma exige en una posición exacta:
+        ('BOF', offset, prefijo) o ('EOF', offset, sufijo).
+        """
+        if self._compiled is None:
+            return []
+        out = []
+        for sub in self._compiled:
+            if sub.min_off != sub.max_off:
+                continue
+            if sub.location == "BOF" and sub.pattern.prefix:
+                out.append(("BOF", sub.min_off, sub.pattern.prefix))
+            elif sub.location == "EOF" and sub.pattern.suffix:
+                out.append(("EOF", sub.min_off, sub.pattern.suffix))
+        return out
+
+    def literals(self) -> list[tuple[str, int, bytes]]:
+        """
+        SubSequences sin comodines: (ubicación, offset máximo, bytes). Todas
+        son obligatorias, así que cualquiera sirve para descartar la firma.
+        """
+        return [
+            (sub.location, sub.max_off, sub.pattern.literal)
+            for sub in self._compiled or ()
+            if sub.pattern.literal is not None
+        ]
+
+    def fixed_bytes(self) -> tuple[dict, dict]:
+        """
+        Todos los bytes que la firma exige en posiciones exactas: {offset
+        desde BOF: byte} y {distancia desde EOF: byte} (0 es el último byte),
+        incluidos los que siguen a comodines o saltos de largo fijo.
+        """
+        bof, eof = {}, {}
+        for sub in self._compiled or ():
+            if sub.min_off != sub.max_off:
+                continue
+            if sub.location == "BOF":
+                for start, literal in sub.pattern.fixed_head:
+                    for i, b in enumerate(literal, sub.min_off + start):
+                        bof[i] = b
+            elif sub.location == "EOF":
+                for end, literal in sub.pattern.fixed_tail:
+                    for i, b in enumerate(reversed(literal), sub.min_off + end):
+                        eof[i] = b
+        return bof, eof
+
+    def fixed_bof(self, width: int) -> bool:
+        """
+        True si la firma son solo bytes fijos en offsets exactos desde BOF
+        dentro de los primeros `width` bytes: sus anclas la deciden por completo.
+        """
+        if not self._compiled:
+            return False
+        for sub in self._compiled:
+            literal = sub.pattern.literal
+            if (
+                sub.location != "BOF"
+                or sub.min_off != sub.max_off
+                or not literal
+                or literal != sub.pattern.prefix
+                or sub.min_off + len(literal) > width
+            ):
                 return False
+        return True
+
+    def read_windows(self) -> tuple[int | None, int | None]:
+        """
+        Bytes que la firma necesita desde el inicio y desde el final del
+        archivo; None si puede estar en cualquier parte (archivo completo).
+        """
+        bof = eof = 0
+        for sub in self._compiled or ():
+            max_len = sub.pattern.max_len
+            if sub.location == "ANY" or max_len is None:
+                return None, None
+            if sub.location == "BOF":
+                bof = max(bof, sub.max_off + max_len)
+            else:
+                eof = max(eof, sub.max_off + max_len)
+        return bof, eof
 
-            min_off = seq.get("min_offset", 0)
-            max_off = seq.get("max_offset", 0)
-            loc = seq["location"]
-
-            if loc == "BOF":
-                found = False
-                limit = min(len(data_start), max_off + 1)
-                for off in range(min_off, max(0, limit - len(hex_bytes) + 1)):
-                    if data_start[off : off + len(hex_bytes)] == hex_bytes:
-                        found = True
-                        break
-                if not found:
-                    return False
-
-            elif loc == "EOF":
-                found = False
-                # Buscar desde cola; offsets cuentan desde el final
-                for off in range(min_off, max_off + 1):
-                    start = len(data_end) - off - len(hex_bytes)
-                    if (
-                        start >= 0
-                        and data_end[start : start + len(hex_bytes)] == hex_bytes
-                    ):
-                        found = True
-                        break
-                if not found:
-                    return False
-
-            else:  # ANY
-                if hex_bytes not in data_start and hex_bytes not in data_end:
-                    return False
+    def match(self, data_start: bytes, data_end: bytes) -> bool:
+        # Todas las SubSequences deben aparecer (BOF/EOF/ANY)
+        if self._compiled is None:
+            return False
+        for sub in self._compiled:
+            if not sub.search(data_start, data_end):
+                return False
         return True
@@ -0,0 +1,132 @@
+import io, mmap
+
+# ====================== Buffers y streams ======================
+
+
+class _BufferReader(io.RawIOBase):
+    """
+    Archivo de solo lectura sobre un buffer (bytes, bytearray, memoryview,
+    mmap) sin copiarlo: zipfile y olefile lo leen como si fuera un archivo.
+    """
+
+    def __init__(self, buf):
+        self._view = memoryview(buf).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"whence no válido: {whence}")
+        if pos < 0:
+            raise ValueError("Posición negativa")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b):
+        chunk = self._view[self._pos : self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def close(self):
+        # Liberar la vista para no bloquear el buffer original (p. ej. un mmap)
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+class _TailBuffer:
+    """Últimos `size` bytes de un stream: buffer circular de tamaño fijo."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._buf = bytearray(size)
+        self._pos = 0
+        self._filled = 0
+
+    def write(self, data):
+        size = self.size
+        data = memoryview(data)
+        if size == 0 or not data:
+            return
+        if len(data) >= size:
+            self._buf[:] = data[-size:]
+            self._pos = 0
+            self._filled = size
+            return
+        end = self._pos + len(data)
+        if end <= size:
+            self._buf[self._pos : end] = data
+        else:
+            first = size - self._pos
+            self._buf[self._pos :] = data[:first]
+            self._buf[: end - size] = data[first:]
+        self._pos = end % size
+        self._filled = min(size, self._filled + len(data))
+
+    def getvalue(self) -> bytes:
+        if self._filled < self.size:
+            return bytes(self._buf[: self._filled])
+        return bytes(self._buf[self._pos :] + self._buf[: self._pos])
+
+
+def _unwrap_view(view: memoryview):
+    """
+    El bytes, bytearray o mmap de `view` si la vista lo cubre entero (byte a
+    byte y sin recortes); si no, la misma vista.
+    """
+    obj = view.obj
+    if (
+        isinstance(obj, (bytes, bytearray, mmap.mmap))
+        and view.c_contiguous
+        and view.nbytes == len(obj)
+    ):
+        return obj
+    return view
+
+
+def _fileno(f) -> int | None:
+    """Descriptor del archivo, o None si el objeto no tiene uno real."""
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _is_seekable(f) -> bool:
+    try:
+        return f.seekable()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def _read_all(stream, size: int | None = None) -> bytes:
+    """
+    Lee hasta `size` bytes (todo si es None) aunque el stream devuelva lecturas
+    parciales, como ocurre con sockets y pipes.
+    """
+    parts = []
+    remaining = size
+    while remaining is None or remaining > 0:
+        chunk = stream.read(-1 if remaining is None else remaining)
+        if not chunk:
+            break
+        parts.append(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+    return b"".join(parts)
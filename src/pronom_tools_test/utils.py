@@ -3,19 +3,129 @@ import re
 # ====================== Utilidades ======================
 
 
-def _seq_to_bytes_regex(seq_text: str) -> bytes:
+def _literal(data: bytes) -> tuple:
+    """Nodo de bytes exactos."""
+    return (re.escape(data), len(data), len(data), data)
+
+
+def _any_gap(min_len: int, max_len: int | None) -> tuple:
+    """Nodo de salto: entre min_len y max_len bytes cualesquiera (None = sin límite)."""
+    if max_len is None:
+        regex = b".{%d,}" % min_len
+    elif max_len == 0:
+        return (b"", 0, 0, b"")
+    elif min_len == max_len:
+        regex = b"." if min_len == 1 else b".{%d}" % min_len
+    else:
+        regex = b".{%d,%d}" % (min_len, max_len)
+    return (regex, min_len, max_len, None)
+
+
+def _byte_class(values, negate: bool = False) -> tuple:
+    """Nodo de un byte perteneciente (o no) al conjunto de valores."""
+    values = set(values)
+    if negate:
+        values = set(range(256)) - values
+    if not values:
+        raise ValueError("Clase de bytes vacía")
+    if len(values) == 256:
+        return (b".", 1, 1, None)
+    if len(values) == 1:
+        return _literal(bytes(values))
+    ranges = []
+    for v in sorted(values):
+        if ranges and ranges[-1][1] == v - 1:
+            ranges[-1][1] = v
+        else:
+            ranges.append([v, v])
+    body = b"".join(
+        b"\\x%02x" % lo if lo == hi else b"\\x%02x-\\x%02x" % (lo, hi)
+        for lo, hi in ranges
+    )
+    return (b"[" + body + b"]", 1, 1, None)
+
+
+def _alternation(branches: list) -> tuple:
+    """Nodo (a|b|...) a partir de listas de nodos."""
+    nodes = [_concat(b) for b in branches]
+    if len(nodes) == 1:
+        return nodes[0]
+    lens = [n[2] for n in nodes]
+    return (
+        b"(?:" + b"|".join(n[0] for n in nodes) + b")",
+        min(n[1] for n in nodes),
+        None if None in lens else max(lens),
+        None,
+    )
+
+
+def _concat(nodes: list) -> tuple:
+    if not nodes:
+        return (b"", 0, 0, b"")
+    max_lens = [n[2] for n in nodes]
+    literal = None
+    if all(n[3] is not None for n in nodes):
+        literal = b"".join(n[3] for n in nodes)
+    return (
+        b"".join(n[0] for n in nodes),
+        sum(n[1] for n in nodes),
+        None if None in max_lens else sum(max_lens),
+        literal,
+    )
+
+
+def _parse_bracket(token: str) -> tuple:
+    """Contenido de [...]: rangos hex/texto, listas, negación y máscaras."""
+    negate = token.startswith("!")
+    if negate:
+        token = token[1:].strip()
+    m = re.fullmatch(r"\s*'(.)'\s*-\s*'(.)'\s*", token)
+    if m:  # rango 'a'-'b'
+        lo, hi = ord(m.group(1)), ord(m.group(2))
+        return _byte_class(range(lo, hi + 1), negate)
+    m = re.fullmatch(r"\s*([0-9A-Fa-f]{2})\s*:\s*([0-9A-Fa-f]{2})\s*", token)
+    if m:  # rango hex xx:yy
+        lo, hi = int(m.group(1), 16), int(m.group(2), 16)
+        return _byte_class(range(lo, hi + 1), negate)
+    m = re.fullmatch(r"\s*([&~])\s*([0-9A-Fa-f]{2})\s*", token)
+    if m:  # máscara: & todos los bits, ~ algún bit
+        mask = int(m.group(2), 16)
+        if m.group(1) == "&":
+            values = [v for v in range(256) if v & mask == mask]
+        else:
+            values = [v for v in range(256) if v & mask]
+        return _byte_class(values, negate)
+    m = re.fullmatch(r"\s*([0-9A-Fa-f]{2})\s*", token)
+    if m:  # un solo byte
+        return _byte_class([int(m.group(1), 16)], negate)
+    chars = re.findall(r"'(.)'", token)
+    if chars:  # lista 'A''B''C'
+        return _byte_class([ord(c) for c in chars], negate)
+    # fallback (poco frecuente en container signatures)
+    return (b".", 1, 1, None)
+
+
+def _parse_sequence(seq_text: str) -> list:
     """
-    Convierte la sintaxis PRONOM de Sequence en un patrón regex de bytes.
-    Soporta:
-      - bytes hex:   "50 4B 03 04"
-      - texto:       'Word.Document.'
-      - rangos:      ['6'-'7']  o listas ['A''B''C']
+    Convierte la sintaxis PRONOM de Sequence en una lista de nodos
+    (regex_bytes, min_len, max_len, literal|None). Soporta:
+      - bytes hex:      "50 4B 03 04"
+      - texto:          'Word.Document.'
+      - comodines:      ??  *  {n}  {n-m}  {n-*}
+      - clases:         [xx:yy] [!xx] [&xx] [~xx] ['6'-'7'] ['A''B''C']
+      - alternativas:   (aa|bb|'cc')
     """
     s = seq_text or ""
-    i = 0
-    out = []
+    nodes, _ = _parse_nodes(s, 0, None)
+    return nodes
+
+
+def _parse_nodes(s: str, i: int, stop: str | None) -> tuple[list, int]:
+    nodes = []
     while i < len(s):
         ch = s[i]
+        if stop and ch in stop:
+            return nodes, i
         if ch.isspace():
             i += 1
             continue
@@ -23,63 +133,203 @@ def _seq_to_bytes_regex(seq_text: str) -> bytes:
             j = s.find("'", i + 1)
             if j == -1:
                 raise ValueError("Secuencia con comilla sin cerrar")
-            literal = s[i + 1 : j].encode("latin1")
-            out.append(re.escape(literal))
+            nodes.append(_literal(s[i + 1 : j].encode("latin1")))
             i = j + 1
             continue
         if ch == "[":  # clase / rango
             j = s.find("]", i + 1)
             if j == -1:
                 raise ValueError("Secuencia con corchete sin cerrar")
-            token = s[i + 1 : j]
-            m = re.match(r"\s*'(.)'\s*-\s*'(.)'\s*", token)
-            if m:  # rango 'a'-'b'
-                lo = m.group(1).encode("latin1")
-                hi = m.group(2).encode("latin1")
-                out.append(b"[" + re.escape(lo) + b"-" + re.escape(hi) + b"]")
-            else:
-                chars = re.findall(r"'(.)'", token)
-                if chars:
-                    out.append(
-                        b"["
-                        + b"".join(re.escape(c.encode("latin1")) for c in chars)
-                        + b"]"
-                    )
-                else:
-                    # fallback (poco frecuente en container signatures)
-                    out.append(b".")
+            nodes.append(_parse_bracket(s[i + 1 : j]))
+            i = j + 1
+            continue
+        if ch == "(":  # alternativas
+            branches = []
+            i += 1
+            while True:
+                branch, i = _parse_nodes(s, i, "|)")
+                branches.append(branch)
+                if i >= len(s):
+                    raise ValueError("Secuencia con paréntesis sin cerrar")
+                i += 1
+                if s[i - 1] == ")":
+                    break
+            nodes.append(_alternation(branches))
+            continue
+        if ch == "{":  # salto {n} / {n-m} / {n-*}
+            j = s.find("}", i + 1)
+            if j == -1:
+                raise ValueError("Secuencia con llave sin cerrar")
+            lo, _, hi = s[i + 1 : j].partition("-")
+            lo = int(lo)
+            hi = lo if not hi else (None if hi.strip() == "*" else int(hi))
+            nodes.append(_any_gap(lo, hi))
             i = j + 1
             continue
+        if ch == "*":
+            nodes.append(_any_gap(0, None))
+            i += 1
+            continue
+        if s.startswith("??", i):
+            nodes.append(_any_gap(1, 1))
+            i += 2
+            continue
         # byte hex
         m = re.match(r"[0-9A-Fa-f]{2}", s[i:])
         if m:
-            out.append(bytes([int(s[i : i + 2], 16)]))
+            nodes.append(_literal(bytes([int(s[i : i + 2], 16)])))
             i += 2
             continue
         # otro símbolo: ignorar
         i += 1
-    return b"".join(out)
+    return nodes, i
 
 
-def _subseq_match(
-    data: bytes, regex_bytes: bytes, reference: str, min_off: int, max_off: int
+def _fragments(nodes) -> list[dict]:
+    """
+    Elementos Left/RightFragment (de firmas binarias o de contenedores) en el
+    formato que espera _BytePattern.
+    """
+    fragments = []
+    for frag in nodes:
+        min_off = int(frag.attrib.get("MinOffset", 0))
+        fragments.append(
+            {
+                "position": int(frag.attrib.get("Position", 1)),
+                "pattern": (frag.text or "").strip(),
+                "min_offset": min_off,
+                "max_offset": int(frag.attrib.get("MaxOffset", min_off)),
+            }
+        )
+    return fragments
+
+
+class _BytePattern:
+    """
+    SubSequence PRONOM compilada (secuencia + fragmentos izquierdo/derecho).
+    Si no hay comodines, `literal` contiene los bytes exactos y no se usa regex.
+    """
+
+    __slots__ = (
+        "body",
+        "literal",
+        "prefix",
+        "suffix",
+        "min_len",
+        "max_len",
+        "fixed_head",
+        "fixed_tail",
+    )
+
+    def __init__(self, seq_text: str, left=(), right=()):
+        nodes = []
+        # Fragmentos izquierdos: la posición 1 es la más cercana a la secuencia
+        for pos in sorted({f["position"] for f in left}, reverse=True):
+            frags = [f for f in left if f["position"] == pos]
+            nodes.append(_alternation([_parse_sequence(f["pattern"]) for f in frags]))
+            nodes.append(_any_gap(frags[0]["min_offset"], frags[0]["max_offset"]))
+        nodes.extend(_parse_sequence(seq_text))
+        for pos in sorted({f["position"] for f in right}):
+            frags = [f for f in right if f["position"] == pos]
+            nodes.append(_any_gap(frags[0]["min_offset"], frags[0]["max_offset"]))
+            nodes.append(_alternation([_parse_sequence(f["pattern"]) for f in frags]))
+        nodes = [n for n in nodes if n[0]]
+
+        self.body, self.min_len, self.max_len, self.literal = _concat(nodes)
+        self.prefix = b"".join(_leading_literals(nodes))
+        self.suffix = b"".join(reversed(_leading_literals(nodes[::-1])))
+        # Literales a distancia fija del inicio / del final del patrón
+        self.fixed_head = _fixed_literals(nodes)
+        self.fixed_tail = _fixed_literals(nodes[::-1])
+
+
+def _fixed_literals(nodes) -> tuple[tuple[int, bytes], ...]:
+    """
+    (distancia, literal) de los literales a los que se llega desde el primer
+    nodo solo por nodos de largo fijo (la distancia se mide desde ese borde).
+    """
+    out = []
+    offset = 0
+    for n in nodes:
+        if n[3] is not None:
+            out.append((offset, n[3]))
+        if n[1] != n[2]:
+            break
+        offset += n[1]
+    return tuple(out)
+
+
+def _leading_literals(nodes) -> list[bytes]:
+    """Literales consecutivos al inicio de una lista de nodos."""
+    out = []
+    for n in nodes:
+        if n[3] is None:
+            break
+        out.append(n[3])
+    return out
+
+
+def _find_literal(
+    literal, location: str, min_off: int, max_off: int, data_start, data_end
 ) -> bool:
     """
-    Verifica si el patrón aparece con inicio dentro del rango (min_off..max_off),
-    relativo a BOF o aproximado a EOF (la mayoría de container sigs usan BOF).
+    Busca bytes fijos (bytes o una memoryview) en la ventana de una
+    SubSequence sin regex.
+    """
+    size = len(literal)
+    if location == "BOF":
+        # El inicio del patrón debe caer en [min_off, max_off]
+        return data_start.find(literal, min_off, max_off + size) != -1
+    if location == "EOF":
+        # Offsets desde el final hasta el último byte del patrón
+        end = len(data_end) - min_off
+        start = max(0, end - (max_off - min_off) - size)
+        return end >= size and data_end.find(literal, start, end) != -1
+    if data_start.find(literal) != -1:
+        return True
+    return data_end is not data_start and data_end.find(literal) != -1
+
+
+class _SubSequence:
     """
-    patt = re.compile(regex_bytes, flags=re.DOTALL)
-    for m in patt.finditer(data):
-        start = m.start()
-        if reference.startswith("BOF"):
-            if min_off <= start <= max_off:
-                return True
-        elif reference.startswith("EOF"):
-            # Aproximación razonable para container sigs (poco usadas con EOF aquí):
-            # offset desde el final al inicio del match.
-            offset_from_eof = len(data) - start
-            if min_off <= offset_from_eof <= max_off:
-                return True
-        else:  # ANY
+    Una SubSequence con su ubicación (BOF/EOF/ANY) y ventana de offsets.
+    Los patrones con comodines se convierten en un único regex anclado a la
+    ventana, de modo que la búsqueda ocurre en C y no en bucles Python.
+    """
+
+    __slots__ = ("location", "min_off", "max_off", "pattern", "_regex")
+
+    def __init__(self, location: str, min_off: int, max_off: int, pattern):
+        self.location = location
+        self.min_off = min_off
+        self.max_off = max_off
+        self.pattern = pattern
+        self._regex = None
+        if pattern.literal is None:
+            gap = b"%d,%d" % (min_off, max(min_off, max_off))
+            if location == "BOF":
+                regex = b".{" + gap + b"}?(?:" + pattern.body + b")"
+            elif location == "EOF":
+                regex = b"(?:" + pattern.body + b").{" + gap + b"}\\Z"
+            else:
+                regex = pattern.body
+            self._regex = re.compile(regex, re.DOTALL)
+
+    def search(self, data_start: bytes, data_end: bytes) -> bool:
+        literal = self.pattern.literal
+        min_off, max_off = self.min_off, self.max_off
+        if literal is not None:
+            return _find_literal(
+                literal, self.location, min_off, max_off, data_start, data_end
+            )
+
+        if self.location == "BOF":
+            return self._regex.match(data_start) is not None
+        if self.location == "EOF":
+            start = 0
+            if self.pattern.max_len is not None:
+                start = max(0, len(data_end) - max_off - self.pattern.max_len)
+            return self._regex.search(data_end, start) is not None
+        if self._regex.search(data_start) is not None:
             return True
-    return False
+        return data_end is not data_start and self._regex.search(data_end) is not None
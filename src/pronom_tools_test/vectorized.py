@@ -0,0 +1,160 @@
+# ---- Opcional NumPy ----
+try:
+    import numpy as np  # pip install numpy
+
+    HAVE_NUMPY = True
+except Exception:
+    HAVE_NUMPY = False
+
+# ====================== Matching vectorizado de anclas BOF ======================
+
+
+class _BOFMatrix:
+    """
+    Las anclas BOF de todas las firmas (bytes fijos en offsets exactos) como
+    tablas planas. Para un lote de N archivos se arma la matriz N x W de
+    cabeceras y, con NumPy, se buscan las firmas cuya primera ancla (hasta 8
+    bytes, como entero) coincide; solo esos pares (archivo, firma) se
+    verifican byte a byte. Las firmas formadas solo por esas anclas ("puras")
+    quedan decididas así; el resto sigue en el motor general, y solo las
+    candidatas anteriores (en el orden del XML) a la primera pura que coincide.
+    """
+
+    def __init__(self, signatures, max_width: int = 1024):
+        offsets, values, starts = [], [], []
+        positions = []  # posición de cada firma con anclas (orden del XML)
+        pure = []
+        groups = {}  # (offset, largo de clave) -> [(clave, columna)]
+        for pos, sig in enumerate(signatures):
+            anchors = [
+                (offset, pattern)
+                for loc, offset, pattern in sig.anchors()
+                if loc == "BOF" and offset + len(pattern) <= max_width
+            ]
+            if not anchors:
+                continue
+            offset, pattern = anchors[0]
+            key = pattern[:8]
+            groups.setdefault((offset, len(key)), []).append(
+                (int.from_bytes(key.ljust(8, b"\0"), "little"), len(positions))
+            )
+            starts.append(len(offsets))
+            positions.append(pos)
+            pure.append(sig.fixed_bof(max_width))
+            for offset, pattern in anchors:
+                offsets.extend(range(offset, offset + len(pattern)))
+                values.extend(pattern)
+        starts.append(len(offsets))
+
+        self.size = len(signatures)
+        self.width = max(offsets, default=-1) + 1
+        self._offsets = np.array(offsets, dtype=np.intp)
+        self._values = np.array(values, dtype=np.uint8)
+        self._starts = np.array(starts, dtype=np.intp)
+        self._positions = np.array(positions, dtype=np.intp)
+        self._pure = np.array(pure, dtype=bool)
+        self._groups = []
+        for (offset, keylen), entries in groups.items():
+            entries.sort()
+            keys = np.array([k for k, _ in entries], dtype=np.uint64)
+            cols = np.array([c for _, c in entries], dtype=np.intp)
+            self._groups.append((offset, keylen, keys, cols))
+        # Primera firma sin anclas BOF: antes de ella, todo está decidido
+        self._anchored = frozenset(positions)
+        self._first_unanchored = next(
+            (pos for pos in range(self.size) if pos not in self._anchored), self.size
+        )
+
+    def _headers(self, heads):
+        width = self.width
+        rows = b"".join(bytes(h[:width]).ljust(width, b"\0") for h in heads)
+        headers = np.frombuffer(rows, dtype=np.uint8).reshape(len(heads), width)
+        lengths = np.fromiter((len(h) for h in heads), dtype=np.intp, count=len(heads))
+        return headers, lengths
+
+    def _key_pairs(self, headers):
+        """Pares (fila, columna) cuya clave de la primera ancla coincide."""
+        n = len(headers)
+        buf = np.zeros((n, 8), dtype=np.uint8)
+        all_rows, all_cols = [], []
+        for offset, keylen, keys, cols in self._groups:
+            buf[:, :keylen] = headers[:, offset : offset + keylen]
+            buf[:, keylen:] = 0
+            row_keys = buf.view("<u8").ravel()
+            lo = np.searchsorted(keys, row_keys, "left")
+            counts = np.searchsorted(keys, row_keys, "right") - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            ends = np.cumsum(counts)
+            within = np.arange(total) - np.repeat(ends - counts, counts)
+            all_rows.append(np.repeat(np.arange(n), counts))
+            all_cols.append(cols[np.repeat(lo, counts) + within])
+        if not all_rows:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        return np.concatenate(all_rows), np.concatenate(all_cols)
+
+    def _verify(self, headers, lengths, rows, cols):
+        """Por par, True si el archivo cumple todas las anclas de la firma."""
+        if not len(rows):
+            return np.zeros(0, dtype=bool)
+        first = self._starts[cols]
+        counts = self._starts[cols + 1] - first
+        ends = np.cumsum(counts)
+        pair_start = ends - counts
+        idx = np.repeat(first - pair_start, counts) + np.arange(int(ends[-1]))
+        rep = np.repeat(rows, counts)
+        offsets = self._offsets[idx]
+        equal = headers[rep, offsets] == self._values[idx]
+        equal &= offsets < lengths[rep]
+        return np.logical_and.reduceat(equal, pair_start)
+
+    def first_matches(self, heads, tails, signatures, index) -> list[int | None]:
+        """Posición de la firma ganadora de cada archivo (None si ninguna)."""
+        if not heads:
+            return []
+        n = len(heads)
+        limits = np.full(n, self.size, dtype=np.intp)
+        first_other = np.full(n, self.size, dtype=np.intp)
+        rows = cols = np.zeros(0, dtype=np.intp)
+        if self._groups:
+            headers, lengths = self._headers(heads)
+            rows, cols = self._key_pairs(headers)
+            ok = self._verify(headers, lengths, rows, cols)
+            rows, cols = rows[ok], cols[ok]
+            pure = self._pure[cols]
+            np.minimum.at(limits, rows[pure], self._positions[cols[pure]])
+            rows, cols = rows[~pure], cols[~pure]
+            np.minimum.at(first_other, rows, self._positions[cols])
+        # Sin impuras que cumplan sus anclas ni firmas sin anclas antes de la
+        # primera pura, la matriz ya da el resultado
+        decided = limits <= np.minimum(first_other, self._first_unanchored)
+        limits = limits.tolist()
+        decided = decided.tolist()
+        survivors = {}  # fila -> impuras que cumplen sus anclas
+        for row, pos in zip(rows.tolist(), self._positions[cols].tolist()):
+            if not decided[row]:
+                survivors.setdefault(row, set()).add(pos)
+        anchored = self._anchored
+
+        winners = []
+        for row, (head, tail) in enumerate(zip(heads, tails)):
+            limit = limits[row]
+            winner = limit if limit < self.size else None
+            if decided[row]:
+                winners.append(winner)
+                continue
+            row_survivors = survivors.get(row, ())
+            for pos in index.candidates(head, tail):
+                if pos >= limit:
+                    break
+                # Con anclas BOF: solo las impuras que las cumplen (las puras
+                # anteriores a `limit` no coinciden por definición)
+                if pos in anchored and pos not in row_survivors:
+                    continue
+                if signatures[pos].match(head, tail):
+                    winner = pos
+                    break
+            winners.append(winner)
+        return winners
@@ -0,0 +1,95 @@
+"""identify_archive: recorrido de ZIP anidados y límites del recorrido."""
+
+import io, os, sys, zipfile
+import pytest
+from pronom_tools_test.format_info import FormatInfoCollector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+_PDF = b"%PDF-1.4\nxx\n%%EOF\n"
+
+
+def _zip(members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def collector(tmp_path_factory):
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, container_xml, _ = generate(str(dest), n_formats=60, n_files=0, seed=3)
+    return FormatInfoCollector(sig_xml, container_xml)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """outer.zip: a.pdf, inner.zip (b.pdf, deep.zip (c.txt)) y d.txt."""
+    deep = _zip({"c.txt": b"hola"})
+    inner = _zip({"b.pdf": _PDF, "deep.zip": deep})
+    path = tmp_path / "outer.zip"
+    path.write_bytes(_zip({"a.pdf": _PDF, "inner.zip": inner, "d.txt": b"x" * 1000}))
+    return str(path)
+
+
+def _walk(collector, archive, **limits) -> list[tuple]:
+    return [
+        (r["path"].removeprefix(archive), r["depth"], r["error"])
+        for r in collector.identify_archive(archive, **limits)
+    ]
+
+
+def test_nested_members(collector, archive):
+    records = list(collector.identify_archive(archive))
+    assert [(r["path"].removeprefix(archive), r["depth"]) for r in records] == [
+        ("!a.pdf", 1),
+        ("!inner.zip", 1),
+        ("!inner.zip!b.pdf", 2),
+        ("!inner.zip!deep.zip", 2),
+        ("!inner.zip!deep.zip!c.txt", 3),
+        ("!d.txt", 1),
+    ]
+    assert records[0]["result"]["main_format"]["puid"] == "fmt/18"
+    assert records[-1]["size"] == 1000
+    assert all(r["error"] is None for r in records)
+    # Con hilos, mismo resultado y mismo orden
+    assert list(collector.identify_archive(archive, workers=3)) == records
+
+
+def test_max_depth(collector, archive):
+    assert [p for p, _, _ in _walk(collector, archive, max_depth=2)] == [
+        "!a.pdf",
+        "!inner.zip",
+        "!inner.zip!b.pdf",
+        "!inner.zip!deep.zip",
+        "!d.txt",
+    ]
+
+
+def test_member_budget(collector, archive):
+    records = _walk(collector, archive, max_members=3)
+    assert len(records) == 4
+    assert [p for p, _, _ in records[:2]] == ["!a.pdf", "!inner.zip"]
+    assert all(error is None for _, _, error in records[:-1])
+    # El último registro lleva el motivo del corte
+    assert records[-1][:2] == ("", 0)
+    assert records[-1][2].startswith("Límite de miembros")
+
+
+def test_byte_budget(collector, archive):
+    # Todo suma menos de 1000 bytes descomprimidos salvo d.txt
+    records = list(collector.identify_archive(archive, max_bytes=900))
+    assert "!d.txt" not in [r["path"].removeprefix(archive) for r in records]
+    assert sum(r["size"] for r in records[:-1]) <= 900
+    assert records[-1]["error"].startswith("Límite de bytes")
+    assert records[-1]["size"] == sum(r["size"] for r in records[:-1])
+
+
+def test_not_an_archive(collector, tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(_PDF)
+    with pytest.raises(ValueError):
+        list(collector.identify_archive(str(path)))
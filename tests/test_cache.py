@@ -0,0 +1,104 @@
+"""Caché de firmas y contenedores compilados (cache_dir)."""
+
+import os, sys
+import xml.etree.ElementTree as ET
+import pytest
+from pronom_tools_test.format_info import FormatInfoCollector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, container_xml, files_dir = generate(
+        str(dest), n_formats=80, n_files=60, seed=5, large_mb=1
+    )
+    paths = sorted(os.path.join(files_dir, name) for name in os.listdir(files_dir))
+    return sig_xml, container_xml, paths
+
+
+def _container_reads(monkeypatch, container_xml) -> list:
+    """Cuenta las lecturas del XML de contenedores con iterparse."""
+    reads = []
+    iterparse = ET.iterparse
+
+    def counting(source, *args, **kwargs):
+        if getattr(source, "name", source) == container_xml:
+            reads.append(source)
+        return iterparse(source, *args, **kwargs)
+
+    monkeypatch.setattr(ET, "iterparse", counting)
+    return reads
+
+
+def test_container_xml_is_read_once(corpus, monkeypatch):
+    sig_xml, container_xml, paths = corpus
+    reads = _container_reads(monkeypatch, container_xml)
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    for path in paths:
+        collector.identify_file(path)
+    assert collector.container_db._csigs is not None
+    assert len(reads) == 1
+
+
+def test_cache_round_trip(corpus, tmp_path, monkeypatch):
+    sig_xml, container_xml, paths = corpus
+    expected = [
+        FormatInfoCollector(sig_xml, container_xml).identify_file(path)
+        for path in paths
+    ]
+    cold = FormatInfoCollector(sig_xml, container_xml, cache_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [
+        f"pronom-{cold._db_version[:32]}-containers.pickle",
+        f"pronom-{cold._db_version[:32]}.pickle",
+    ]
+    assert [cold.identify_file(path) for path in paths] == expected
+
+    # Con la caché completa no se lee ningún XML, tampoco al refinar
+    def no_xml(*args, **kwargs):
+        raise AssertionError("XML leído con la caché disponible")
+
+    monkeypatch.setattr(ET, "iterparse", no_xml)
+    monkeypatch.setattr(ET, "parse", no_xml)
+    warm = FormatInfoCollector(sig_xml, container_xml, cache_dir=str(tmp_path))
+    assert warm.container_db._csigs is None
+    assert [warm.identify_file(path) for path in paths] == expected
+    assert any(r and r.get("container_formats") for r in expected)
+
+
+def test_missing_container_cache_is_rebuilt(corpus, tmp_path, monkeypatch):
+    sig_xml, container_xml, paths = corpus
+    cold = FormatInfoCollector(sig_xml, container_xml, cache_dir=str(tmp_path))
+    name = f"pronom-{cold._db_version[:32]}-containers.pickle"
+    os.remove(os.path.join(tmp_path, name))
+    reads = _container_reads(monkeypatch, container_xml)
+    warm = FormatInfoCollector(sig_xml, container_xml, cache_dir=str(tmp_path))
+    results = [warm.identify_file(path) for path in paths]
+    assert results == [cold.identify_file(path) for path in paths]
+    assert len(reads) == 1
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_stale_or_corrupt_cache_is_rebuilt(corpus, tmp_path):
+    sig_xml, _, paths = corpus
+    changed = tmp_path / "signatures.xml"
+    with open(sig_xml, "rb") as src, open(changed, "wb") as dst:
+        dst.write(src.read() + b"\n")
+    cache_dir = tmp_path / "cache"
+    first = FormatInfoCollector(sig_xml, cache_dir=str(cache_dir))
+    # Otro XML (aunque sea equivalente) -> otra entrada en la caché
+    other = FormatInfoCollector(str(changed), cache_dir=str(cache_dir))
+    assert other.db_version != first.db_version
+    assert len(os.listdir(cache_dir)) == 2
+
+    # Una caché ilegible se descarta y se vuelve a escribir
+    cache_file = os.path.join(cache_dir, f"pronom-{first.db_version[:32]}.pickle")
+    with open(cache_file, "wb") as f:
+        f.write(b"no es un pickle")
+    rebuilt = FormatInfoCollector(sig_xml, cache_dir=str(cache_dir))
+    expected = [first.identify_file(path) for path in paths]
+    assert [rebuilt.identify_file(path) for path in paths] == expected
+    again = FormatInfoCollector(sig_xml, cache_dir=str(cache_dir))
+    assert [again.identify_file(path) for path in paths] == expected
@@ -0,0 +1,150 @@
+"""pronom-scan: filtros, salida JSONL/CSV, checkpoint y reanudación."""
+
+import csv, io, json, os, shutil, sys
+import pytest
+from pronom_tools_test import cli
+from pronom_tools_test.parallel import _walk_files
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def tree(tmp_path_factory):
+    """Árbol anidado (a/, a/b/, c/ y la raíz) con archivos del corpus."""
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, container_xml, files_dir = generate(
+        str(dest), n_formats=60, n_files=40, seed=13, large_mb=1
+    )
+    root = dest / "tree"
+    dirs = [root, root / "a", root / "a" / "b", root / "c"]
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    for i, name in enumerate(sorted(os.listdir(files_dir))):
+        shutil.copy(os.path.join(files_dir, name), dirs[i % len(dirs)] / name)
+    return sig_xml, container_xml, str(root)
+
+
+def _run(tree, *args) -> int:
+    sig_xml, container_xml, root = tree
+    argv = ["-s", sig_xml, "-c", container_xml, "-w", "1", "--progress", "0"]
+    return cli.main(argv + list(args) + [root])
+
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _jsonl(path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _checkpoint(output) -> dict:
+    with open(str(output) + ".ckpt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_walk_order_and_records(tree, tmp_path):
+    out = tmp_path / "out.jsonl"
+    assert _run(tree, "-o", str(out)) == 0
+    records = _jsonl(out)
+    # En cada carpeta, primero los archivos y luego las subcarpetas
+    assert [r["path"] for r in records] == list(_walk_files(tree[2]))
+    assert any(r["puid"] for r in records)
+    assert any(r["container_puids"] for r in records)
+    assert _checkpoint(out)["complete"]
+
+
+def test_filters(tree, tmp_path):
+    out = tmp_path / "out.jsonl"
+    assert _run(tree, "-o", str(out), "--include", "*.pdf", "--exclude", "b") == 0
+    paths = [r["path"] for r in _jsonl(out)]
+    assert paths and all(p.endswith(".pdf") for p in paths)
+    assert not any(os.sep + "b" + os.sep in p for p in paths)
+
+    sizes = {p: os.path.getsize(p) for p in _walk_files(tree[2])}
+    limit = sorted(sizes.values())[len(sizes) // 2]
+    out = tmp_path / "sized.jsonl"
+    assert _run(tree, "-o", str(out), "--min-size", str(limit), "--max-size", "1M") == 0
+    assert [r["path"] for r in _jsonl(out)] == [
+        p for p, size in sizes.items() if limit <= size <= 1 << 20
+    ]
+
+
+def test_csv_output(tree, tmp_path):
+    jsonl, out = tmp_path / "out.jsonl", tmp_path / "out.csv"
+    assert _run(tree, "-o", str(jsonl)) == 0
+    assert _run(tree, "-o", str(out), "-f", "csv") == 0
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == cli._CSV_FIELDS
+    records = _jsonl(jsonl)
+    assert [row[0] for row in rows[1:]] == [r["path"] for r in records]
+    assert [row[2] for row in rows[1:]] == [r["puid"] or "" for r in records]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_resume_after_cut(tree, tmp_path, monkeypatch, fmt):
+    full = tmp_path / f"full.{fmt}"
+    assert _run(tree, "-o", str(full), "-f", fmt) == 0
+
+    # Corte brusco: el checkpoint queda tras el 3.er registro y se escriben
+    # dos más antes de caer, que la reanudación debe descartar y repetir
+    out = tmp_path / f"out.{fmt}"
+    save = cli._save_checkpoint
+    saves, writes = [], []
+    writer = cli._CSVWriter if fmt == "csv" else cli._JSONLWriter
+    original_write = writer.write
+
+    def cut_write(self, record):
+        writes.append(record["path"])
+        if len(writes) > 5:
+            raise RuntimeError("corte")
+        original_write(self, record)
+
+    def third_save(path, state):
+        saves.append(state)
+        if len(saves) == 3:
+            save(path, state)
+
+    monkeypatch.setattr(writer, "write", cut_write)
+    monkeypatch.setattr(cli, "_save_checkpoint", third_save)
+    with pytest.raises(RuntimeError):
+        _run(tree, "-o", str(out), "-f", fmt, "--checkpoint-every", "0")
+    monkeypatch.undo()
+    assert len(_read(out)) > _checkpoint(out)["offset"]
+
+    assert _run(tree, "-o", str(out), "-f", fmt, "--resume") == 0
+    assert _read(out) == _read(full)
+    # Ya terminado: no se vuelve a escribir
+    assert _run(tree, "-o", str(out), "-f", fmt, "--resume") == 0
+    assert _read(out) == _read(full)
+
+
+def test_resume_other_roots(tree, tmp_path):
+    out = tmp_path / "out.jsonl"
+    ckpt = str(out) + ".ckpt"
+    cli._save_checkpoint(ckpt, {"roots": ["/otra"], "complete": False})
+    assert _run(tree, "-o", str(out), "--resume") == 2
+    assert _run(tree, "--resume") == 2  # --resume sin --output
+
+
+class _ClosedPipe(io.TextIOBase):
+    """stdout cuyo lector ya terminó (p. ej. `pronom-scan ... | head`)."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def write(self, text):
+        raise BrokenPipeError(32, "Broken pipe")
+
+    def fileno(self):
+        return self._fd
+
+
+def test_broken_pipe(tree, tmp_path, monkeypatch):
+    with open(tmp_path / "stdout", "wb") as f:
+        monkeypatch.setattr(sys, "stdout", _ClosedPipe(f.fileno()))
+        assert _run(tree) == 141
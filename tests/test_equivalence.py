@@ -0,0 +1,209 @@
+"""
+Todas las vías de identificación deben dar el mismo resultado que una
+búsqueda lineal en el orden del XML, sobre el corpus de benchmarks/corpus.py.
+"""
+
+import asyncio, os, pickle, sys
+import pytest
+from pronom_tools_test.format_info import FormatInfoCollector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, container_xml, files_dir = generate(
+        str(dest), n_formats=200, n_files=150, seed=7, large_mb=1
+    )
+    paths = sorted(os.path.join(files_dir, name) for name in os.listdir(files_dir))
+    return sig_xml, container_xml, paths
+
+
+@pytest.fixture(scope="module")
+def expected(corpus):
+    sig_xml, container_xml, paths = corpus
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    return [collector.identify_file(path) for path in paths]
+
+
+def _new(corpus) -> FormatInfoCollector:
+    return FormatInfoCollector(corpus[0], corpus[1])
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _matching(collector, data: bytes) -> list:
+    """Firmas que coinciden con el archivo completo, en orden del XML."""
+    return [sig for sig in collector.signatures if sig.match(data, data)]
+
+
+def _sig_id(result):
+    return result["signature_id"] if result else None
+
+
+def _without_hint(result):
+    if result is None:
+        return None
+    return {k: v for k, v in result.items() if k != "extension_match"}
+
+
+def _signature_file(path, signatures) -> str:
+    """
+    DROID_SignatureFile mínimo: `signatures` es una lista de (extensión,
+    [(Reference, patrón)]); la firma i (desde 1) es del formato i.
+    """
+    ns = "http://www.nationalarchives.gov.uk/pronom/SignatureFile"
+    sigs, formats = [], []
+    for i, (ext, sequences) in enumerate(signatures, 1):
+        seqs = "".join(
+            f'<ByteSequence Reference="{ref}"><SubSequence Position="1" '
+            f'SubSeqMinOffset="0" SubSeqMaxOffset="0"><Sequence>{pattern}'
+            "</Sequence></SubSequence></ByteSequence>"
+            for ref, pattern in sequences
+        )
+        sigs.append(f'<InternalSignature ID="{i}">{seqs}</InternalSignature>')
+        formats.append(
+            f'<FileFormat ID="{i}" Name="f{i}" PUID="x-fmt/{i}">'
+            f"<InternalSignatureID>{i}</InternalSignatureID>"
+            f"<Extension>{ext}</Extension></FileFormat>"
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f'<FFSignatureFile xmlns="{ns}"><InternalSignatureCollection>'
+            + "".join(sigs)
+            + "</InternalSignatureCollection><FileFormatCollection>"
+            + "".join(formats)
+            + "</FileFormatCollection></FFSignatureFile>"
+        )
+    return str(path)
+
+
+def test_identify_file_is_linear_scan(corpus, expected):
+    collector = _new(corpus)
+    for path, result in zip(corpus[2], expected):
+        matching = _matching(collector, _read(path))
+        assert _sig_id(result) == (matching[0].sig_id if matching else None), path
+
+
+def test_bytes_and_stream(corpus, expected):
+    collector = _new(corpus)
+    for path, result in zip(corpus[2], expected):
+        data = _read(path)
+        assert collector.identify_bytes(data) == result, path
+        assert collector.identify_bytes(memoryview(data)) == result, path
+        # Vista recortada: no se puede desenvolver y se busca sobre una copia
+        padded = memoryview(b"\0" + data)[1:]
+        assert collector.identify_bytes(padded) == result, path
+        with open(path, "rb") as f:
+            assert collector.identify_stream(f) == result, path
+
+
+def test_vectorized(corpus, expected):
+    collector = _new(corpus)
+    records = list(collector.identify_many_vectorized(corpus[2], batch_size=32))
+    assert [r["error"] for r in records] == [None] * len(records)
+    assert [r["result"] for r in records] == expected
+
+
+def test_async(corpus, expected):
+    collector = _new(corpus)
+    collector.configure_async(max_concurrency=4)
+
+    async def run():
+        results = await asyncio.gather(
+            *(collector.identify_file_async(p) for p in corpus[2])
+        )
+        missing = os.path.join(os.path.dirname(corpus[2][0]), "no-existe")
+        records = [
+            r
+            async for r in collector.identify_many_async(
+                [*corpus[2], missing], ordered=True
+            )
+        ]
+        return results, records
+
+    try:
+        results, records = asyncio.run(run())
+    finally:
+        collector.close_async()
+    assert list(results) == expected
+    assert [r["result"] for r in records[:-1]] == expected
+    assert records[-1]["error"].startswith("FileNotFoundError")
+
+
+def test_shared_db(corpus, expected, tmp_path):
+    path = str(tmp_path / "signatures.db")
+    _new(corpus).export_shared_db(path)
+    shared = FormatInfoCollector.attach_shared_db(path)
+    assert [shared.identify_file(p) for p in corpus[2]] == expected
+    # Copia a un worker: firmas y contenedores se vuelven a mapear
+    clone = pickle.loads(pickle.dumps(shared))
+    assert [clone.identify_file(p) for p in corpus[2]] == expected
+
+
+def test_strict_extension_hints(corpus, expected):
+    collector = _new(corpus)
+    collector.enable_extension_hints(strict=True)
+    results = [collector.identify_file(p) for p in corpus[2]]
+    assert [_without_hint(r) for r in results] == expected
+
+
+def test_extension_hints(corpus, tmp_path):
+    # Gana la primera firma de los formatos de la extensión que coincide;
+    # si no hay ninguna, la búsqueda lineal
+    collector = _new(corpus)
+    hints = collector.enable_extension_hints()
+    for path in corpus[2]:
+        ext = hints.extension(path)
+        hinted = {
+            sig_id
+            for fmt in collector.formats.by_extension.get(ext, ())
+            for sig_id in fmt.internal_ids
+        }
+        matching = _matching(collector, _read(path))
+        preferred = [sig for sig in matching if sig.sig_id in hinted]
+        winner = (preferred or matching or [None])[0]
+        result = collector.identify_file(path)
+        assert _sig_id(result) == (winner.sig_id if winner else None), path
+
+    # La primera candidata es de la extensión pero no coincide: gana la
+    # siguiente firma de la extensión, no la primera en orden del XML
+    sig_xml = _signature_file(
+        tmp_path / "s.xml",
+        [
+            ("foo", [("BOFoffset", "41"), ("EOFoffset", "5A")]),
+            ("bar", [("BOFoffset", "4141")]),
+            ("foo", [("BOFoffset", "41")]),
+        ],
+    )
+    path = tmp_path / "t.foo"
+    path.write_bytes(b"AAB")
+    collector = FormatInfoCollector(sig_xml)
+    assert collector.identify_file(str(path))["signature_id"] == "2"
+    collector.enable_extension_hints()
+    result = collector.identify_file(str(path))
+    assert (result["signature_id"], result["extension_match"]) == ("3", True)
+    records = list(collector.identify_many_vectorized([str(path)]))
+    assert records[0]["result"] == result
+    collector.enable_extension_hints(strict=True)
+    assert collector.identify_file(str(path))["signature_id"] == "2"
+
+
+def test_adaptive_order(corpus, expected):
+    # El corpus no declara prioridades: la firma caliente que coincide gana,
+    # y sin coincidencias el resultado sigue siendo None
+    collector = _new(corpus)
+    collector.enable_adaptive_order(hot_size=8, reorder_every=20)
+    for _ in range(2):
+        for path, result in zip(corpus[2], expected):
+            got = collector.identify_file(path)
+            if result is None:
+                assert got is None, path
+                continue
+            matching = {sig.sig_id for sig in _matching(collector, _read(path))}
+            assert got["signature_id"] in matching, path
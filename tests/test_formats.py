@@ -0,0 +1,38 @@
+"""API pública de formatos: dicts normales, serializables y sin estado compartido."""
+
+import json, os, sys
+import pytest
+from pronom_tools_test.format_info import FormatInfoCollector
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def collector(tmp_path_factory):
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, _, _ = generate(str(dest), n_formats=60, n_files=0, seed=3)
+    return FormatInfoCollector(sig_xml)
+
+
+def test_public_formats_are_plain_dicts(collector):
+    fmt = collector.get_format_by_puid("fmt/18")
+    assert type(fmt) is dict and isinstance(fmt["extensions"], list)
+    assert fmt["name"] == "Acrobat PDF 1.4"
+    result = collector.identify_bytes(b"%PDF-1.4\nxx\n%%EOF\n")
+    assert type(result["main_format"]) is dict
+    assert json.loads(json.dumps(result))["main_format"] == result["main_format"]
+    assert collector.get_format_by_puid("fmt/0") is None
+
+
+def test_mime_groups_are_copies(collector):
+    groups = collector.group_formats_by_mime()
+    assert [g["human_mime_type"] for g in groups] == sorted(
+        g["human_mime_type"] for g in groups
+    )
+    total = sum(len(g["formatos"]) for g in groups)
+    groups[0]["formatos"].clear()
+    groups[1]["formatos"][0]["extensions"].append("zzz")
+    again = collector.group_formats_by_mime()
+    assert sum(len(g["formatos"]) for g in again) == total
+    assert "zzz" not in again[1]["formatos"][0]["extensions"]
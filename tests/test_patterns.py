@@ -0,0 +1,169 @@
+"""
+Gramática de las secuencias PRONOM (_BytePattern) y ventanas de offsets de
+las SubSequences (_SubSequence.search), contra bytes escritos a mano.
+"""
+
+import io, zipfile
+import pytest
+from pronom_tools_test.containers import _ContainerDB
+from pronom_tools_test.single_signature import _PRONOMSignature
+from pronom_tools_test.utils import _BytePattern, _SubSequence
+
+# (patrón, bytes, coincide en algún lugar)
+GRAMMAR = [
+    ("4142", b"xxABxx", True),
+    ("41 42", b"xxABxx", True),
+    ("4142", b"xxAxBx", False),
+    ("'AB'", b"xxABxx", True),
+    ("41??43", b"AzC", True),
+    ("41??43", b"AC", False),
+    ("41{2}43", b"AzzC", True),
+    ("41{2}43", b"AzC", False),
+    ("41{1-3}43", b"AzC", True),
+    ("41{1-3}43", b"AzzzC", True),
+    ("41{1-3}43", b"AzzzzC", False),
+    ("41{1-3}43", b"AC", False),
+    ("41{2-*}43", b"A" + b"z" * 50 + b"C", True),
+    ("41{2-*}43", b"AzC", False),
+    ("41*43", b"AC", True),
+    ("41*43", b"A" + b"z" * 50 + b"C", True),
+    ("41*43", b"CA", False),
+    ("41[!42]43", b"AzC", True),
+    ("41[!42]43", b"ABC", False),
+    ("41[30:39]43", b"A5C", True),
+    ("41[30:39]43", b"AaC", False),
+    ("41[!30:39]43", b"AaC", True),
+    ("41[!30:39]43", b"A5C", False),
+    ("41[&81]43", b"A\x81C", True),
+    ("41[&81]43", b"A\xffC", True),
+    ("41[&81]43", b"A\x80C", False),
+    ("41[~81]43", b"A\x80C", True),
+    ("41[~81]43", b"A\x01C", True),
+    ("41[~81]43", b"A\x7eC", False),
+    ("41['0'-'9']43", b"A7C", True),
+    ("41['0'-'9']43", b"AxC", False),
+    ("41(42|'zz')43", b"ABC", True),
+    ("41(42|'zz')43", b"AzzC", True),
+    ("41(42|'zz')43", b"AzC", False),
+    ("41(42|4344)45", b"ACDE", True),
+]
+
+
+@pytest.mark.parametrize("pattern,data,expected", GRAMMAR)
+def test_sequence_grammar(pattern, data, expected):
+    sub = _SubSequence("ANY", 0, 0, _BytePattern(pattern))
+    assert sub.search(data, data) is expected
+
+
+# (ubicación, min, max, patrón, bytes, coincide): BOF mide hasta el inicio
+# del patrón, EOF desde el último byte del patrón hasta el final
+WINDOWS = [
+    ("BOF", 0, 0, "4142", b"ABzz", True),
+    ("BOF", 0, 0, "4142", b"zABz", False),
+    ("BOF", 2, 2, "4142", b"zzAB", True),
+    ("BOF", 2, 2, "4142", b"zAB", False),
+    ("BOF", 0, 3, "4142", b"zzzAB", True),
+    ("BOF", 0, 3, "4142", b"zzzzAB", False),
+    ("BOF", 1, 3, "4142", b"ABzzz", False),
+    ("BOF", 0, 3, "41??43", b"zzzAxC", True),
+    ("BOF", 0, 3, "41??43", b"zzzzAxC", False),
+    ("EOF", 0, 0, "4142", b"zzzzAB", True),
+    ("EOF", 0, 0, "4142", b"zzzzABz", False),
+    ("EOF", 1, 1, "4142", b"zzABz", True),
+    ("EOF", 1, 1, "4142", b"zzAB", False),
+    ("EOF", 0, 2, "4142", b"ABzz", True),
+    ("EOF", 0, 2, "4142", b"ABzzz", False),
+    ("EOF", 0, 0, "41??43", b"zzAxC", True),
+    ("EOF", 0, 2, "41??43", b"AxCzz", True),
+    ("EOF", 0, 2, "41??43", b"AxCzzz", False),
+    ("EOF", 0, 0, "4142", b"B", False),
+]
+
+
+@pytest.mark.parametrize("location,min_off,max_off,pattern,data,expected", WINDOWS)
+def test_offset_windows(location, min_off, max_off, pattern, data, expected):
+    sub = _SubSequence(location, min_off, max_off, _BytePattern(pattern))
+    assert sub.search(data, data) is expected
+
+
+def _fragment(pattern: str, min_off: int, max_off: int, position: int = 1):
+    return {
+        "position": position,
+        "pattern": pattern,
+        "min_offset": min_off,
+        "max_offset": max_off,
+    }
+
+
+def test_fragments():
+    # Izquierdo: 'L' entre 0 y 2 bytes antes; derecho: 'R' a 1 byte después
+    pattern = _BytePattern("4142", [_fragment("4C", 0, 2)], [_fragment("52", 1, 1)])
+    sub = _SubSequence("ANY", 0, 0, pattern)
+    assert sub.search(b"LABzR", b"LABzR")
+    assert sub.search(b"LzzABzR", b"LzzABzR")
+    assert not sub.search(b"LzzzABzR", b"LzzzABzR")
+    assert not sub.search(b"LABR", b"LABR")
+    # Fragmentos alternativos en la misma posición y una segunda posición
+    pattern = _BytePattern(
+        "4142",
+        [_fragment("58", 0, 0), _fragment("59", 0, 0), _fragment("5A", 1, 1, 2)],
+    )
+    sub = _SubSequence("BOF", 0, 0, pattern)
+    assert sub.search(b"ZzXAB", b"ZzXAB")
+    assert sub.search(b"ZzYAB", b"ZzYAB")
+    assert not sub.search(b"ZXAB", b"ZXAB")
+
+
+def _container_xml(
+    sequence: str, reference: str = "BOFoffset", min_off: int = 0, max_off: int = 0
+) -> bytes:
+    return (
+        "<ContainerSignatureMapping><ContainerSignatures>"
+        '<ContainerSignature Id="1" ContainerType="ZIP"><Files><File>'
+        "<Path>mimetype</Path><BinarySignatures><InternalSignatureCollection>"
+        f'<InternalSignature ID="1"><ByteSequence Reference="{reference}">'
+        f'<SubSequence Position="1" SubSeqMinOffset="{min_off}" '
+        f'SubSeqMaxOffset="{max_off}">'
+        f"<Sequence>{sequence}</Sequence></SubSequence></ByteSequence>"
+        "</InternalSignature></InternalSignatureCollection></BinarySignatures>"
+        "</File></Files></ContainerSignature></ContainerSignatures>"
+        '<FileFormatMappings><FileFormatMapping signatureId="1" Puid="fmt/1"/>'
+        '</FileFormatMappings><TriggerPuids><TriggerPuid ContainerType="ZIP" '
+        'Puid="x-fmt/263"/></TriggerPuids></ContainerSignatureMapping>'
+    ).encode()
+
+
+def _zip(members: dict) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def test_uncompilable_sequences_never_match():
+    # Un salto con mínimo mayor que el máximo no compila: la firma se
+    # descarta, sin impedir cargar las demás
+    for pattern in ("41{5-3}41", "41{99999999999999999999}42"):
+        sig = _PRONOMSignature(
+            "1", [{"location": "BOF", "pattern": pattern, "min_offset": 0}]
+        )
+        assert sig.match(b"A" * 64, b"A" * 64) is False
+
+    db = _ContainerDB(lambda: io.BytesIO(_container_xml("41{5-3}41"))).load()
+    assert db.refine(_zip({"mimetype": b"A" * 64}), "x-fmt/263") == []
+    db = _ContainerDB(lambda: io.BytesIO(_container_xml("4141"))).load()
+    assert db.refine(_zip({"mimetype": b"A" * 64}), "x-fmt/263") == ["fmt/1"]
+
+
+def test_container_eof_window():
+    # Las subsecuencias de contenedores usan las mismas ventanas que las binarias
+    source = _container_xml("4142", "EOFoffset", 0, 0)
+    db = _ContainerDB(lambda: io.BytesIO(source)).load()
+    assert db.refine(_zip({"mimetype": b"zzzzAB"}), "x-fmt/263") == ["fmt/1"]
+    assert db.refine(_zip({"mimetype": b"zzzzABz"}), "x-fmt/263") == []
+    source = _container_xml("4142", "EOFoffset", 1, 2)
+    db = _ContainerDB(lambda: io.BytesIO(source)).load()
+    assert db.refine(_zip({"mimetype": b"zABzz"}), "x-fmt/263") == ["fmt/1"]
+    assert db.refine(_zip({"mimetype": b"zzAB"}), "x-fmt/263") == []
@@ -0,0 +1,60 @@
+"""Caché de resultados persistente (SQLite)."""
+
+import os, sqlite3, sys
+import pytest
+from pronom_tools_test.format_info import FormatInfoCollector
+from pronom_tools_test.result_cache import _MISS, ResultCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from corpus import generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    dest = tmp_path_factory.mktemp("corpus")
+    sig_xml, container_xml, files_dir = generate(
+        str(dest), n_formats=60, n_files=40, seed=11, large_mb=1
+    )
+    paths = sorted(os.path.join(files_dir, name) for name in os.listdir(files_dir))
+    return sig_xml, container_xml, paths
+
+
+def _rows(path) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_persistent_round_trip(corpus, tmp_path):
+    sig_xml, container_xml, paths = corpus
+    db_path = str(tmp_path / "results.sqlite")
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    cache = collector.enable_result_cache(path=db_path)
+    cache.FLUSH_EVERY = 16
+    expected = [collector.identify_file(path) for path in paths]
+    # Solo se escriben lotes completos hasta cerrar
+    assert _rows(db_path) == len(paths) // 16 * 16
+    collector.disable_result_cache()
+    assert _rows(db_path) == len(paths)
+
+    again = FormatInfoCollector(sig_xml, container_xml)
+    again.enable_result_cache(path=db_path)
+    assert [again.identify_file(path) for path in paths] == expected
+    assert again.cache_stats()["hits"] == len(paths)
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_db_version_change_invalidates(corpus, tmp_path):
+    sig_xml, container_xml, paths = corpus
+    db_path = str(tmp_path / "results.sqlite")
+    collector = FormatInfoCollector(sig_xml, container_xml)
+    cache = ResultCache("v1", path=db_path)
+    key = cache.stat_key(os.stat(paths[0]))
+    cache.put(key, collector.identify_file(paths[0]))
+    cache.close()
+    assert cache.get(key, collector.formats) is not _MISS
+
+    other = ResultCache("v2", path=db_path)
+    assert other.get(key, collector.formats) is _MISS
+    assert _rows(db_path) == 0
+    other.close()